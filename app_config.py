@@ -3,27 +3,83 @@
 
 import os
 import json
+import threading
 import tkinter as tk
-import platform
+from utils.config_store import ConfigStore
+from utils.config_service import ConfigService
+from utils.config_layers import ConfigResolver
+from utils import scrcpy_settings
 
 class AppConfig:
     """
     Gerencia todas as configurações do aplicativo, incluindo caminhos de arquivos,
     metadados de apps e variáveis Tkinter que guardam o estado da interface.
+
+    As alterações são gravadas em segundo plano: cada mudança marca a seção
+    ('global' ou 'device') como suja e as gravações de um intervalo de
+    SAVE_DELAY_MS são agrupadas em uma única escrita atômica por arquivo.
+    `flush()` grava imediatamente o que estiver pendente.
+
+    Metadados, caches e configurações por jogo ficam no ConfigService (SQLite),
+    cuja thread escritora única serializa as alterações vindas de qualquer thread.
+
+    A configuração usada num lançamento é resolvida em camadas (padrões → global
+    → dispositivo → perfil do app/jogo) pelo ConfigResolver, que acompanha as
+    variáveis Tkinter pelos traces; perfis guardam só as chaves que diferem da
+    configuração do dispositivo no momento em que foram salvos.
     """
+    SAVE_DELAY_MS = 500
+
+    # Valores padrão das variáveis (camada 'default' da resolução de configuração).
+    # Os das opções do scrcpy vêm do ScrcpySettings.
+    DEFAULTS = {
+        'theme': 'superhero',
+        'device_commercial_name': 'Unknown Device',
+        'use_ludashi_pkg': False,
+        'winlator_display_pool': False,
+        **scrcpy_settings.DEFAULTS,
+    }
+
+    # Chaves que nunca entram nos perfis de app/jogo: identificam o dispositivo ou o
+    # próprio app, ou são opções do launcher que valem para o dispositivo inteiro.
+    PROFILE_EXCLUDED_KEYS = {'device_id', 'device_commercial_name', 'start_app', 'start_app_name', 'theme',
+                             'use_ludashi_pkg', 'winlator_display_pool', 'fps_telemetry', 'adaptive_bitrate'}
+
+    # Seções do dispositivo guardadas no SQLite (seção -> tabela), fora do JSON.
+    # Os caches ocupam uma linha cada na tabela 'caches'.
+    STORE_SECTIONS = {
+        'app_metadata': 'app_metadata',
+        'winlator_game_configs': 'game_configs',
+        'exe_icon_failures': 'exe_icon_failures',
+    }
+    STORE_CACHES = ('app_list_cache', 'encoder_cache', 'benchmark_results')
+
     def __init__(self, root, device_id):
-        if platform.system() == "Windows":
-            self.CONFIG_DIR = os.path.join(os.getenv('APPDATA'), 'ScrcpyLauncher')
-        else:
-            self.CONFIG_DIR = os.path.expanduser("~/.config/scrcpy_launcher")
+        self.root = root
+        self._dirty = set()
+        self._flush_job = None
+        self._suspend_saves = False
+        self._lock = threading.RLock()
+
+        self.CONFIG_DIR = scrcpy_settings.config_dir()
 
         self.ICON_CACHE_DIR = os.path.join(self.CONFIG_DIR, 'icon_cache')
+        # Retratos de capacidades são compartilhados entre dispositivos com o mesmo build
+        self.CAPABILITIES_DIR = os.path.join(self.CONFIG_DIR, 'capabilities')
         os.makedirs(self.ICON_CACHE_DIR, exist_ok=True)
 
         # --- INÍCIO DA ALTERAÇÃO: Lógica de Arquivo Global ---
         self.GLOBAL_CONFIG_FILE = os.path.join(self.CONFIG_DIR, 'global_config.json')
         self.CONFIG_FILE = os.path.join(self.CONFIG_DIR, f'config_{device_id}.json')
-
+        self.WINLATOR_INDEX_FILE = os.path.join(self.CONFIG_DIR, f'winlator_index_{device_id}.json')
+        self.APP_INDEX_FILE = os.path.join(self.CONFIG_DIR, f'app_index_{device_id}.json')
+        self.SESSIONS_JOURNAL_FILE = os.path.join(self.CONFIG_DIR, 'sessions.json')
+        self.LAUNCH_METRICS_FILE = os.path.join(self.CONFIG_DIR, 'launch_metrics.json')
+        self.STORE_FILE = os.path.join(self.CONFIG_DIR, 'config.db')
+
+        self.store = ConfigStore(self.STORE_FILE)
+        self.service = ConfigService(self.store)
+        self.device_id = device_id
         self.global_config_data = self._load_json(self.GLOBAL_CONFIG_FILE)
         self.config_data = self._load_json(self.CONFIG_FILE)
 
@@ -32,51 +88,55 @@ class AppConfig:
         # --- FIM DA ALTERAÇÃO ---
 
         self.config_data.setdefault('general_config', {})
-        self.config_data.setdefault('app_metadata', {})
-        self.config_data.setdefault('app_list_cache', {})
-        self.config_data.setdefault('winlator_game_configs', {})
-        self.config_data.setdefault('encoder_cache', {})
+        self._migrate_device_json()
 
         general_config = self.config_data['general_config']
         self.vars = {
             'device_id': tk.StringVar(master=root, value=device_id),
             # --- INÍCIO DA ALTERAÇÃO: Carrega o tema da config global ---
-            'theme': tk.StringVar(master=root, value=self.global_config_data.get('theme', 'superhero')),
+            'theme': tk.StringVar(master=root, value=self.global_config_data.get('theme', self.DEFAULTS['theme'])),
             # --- FIM DA ALTERAÇÃO ---
-            'device_commercial_name': tk.StringVar(master=root, value=general_config.get('device_commercial_name', 'Unknown Device')),
-            'start_app': tk.StringVar(master=root, value=general_config.get('start_app', '')),
-            'start_app_name': tk.StringVar(master=root, value=general_config.get('start_app_name', 'None')),
-            'mouse_mode': tk.StringVar(master=root, value=general_config.get('mouse_mode', 'sdk')),
-            'gamepad_mode': tk.StringVar(master=root, value=general_config.get('gamepad_mode', 'disabled')),
-            'keyboard_mode': tk.StringVar(master=root, value=general_config.get('keyboard_mode', 'sdk')),
-            'mouse_bind': tk.StringVar(master=root, value=general_config.get('mouse_bind', '++++:bhsn')),
-            'render_driver': tk.StringVar(master=root, value=general_config.get('render_driver', 'opengl')),
-            'max_fps': tk.StringVar(master=root, value=general_config.get('max_fps', '60')),
-            'max_size': tk.StringVar(master=root, value=general_config.get('max_size', '0')),
-            'display': tk.StringVar(master=root, value=general_config.get('display', 'Auto')),
-            'new_display': tk.StringVar(master=root, value=general_config.get('new_display', 'Disabled')),
-            'video_codec': tk.StringVar(master=root, value=general_config.get('video_codec', 'Auto')),
-            'video_encoder': tk.StringVar(master=root, value=general_config.get('video_encoder', 'Auto')),
-            'audio_codec': tk.StringVar(master=root, value=general_config.get('audio_codec', 'Auto')),
-            'audio_encoder': tk.StringVar(master=root, value=general_config.get('audio_encoder', 'Auto')),
-            'extraargs': tk.StringVar(master=root, value=general_config.get('extraargs', '')),
-            'stay_awake': tk.BooleanVar(master=root, value=general_config.get('stay_awake', False)),
-
-            'mipmaps': tk.BooleanVar(master=root, value=general_config.get('mipmaps', False)),
-            'turn_screen_off': tk.BooleanVar(master=root, value=general_config.get('turn_screen_off', False)),
-            'fullscreen': tk.BooleanVar(master=root, value=general_config.get('fullscreen', False)),
-            'use_ludashi_pkg': tk.BooleanVar(master=root, value=general_config.get('use_ludashi_pkg', False)),
-            'no_audio': tk.BooleanVar(master=root, value=general_config.get('no_audio', False)),
-            'no_video': tk.BooleanVar(master=root, value=general_config.get('no_video', False)),
-
-            'video_bitrate_slider': tk.IntVar(master=root, value=general_config.get('video_bitrate_slider', 3000)),
-            'audio_buffer': tk.IntVar(master=root, value=general_config.get('audio_buffer', 5)),
-            'video_buffer': tk.IntVar(master=root, value=general_config.get('video_buffer', 0)),
+            'device_commercial_name': tk.StringVar(master=root, value=general_config.get('device_commercial_name', self.DEFAULTS['device_commercial_name'])),
+            'start_app': tk.StringVar(master=root, value=general_config.get('start_app', self.DEFAULTS['start_app'])),
+            'start_app_name': tk.StringVar(master=root, value=general_config.get('start_app_name', self.DEFAULTS['start_app_name'])),
+            'mouse_mode': tk.StringVar(master=root, value=general_config.get('mouse_mode', self.DEFAULTS['mouse_mode'])),
+            'gamepad_mode': tk.StringVar(master=root, value=general_config.get('gamepad_mode', self.DEFAULTS['gamepad_mode'])),
+            'keyboard_mode': tk.StringVar(master=root, value=general_config.get('keyboard_mode', self.DEFAULTS['keyboard_mode'])),
+            'mouse_bind': tk.StringVar(master=root, value=general_config.get('mouse_bind', self.DEFAULTS['mouse_bind'])),
+            'render_driver': tk.StringVar(master=root, value=general_config.get('render_driver', self.DEFAULTS['render_driver'])),
+            'max_fps': tk.StringVar(master=root, value=general_config.get('max_fps', self.DEFAULTS['max_fps'])),
+            'max_size': tk.StringVar(master=root, value=general_config.get('max_size', self.DEFAULTS['max_size'])),
+            'display': tk.StringVar(master=root, value=general_config.get('display', self.DEFAULTS['display'])),
+            'new_display': tk.StringVar(master=root, value=general_config.get('new_display', self.DEFAULTS['new_display'])),
+            'video_codec': tk.StringVar(master=root, value=general_config.get('video_codec', self.DEFAULTS['video_codec'])),
+            'video_encoder': tk.StringVar(master=root, value=general_config.get('video_encoder', self.DEFAULTS['video_encoder'])),
+            'audio_codec': tk.StringVar(master=root, value=general_config.get('audio_codec', self.DEFAULTS['audio_codec'])),
+            'audio_encoder': tk.StringVar(master=root, value=general_config.get('audio_encoder', self.DEFAULTS['audio_encoder'])),
+            'extraargs': tk.StringVar(master=root, value=general_config.get('extraargs', self.DEFAULTS['extraargs'])),
+            'stay_awake': tk.BooleanVar(master=root, value=general_config.get('stay_awake', self.DEFAULTS['stay_awake'])),
+
+            'mipmaps': tk.BooleanVar(master=root, value=general_config.get('mipmaps', self.DEFAULTS['mipmaps'])),
+            'turn_screen_off': tk.BooleanVar(master=root, value=general_config.get('turn_screen_off', self.DEFAULTS['turn_screen_off'])),
+            'fullscreen': tk.BooleanVar(master=root, value=general_config.get('fullscreen', self.DEFAULTS['fullscreen'])),
+            'use_ludashi_pkg': tk.BooleanVar(master=root, value=general_config.get('use_ludashi_pkg', self.DEFAULTS['use_ludashi_pkg'])),
+            'winlator_display_pool': tk.BooleanVar(master=root, value=general_config.get('winlator_display_pool', self.DEFAULTS['winlator_display_pool'])),
+            'no_audio': tk.BooleanVar(master=root, value=general_config.get('no_audio', self.DEFAULTS['no_audio'])),
+            'no_video': tk.BooleanVar(master=root, value=general_config.get('no_video', self.DEFAULTS['no_video'])),
+            'fps_telemetry': tk.BooleanVar(master=root, value=general_config.get('fps_telemetry', self.DEFAULTS['fps_telemetry'])),
+            'adaptive_bitrate': tk.BooleanVar(master=root, value=general_config.get('adaptive_bitrate', self.DEFAULTS['adaptive_bitrate'])),
+
+            'video_bitrate_slider': tk.IntVar(master=root, value=general_config.get('video_bitrate_slider', self.DEFAULTS['video_bitrate_slider'])),
+            'audio_buffer': tk.IntVar(master=root, value=general_config.get('audio_buffer', self.DEFAULTS['audio_buffer'])),
+            'video_buffer': tk.IntVar(master=root, value=general_config.get('video_buffer', self.DEFAULTS['video_buffer'])),
         }
 
-        for var in self.vars.values():
+        self.resolver = ConfigResolver(self.DEFAULTS)
+        self._sync_resolver()
+        self._migrate_profiles()
+
+        for key, var in self.vars.items():
             if isinstance(var, (tk.StringVar, tk.BooleanVar, tk.IntVar)):
-                var.trace_add('write', lambda *args: self.save_config())
+                var.trace_add('write', lambda *args, key=key: self._on_var_write(key))
 
     def get(self, key):
         """Retorna a variável Tkinter para uma dada chave."""
@@ -86,6 +146,60 @@ class AppConfig:
         """Retorna um dicionário com os valores atuais de todas as variáveis."""
         return {key: var.get() for key, var in self.vars.items()}
 
+    # --- Resolução em camadas ---
+    def _sync_resolver(self):
+        """Recarrega as camadas global e de dispositivo a partir das variáveis (uma leitura de cada)."""
+        all_values = self.get_all_values()
+        self.resolver.set_layer('global', {key: all_values[key] for key in self.GLOBAL_KEYS if key in all_values})
+        self.resolver.set_layer('device', {key: val for key, val in all_values.items() if key not in self.GLOBAL_KEYS})
+
+    def _profile_values(self, values):
+        """Chaves de um perfil de app/jogo: só as que diferem da configuração atual do dispositivo."""
+        base = self.resolver.resolve()
+        return {key: value for key, value in values.items()
+                if key not in self.PROFILE_EXCLUDED_KEYS and (key not in base or base[key] != value)}
+
+    def _migrate_profiles(self):
+        """
+        Migração única: perfis salvos como retratos completos (formato antigo,
+        reconhecidos por conterem chaves excluídas) são reduzidos ao que difere
+        da configuração do dispositivo.
+        """
+        def is_snapshot(profile):
+            return bool(profile) and not self.PROFILE_EXCLUDED_KEYS.isdisjoint(profile)
+
+        migrated = 0
+        for pkg_name, metadata in self.service.snapshot('app_metadata', self.device_id).items():
+            if is_snapshot(metadata.get('config')):
+                self.save_app_metadata(pkg_name, {'config': self._profile_values(metadata['config'])})
+                migrated += 1
+        for game_path, config in self.service.snapshot('game_configs', self.device_id).items():
+            if is_snapshot(config):
+                self.service.put('game_configs', self.device_id, game_path, self._profile_values(config))
+                migrated += 1
+        if migrated:
+            print(f"[app_config] Reduced {migrated} saved profiles to their overrides")
+
+    def resolve_config(self):
+        """Visão imutável da configuração atual (padrões → global → dispositivo), sem ler as variáveis Tkinter."""
+        return self.resolver.resolve()
+
+    def resolve_app_config(self, pkg_name):
+        """Visão imutável da configuração efetiva de um app (com o perfil salvo dele por cima)."""
+        return self.resolver.resolve(('app', pkg_name), self.get_app_metadata(pkg_name).get('config'))
+
+    def resolve_game_config(self, game_path):
+        """Visão imutável da configuração efetiva de um jogo Winlator."""
+        return self.resolver.resolve(('game', game_path), self.get_winlator_game_config(game_path))
+
+    def explain_app_config(self, pkg_name):
+        """{chave: (valor, camada)}, com camada 'default', 'global', 'device' ou 'app'."""
+        return self.resolver.explain(self.get_app_metadata(pkg_name).get('config'), 'app')
+
+    def explain_game_config(self, game_path):
+        """{chave: (valor, camada)}, com camada 'default', 'global', 'device' ou 'game'."""
+        return self.resolver.explain(self.get_winlator_game_config(game_path), 'game')
+
     def _load_json(self, file_path):
         """Carrega um arquivo JSON genérico."""
         if os.path.exists(file_path):
@@ -96,97 +210,203 @@ class AppConfig:
                 return {}
         return {}
 
+    def _migrate_device_json(self):
+        """
+        Migração única: move as seções antigas do JSON do dispositivo para o
+        SQLite e as remove do arquivo.
+        """
+        legacy = {section: self.config_data.pop(section) for section in (*self.STORE_SECTIONS, *self.STORE_CACHES)
+                  if section in self.config_data}
+        if not legacy:
+            return
+        tables = {table: legacy.get(section, {}) for section, table in self.STORE_SECTIONS.items()}
+        tables['caches'] = {section: legacy[section] for section in self.STORE_CACHES if legacy.get(section)}
+        self.store.import_rows(self.device_id, tables)
+        self._save_json(self.config_data, self.CONFIG_FILE)
+        print(f"[app_config] Migrated {', '.join(legacy)} from {self.CONFIG_FILE} to {self.STORE_FILE}")
+
     def _save_json(self, data, file_path):
-        """Salva dados em um arquivo JSON genérico."""
-        with open(file_path, "w", encoding='utf-8') as f:
+        """Salva dados em um arquivo JSON genérico (arquivo temporário + rename, atômico)."""
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
             json.dump(data, f, indent=4)
+        os.replace(tmp_path, file_path)
 
     # --- INÍCIO DA ALTERAÇÃO: Lógica de Salvamento Global/Dispositivo ---
+    def _on_var_write(self, key):
+        section = 'global' if key in self.GLOBAL_KEYS else 'device'
+        self.resolver.set_value(section, key, self.vars[key].get())
+        if self._suspend_saves:
+            return
+        self._mark_dirty(section)
+
+    def _mark_dirty(self, section):
+        """Marca a seção para gravação e agenda um flush. Só na thread do Tk (chega pelo trace das variáveis)."""
+        with self._lock:
+            self._dirty.add(section)
+            if self._flush_job is None:
+                self._flush_job = self.root.after(self.SAVE_DELAY_MS, self.flush)
+
+    def flush(self):
+        """Grava imediatamente as seções pendentes, uma escrita por arquivo."""
+        with self._lock:
+            if self._flush_job is not None:
+                try:
+                    self.root.after_cancel(self._flush_job)
+                except tk.TclError:
+                    pass
+                self._flush_job = None
+            dirty, self._dirty = self._dirty, set()
+            if not dirty:
+                return
+
+            try:
+                all_values = self.get_all_values()
+            except tk.TclError:
+                all_values = None # Interpretador já encerrado (flush na saída): mantém os valores da última gravação
+            # Separa as configurações globais das de dispositivo
+            if 'global' in dirty and all_values is not None:
+                self.global_config_data = {key: all_values[key] for key in self.GLOBAL_KEYS if key in all_values}
+                self._save_json(self.global_config_data, self.GLOBAL_CONFIG_FILE)
+            if 'device' in dirty:
+                if all_values is not None:
+                    self.config_data['general_config'] = {key: val for key, val in all_values.items() if key not in self.GLOBAL_KEYS}
+                self._save_json(self.config_data, self.CONFIG_FILE)
+
+    def close(self):
+        """Grava tudo o que estiver pendente (JSON e SQLite). Usado na saída e antes do restart."""
+        self.flush()
+        self.service.flush(timeout=5)
+
     def save_config(self):
         """
         Salva o estado atual das variáveis, separando as configurações
         globais das configurações por dispositivo em seus respectivos arquivos.
         """
-        all_values = self.get_all_values()
-
-        # Separa as configurações globais das de dispositivo
-        global_settings = {key: all_values[key] for key in self.GLOBAL_KEYS if key in all_values}
-        device_settings = {key: val for key, val in all_values.items() if key not in self.GLOBAL_KEYS}
-
-        # Salva o arquivo de configuração global
-        self.global_config_data = global_settings
-        self._save_json(self.global_config_data, self.GLOBAL_CONFIG_FILE)
-
-        # Salva o arquivo de configuração do dispositivo
-        self.config_data['general_config'] = device_settings
-        self._save_json(self.config_data, self.CONFIG_FILE)
+        with self._lock:
+            self._dirty.update(('global', 'device'))
+        self.flush()
     # --- FIM DA ALTERAÇÃO ---
 
     def get_app_metadata(self, key):
         """Retorna os metadados para uma chave específica (pkg_name, path, etc.)."""
-        return self.config_data['app_metadata'].get(key, {})
+        return self.service.get('app_metadata', self.device_id, key, {})
 
     def save_app_metadata(self, key, data):
         """Salva ou atualiza os metadados para uma chave específica."""
-        if key not in self.config_data['app_metadata']:
-            self.config_data['app_metadata'][key] = {}
-        self.config_data['app_metadata'][key].update(data)
-        self._save_json(self.config_data, self.CONFIG_FILE)
+        self.service.update('app_metadata', self.device_id, key, lambda current: {**(current or {}), **data})
 
     def save_app_scrcpy_config(self, pkg_name, config_data):
         """Salva apenas a configuração scrcpy para um app, mantendo outros metadados."""
-        if pkg_name not in self.config_data['app_metadata']:
-            self.config_data['app_metadata'][pkg_name] = {}
-        self.config_data['app_metadata'][pkg_name]['config'] = config_data
-        self._save_json(self.config_data, self.CONFIG_FILE)
+        self.save_app_metadata(pkg_name, {'config': self._profile_values(config_data)})
 
     def delete_app_scrcpy_config(self, pkg_name):
         """Deleta apenas a configuração scrcpy de um app, mantendo outros metadados."""
-        if pkg_name in self.config_data['app_metadata'] and 'config' in self.config_data['app_metadata'][pkg_name]:
-            del self.config_data['app_metadata'][pkg_name]['config']
-            self._save_json(self.config_data, self.CONFIG_FILE)
-            return True
-        return False
+        if 'config' not in self.get_app_metadata(pkg_name):
+            return False
+        self.service.update('app_metadata', self.device_id, pkg_name,
+                            lambda current: {key: value for key, value in (current or {}).items() if key != 'config'})
+        return True
 
     def get_app_list_cache(self):
         """Retorna o cache da lista de apps instalados."""
-        return self.config_data['app_list_cache']
+        return self.service.get('caches', self.device_id, 'app_list_cache', {})
 
     def save_app_list_cache(self, apps):
         """Salva o cache da lista de apps instalados."""
-        self.config_data['app_list_cache'] = apps
-        self._save_json(self.config_data, self.CONFIG_FILE)
+        self.service.put('caches', self.device_id, 'app_list_cache', dict(apps))
+
+    def get_app_index(self):
+        """Retorna o índice de pacotes (versionCode/mtime) salvo para o dispositivo atual."""
+        return self._load_json(self.APP_INDEX_FILE)
+
+    def save_app_index(self, index):
+        """Salva o índice de pacotes ao lado do config do dispositivo."""
+        self._save_json(index, self.APP_INDEX_FILE)
+
+    def forget_apps(self, pkg_names):
+        """Remove os metadados e os ícones em cache de apps desinstalados do dispositivo atual."""
+        pkg_names = set(pkg_names)
+        for pkg_name in pkg_names:
+            self.service.delete('app_metadata', self.device_id, pkg_name)
+
+        # O cache de ícones é compartilhado: mantém os ícones de apps ainda listados em outro dispositivo.
+        in_use = set()
+        for device_id, apps in self.service.values_by_device('caches', 'app_list_cache').items():
+            if device_id != self.device_id:
+                in_use.update(apps.values())
+        for pkg_name in pkg_names - in_use:
+            try:
+                os.remove(os.path.join(self.ICON_CACHE_DIR, f"{pkg_name}.png"))
+            except FileNotFoundError:
+                pass
 
     def get_winlator_game_config(self, game_path):
         """Retorna a configuração específica para um jogo Winlator."""
-        return self.config_data['winlator_game_configs'].get(game_path, {})
+        return self.service.get('game_configs', self.device_id, game_path, {})
+
+    def get_winlator_game_configs(self):
+        """Retorna todas as configurações específicas de jogos Winlator ({caminho: config})."""
+        return self.service.snapshot('game_configs', self.device_id)
 
     def save_winlator_game_config(self, game_path, config):
         """Salva ou atualiza a configuração específica para um jogo Winlator."""
-        self.config_data['winlator_game_configs'][game_path] = config
-        self._save_json(self.config_data, self.CONFIG_FILE)
+        self.service.put('game_configs', self.device_id, game_path, self._profile_values(config))
 
     def delete_winlator_game_config(self, game_path):
         """Deleta a configuração específica para um jogo Winlator."""
-        if game_path in self.config_data['winlator_game_configs']:
-            del self.config_data['winlator_game_configs'][game_path]
-            self._save_json(self.config_data, self.CONFIG_FILE)
+        if self.service.get('game_configs', self.device_id, game_path) is None:
+            return False
+        self.service.delete('game_configs', self.device_id, game_path)
+        return True
+
+    def get_exe_icon_failure(self, key):
+        """Retorna o registro de falhas de extração para uma chave de .exe ({'count', 'last_attempt'})."""
+        return self.service.get('exe_icon_failures', self.device_id, key, {})
+
+    def record_exe_icon_failure(self, key, timestamp):
+        """Incrementa o contador de falhas de extração de uma chave de .exe."""
+        self.service.update('exe_icon_failures', self.device_id, key,
+                            lambda current: {'count': (current or {}).get('count', 0) + 1, 'last_attempt': timestamp})
+
+    def clear_exe_icon_failure(self, key):
+        """Remove o registro de falhas de uma chave de .exe."""
+        self.service.delete('exe_icon_failures', self.device_id, key)
+
+    def get_benchmark_results(self):
+        """Retorna o último benchmark de encoders do dispositivo ({'ran_at', 'results'})."""
+        return self.service.get('caches', self.device_id, 'benchmark_results', {})
+
+    def save_benchmark_results(self, results, timestamp):
+        """Salva a tabela classificada do benchmark de encoders."""
+        self.service.put('caches', self.device_id, 'benchmark_results', {'ran_at': timestamp, 'results': results})
+
+    def get_winlator_index(self):
+        """Retorna o índice de atalhos do Winlator salvo para o dispositivo atual."""
+        return self._load_json(self.WINLATOR_INDEX_FILE)
+
+    def save_winlator_index(self, index):
+        """Salva o índice de atalhos do Winlator ao lado do config do dispositivo."""
+        self._save_json(index, self.WINLATOR_INDEX_FILE)
 
     def get_icon_cache_dir(self):
         """Retorna o diretório de cache de ícones."""
         return self.ICON_CACHE_DIR
 
+    def get_capabilities_dir(self):
+        """Retorna o diretório dos retratos de capacidades dos dispositivos."""
+        return self.CAPABILITIES_DIR
+
     def get_encoder_cache(self):
         """Retorna o cache dos encoders."""
-        return self.config_data.get('encoder_cache', {})
+        return self.service.get('caches', self.device_id, 'encoder_cache', {})
 
     def save_encoder_cache(self, video_encoders, audio_encoders):
         """Salva os encoders no cache."""
-        self.config_data['encoder_cache'] = {
+        self.service.put('caches', self.device_id, 'encoder_cache', {
             'video': video_encoders,
             'audio': audio_encoders
-        }
-        self._save_json(self.config_data, self.CONFIG_FILE)
+        })
 
     def has_encoder_cache(self):
         """Verifica se o cache de encoders existe e não está vazio."""
@@ -198,16 +418,20 @@ class AppConfig:
         """Carrega a configuração para um novo device_id e atualiza as vars, ignorando as globais."""
         self.save_config()
 
+        self.device_id = device_id
         self.CONFIG_FILE = os.path.join(self.CONFIG_DIR, f'config_{device_id}.json')
+        self.WINLATOR_INDEX_FILE = os.path.join(self.CONFIG_DIR, f'winlator_index_{device_id}.json')
+        self.APP_INDEX_FILE = os.path.join(self.CONFIG_DIR, f'app_index_{device_id}.json')
         self.config_data = self._load_json(self.CONFIG_FILE)
+        # Verifica se um novo arquivo de configuração será criado
+        is_new_config = 'general_config' not in self.config_data
         self.config_data.setdefault('general_config', {})
-        self.config_data.setdefault('app_metadata', {})
-        self.config_data.setdefault('app_list_cache', {})
-        self.config_data.setdefault('winlator_game_configs', {})
-        self.config_data.setdefault('encoder_cache', {})
+        self._migrate_device_json()
 
         general_config = self.config_data['general_config']
 
+        # Atualiza todas as vars sem agendar uma gravação por variável; grava uma vez no final.
+        self._suspend_saves = True
         for key, var in self.vars.items():
             # Pula a atualização de variáveis globais, pois elas não mudam com o dispositivo
             if key in self.GLOBAL_KEYS:
@@ -234,8 +458,11 @@ class AppConfig:
                 var.set(device_id)
             else:
                 var.set(general_config.get(key, default_value))
+        self._suspend_saves = False
+        with self._lock:
+            self._dirty.add('device')
+        self.flush()
+        self._migrate_profiles()
 
-        # Verifica se um novo arquivo de configuração foi criado
-        is_new_config = not os.path.exists(self.CONFIG_FILE) or 'general_config' not in self._load_json(self.CONFIG_FILE)
         return is_new_config
     # --- FIM DA ALTERAÇÃO ---
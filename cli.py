@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# FILE: cli.py
+# PURPOSE: Linha de comando para lançar apps e jogos do Winlator, listar e
+#          encerrar sessões sem a interface gráfica (não importa Tkinter/PIL).
+#          Usa a mesma configuração salva e o mesmo diário de sessões do launcher.
+
+import os
+import sys
+import json
+import argparse
+from utils import adb_handler, scrcpy_handler
+from utils.config_store import ConfigStore
+from utils.scrcpy_settings import ScrcpySettings, config_dir, load_config
+
+DISPLAY_WAIT_TIMEOUT = 30
+DISPLAY_READY_TIMEOUT = 10
+
+
+def _resolve_device(serial):
+    device_id = serial or adb_handler.get_connected_device_id()
+    if not device_id:
+        sys.exit("No ADB device connected.")
+    return device_id
+
+
+def _app_name(device_id, pkg_name):
+    """Nome do app no último cache do launcher, ou o próprio pacote."""
+    store_path = os.path.join(config_dir(), 'config.db')
+    if os.path.exists(store_path):
+        apps = ConfigStore(store_path).get('caches', device_id, 'app_list_cache') or {}
+        for name, pkg in apps.items():
+            if pkg == pkg_name:
+                return name
+    return pkg_name
+
+
+def _wait_session(process):
+    """Mantém a CLI anexada até o scrcpy terminar (Ctrl+C encerra a sessão)."""
+    try:
+        return process.wait()
+    except KeyboardInterrupt:
+        scrcpy_handler.kill_scrcpy_session(process.pid)
+        return 130
+
+
+def launch_app(args):
+    device_id = _resolve_device(args.serial)
+    settings = ScrcpySettings.from_mapping(load_config(device_id, app=args.package))
+    app_name = args.title or _app_name(device_id, args.package)
+    settings = settings.replace(start_app=args.package, start_app_name=app_name)
+    if not args.wait:
+        # Sem ninguém lendo o pipe, o scrcpy pararia ao sair da CLI: lança desanexado e sem telemetria.
+        settings = settings.replace(fps_telemetry=False)
+
+    icon_path = os.path.join(config_dir(), 'icon_cache', f"{args.package}.png")
+    process = scrcpy_handler.launch_scrcpy(settings, capture_output=args.wait, window_title=app_name,
+                                           device_id=device_id, icon_path=icon_path, session_type='app')
+    print(f"[cli] Started {app_name} (PID={process.pid})")
+    return _wait_session(process) if args.wait else 0
+
+
+def launch_game(args):
+    device_id = _resolve_device(args.serial)
+    shortcut_path = args.shortcut
+    if '/' not in shortcut_path:
+        if not shortcut_path.endswith('.desktop'):
+            shortcut_path += '.desktop'
+        shortcut_path = adb_handler.WINLATOR_FRONTEND_DIR + shortcut_path
+
+    config_values = load_config(device_id, game=shortcut_path)
+    settings = ScrcpySettings.from_mapping(config_values).replace(start_app='')
+    if args.new_display:
+        settings = settings.replace(new_display=args.new_display)
+    if settings.new_display in ('', 'Disabled'):
+        sys.exit("Winlator games need a virtual display: set 'new_display' for this game or pass --new-display.")
+    # Opção do dispositivo, nunca do perfil do jogo (perfis antigos ainda podem tê-la).
+    package_name = "com.ludashi.benchmark" if load_config(device_id).get('use_ludashi_pkg') else "com.winlator"
+    game_name = os.path.splitext(os.path.basename(shortcut_path))[0]
+
+    # O id do display só aparece na saída do scrcpy, então a sessão fica anexada à CLI.
+    process = scrcpy_handler.launch_scrcpy(settings, capture_output=True, window_title=game_name,
+                                           device_id=device_id, session_type='winlator')
+    output = scrcpy_handler.get_session_output(process.pid)
+    event = output.wait_for('display_created', timeout=DISPLAY_WAIT_TIMEOUT) if output else None
+    if not event:
+        scrcpy_handler.kill_scrcpy_session(process.pid)
+        sys.exit("Virtual display not found.")
+    try:
+        adb_handler.wait_for_display(event['display_id'], device_id, timeout=DISPLAY_READY_TIMEOUT)
+        adb_handler.start_winlator_app(shortcut_path, event['display_id'], package_name, device_id)
+    except Exception as e:
+        scrcpy_handler.kill_scrcpy_session(process.pid)
+        sys.exit(f"Could not start {game_name}: {e}")
+    print(f"[cli] Started {game_name} on display {event['display_id']} (PID={process.pid})")
+    return _wait_session(process)
+
+
+def list_sessions(args):
+    sessions = [{field: session.get(field) for field in ('pid', 'app_name', 'session_type', 'device_id')}
+                for session in scrcpy_handler.get_active_scrcpy_sessions()]
+    if args.json:
+        print(json.dumps(sessions, indent=2))
+    elif not sessions:
+        print("No active scrcpy sessions.")
+    else:
+        for session in sessions:
+            print(f"{session['pid']:>8}  {session['session_type'] or '-':<12} {session['device_id'] or '-':<20} {session['app_name']}")
+    return 0
+
+
+def kill(args):
+    if args.pid == 'all':
+        pids = [session['pid'] for session in scrcpy_handler.get_active_scrcpy_sessions()]
+    elif args.pid.isdigit():
+        pids = [int(args.pid)]
+    else:
+        sys.exit(f"Invalid PID: {args.pid}")
+    failed = [pid for pid in pids if not scrcpy_handler.kill_scrcpy_session(pid)]
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Launch scrcpy sessions without the GUI.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    app_parser = subparsers.add_parser('launch-app', help="Launch an Android app with its saved settings")
+    app_parser.add_argument('package')
+    app_parser.add_argument('-s', '--serial', help="ADB device serial (default: first connected device)")
+    app_parser.add_argument('--title', help="Window title (default: app name from the launcher cache)")
+    app_parser.add_argument('--wait', action='store_true', help="Stay attached until the session ends (enables FPS telemetry)")
+    app_parser.set_defaults(func=launch_app)
+
+    game_parser = subparsers.add_parser('launch-game', help="Launch a Winlator shortcut on a virtual display")
+    game_parser.add_argument('shortcut', help="Shortcut path or name in the Winlator frontend folder")
+    game_parser.add_argument('-s', '--serial', help="ADB device serial (default: first connected device)")
+    game_parser.add_argument('--new-display', help="Virtual display size, e.g. 1280x720 (default: saved setting)")
+    game_parser.set_defaults(func=launch_game)
+
+    sessions_parser = subparsers.add_parser('sessions', help="List active scrcpy sessions")
+    sessions_parser.add_argument('--json', action='store_true')
+    sessions_parser.set_defaults(func=list_sessions)
+
+    kill_parser = subparsers.add_parser('kill', help="Terminate a session by PID, or 'all'")
+    kill_parser.add_argument('pid')
+    kill_parser.set_defaults(func=kill)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    os.makedirs(config_dir(), exist_ok=True)
+    # Mesmo diário do launcher: sessões abertas aqui são adotadas pela interface e vice-versa.
+    scrcpy_handler.init_session_journal(os.path.join(config_dir(), 'sessions.json'))
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,8 @@ import threading
 from PIL import Image, ImageTk
 from tkinterdnd2 import DND_FILES
 from .widgets import create_scrolling_frame
-from utils import adb_handler, scrcpy_handler, icon_scraper
+from utils import adb_handler, scrcpy_handler, icon_scraper, launch_metrics, app_index
+from utils.adaptive_bitrate import AdaptiveBitrateController
 
 
 
@@ -77,7 +78,10 @@ class AppItem:
     def save_app_config(self):
         current_scrcpy_config = self.app_config.get_all_values()
         self.app_config.save_app_scrcpy_config(self.pkg_name, current_scrcpy_config)
-        messagebox.showinfo("Saved Configuration", f"Saved configuration for {self.app_name}.")
+        overrides = [f"{key} = {value}" for key, (value, layer) in sorted(self.app_config.explain_app_config(self.pkg_name).items())
+                     if layer == 'app']
+        details = "Overrides:\n" + "\n".join(overrides) if overrides else "Same as the device settings."
+        messagebox.showinfo("Saved Configuration", f"Saved configuration for {self.app_name}.\n\n{details}")
 
     def delete_app_config(self):
         if messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete the saved configuration for {self.app_name}?"):
@@ -141,26 +145,49 @@ def create_apps_tab(notebook, app_config):
         def launch_app(pkg_name):
             app_data = all_apps.get(pkg_name)
             if not app_data: return
-            config_to_use = app_config.get_all_values().copy()
-            app_metadata = app_config.get_app_metadata(pkg_name)
-            if 'config' in app_metadata:
-                config_to_use.update(app_metadata['config'])
-            config_to_use['start_app'] = pkg_name
+            scheduler = scrcpy_handler.get_launch_scheduler()
+            device_key = app_config.get('device_id').get()
+            if scheduler.is_in_flight(pkg_name, device_key):
+                return # Clique repetido enquanto o lançamento anterior ainda está na fila ou iniciando
+            trace = launch_metrics.LaunchTrace(pkg_name, app_data['app_name'], 'app')
+            # Visão em camadas (padrões → global → dispositivo → perfil do app), sem ler as variáveis Tkinter
+            config_to_use = dict(app_config.resolve_app_config(pkg_name), start_app=pkg_name)
+            if config_to_use.get('no_video'):
+                trace.skip("no video")
+            trace.mark('config_merge')
 
             icon_path = os.path.join(app_config.get_icon_cache_dir(), f"{pkg_name}.png")
             if not os.path.exists(icon_path):
                 icon_path = None
 
-            run_threaded(
-                scrcpy_handler.launch_scrcpy,
+            def launch_func(**kwargs):
+                try:
+                    if config_to_use.get('adaptive_bitrate'):
+                        # Relança a sessão com bitrate/max_size menores se o FPS cair de forma sustentada
+                        process = AdaptiveBitrateController(**kwargs).start()
+                    else:
+                        process = scrcpy_handler.launch_scrcpy(capture_output=True, **kwargs)
+                except Exception:
+                    trace.fail()
+                    raise
+                trace.mark('process_spawn')
+                trace.attach(scrcpy_handler.get_session_output(process.pid))
+                return process
+
+            def on_launch_done(future):
+                error = future.exception()
+                if error and apps_frame.winfo_exists():
+                    apps_frame.after(0, lambda: messagebox.showerror("Scrcpy Error", f"Failed to launch {app_data['app_name']}:\n{error}"))
+
+            future = scheduler.submit(pkg_name, lambda: launch_func(
                 config_values=config_to_use,
                 window_title=app_data['app_name'],
-                on_error=lambda e: messagebox.showerror("Scrcpy Error", f"Failed to launch {app_data['app_name']}:\n{e}"),
                 icon_path=icon_path,
                 session_type='app'
-            )
+            ), device_key)
+            future.add_done_callback(on_launch_done)
 
-        def populate_apps_grid(filter_text="", force_icon_download=False):
+        def populate_apps_grid(filter_text="", download_icons=()):
             for widget in content_frame.winfo_children():
                 widget.destroy()
             app_items.clear()
@@ -197,15 +224,16 @@ def create_apps_tab(notebook, app_config):
             create_grid_section(content_frame, other_apps, "All Apps")
             apps_frame.after(10, lambda: bind_mouse_wheel_to_children(content_frame))
             apps_frame.after(50, update_scroll_region)
-            run_threaded(load_icons_in_background, force_download=force_icon_download)
+            run_threaded(load_icons_in_background, download=set(download_icons))
 
         def update_scroll_region():
             content_frame.update_idletasks()
             scroll_canvas.configure(scrollregion=scroll_canvas.bbox("all"))
 
-        def load_icons_in_background(force_download=False):
+        def load_icons_in_background(download=()):
+            # Só tenta baixar ícones dos pacotes indicados (novos); os demais vêm apenas do cache.
             for pkg_name, item in list(app_items.items()):
-                icon_path = icon_scraper.get_icon(pkg_name, app_config, download_if_missing=force_download)
+                icon_path = icon_scraper.get_icon(pkg_name, app_config, download_if_missing=pkg_name in download)
                 if item.frame.winfo_exists() and icon_path:
                     try:
                         img = Image.open(icon_path).resize((48, 48), Image.LANCZOS)
@@ -218,40 +246,56 @@ def create_apps_tab(notebook, app_config):
         def on_search_change(*_):
             apps_frame.after(300, lambda: populate_apps_grid(search_var.get()))
 
-        def refresh_all_apps():
-            search_var.set("")
+        def sync_apps(show_loading=False, full=False):
             refresh_button.config(state='disabled')
-            for widget in content_frame.winfo_children():
-                widget.destroy()
-            loading_label = ttk.Label(content_frame, text="Loading apps...")
-            loading_label.pack(pady=20)
-
-            def on_list_success(apps):
-                loading_label.destroy()
+            if show_loading:
+                search_var.set("")
+                for widget in content_frame.winfo_children():
+                    widget.destroy()
+                loading_label = ttk.Label(content_frame, text="Loading apps...")
+                loading_label.pack(pady=20)
+
+            def on_sync_success(result):
                 nonlocal all_apps
-                all_apps = {pkg: {'pkg_name': pkg, 'app_name': name} for name, pkg in apps.items() if name}
-                app_config.save_app_list_cache(apps)
-                populate_apps_grid(force_icon_download=True)
+                index, diff = result
+                if show_loading:
+                    loading_label.destroy()
+                if diff['added'] or diff['updated'] or diff['removed'] or show_loading or full:
+                    app_config.save_app_index(index)
+                    apps = app_index.apps_from_index(index)
+                    app_config.save_app_list_cache(apps)
+                    if diff['removed']:
+                        app_config.forget_apps(diff['removed'])
+                    all_apps = {pkg: {'pkg_name': pkg, 'app_name': name} for name, pkg in apps.items()}
+                    # Na atualização completa, baixa também os ícones que ainda faltam.
+                    populate_apps_grid(search_var.get(), download_icons=list(index['packages']) if full else diff['added'])
                 refresh_button.config(state='normal')
 
-            def on_list_error(e):
-                loading_label.destroy()
+            def on_sync_error(e):
+                if show_loading:
+                    loading_label.destroy()
                 messagebox.showerror("Error", f"Could not list apps: {e}")
                 refresh_button.config(state='normal')
 
-            run_threaded(scrcpy_handler.list_installed_apps, on_success=on_list_success, on_error=on_list_error)
+            # Compara a lista do gerenciador de pacotes com o índice salvo; normalmente não há diferenças.
+            # Primeira execução depois da atualização: parte do cache de apps já existente.
+            index = app_config.get_app_index() or app_index.seed_index(app_config.get_app_list_cache())
+            run_threaded(app_index.sync_index, index, app_config.get('device_id').get(),
+                         app_config.get_capabilities_dir(), full, on_success=on_sync_success, on_error=on_sync_error)
 
         def load_from_cache():
             cached_apps = app_config.get_app_list_cache()
             nonlocal all_apps
             all_apps = {pkg: {'pkg_name': pkg, 'app_name': name} for name, pkg in cached_apps.items() if name}
             if not cached_apps or force_refresh:
-                refresh_all_apps()
+                sync_apps(show_loading=True, full=force_refresh)
             else:
+                # Exibe a grade do cache imediatamente; a sincronização roda em segundo plano.
                 apps_frame.after(100, populate_apps_grid)
+                sync_apps()
 
         search_entry.bind("<KeyRelease>", on_search_change)
-        refresh_button.config(command=refresh_all_apps)
+        refresh_button.config(command=lambda: sync_apps(show_loading=True, full=True))
         load_from_cache()
 
     update_apps_display()
@@ -0,0 +1,78 @@
+# FILE: gui/launch_metrics_window.py
+# PURPOSE: Janela com a latência de lançamento por app (p50/p95 do clique ao
+#          primeiro quadro e a fase mais lenta), com exportação em JSON.
+
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from utils import launch_metrics
+
+PHASE_LABELS = {
+    'config_merge': "Config",
+    'process_spawn': "Spawn",
+    'server_start': "Server start",
+    'display_created': "Display",
+    'am_start': "am start",
+    'first_frame': "First frame",
+}
+
+
+def _format_ms(value):
+    if value is None:
+        return "-"
+    return f"{value / 1000:.1f}s" if value >= 1000 else f"{value}ms"
+
+
+class LaunchMetricsWindow:
+    def __init__(self, parent_root):
+        self.window = tk.Toplevel(parent_root)
+        self.window.title("Launch Times")
+        self.window.geometry("560x320")
+        self.window.transient(parent_root)
+
+        columns = ('launches', 'p50', 'p95', 'slowest')
+        self.tree = ttk.Treeview(self.window, columns=columns, show='tree headings')
+        self.tree.heading('#0', text="App")
+        self.tree.heading('launches', text="Launches")
+        self.tree.heading('p50', text="p50")
+        self.tree.heading('p95', text="p95")
+        self.tree.heading('slowest', text="Slowest phase (p50)")
+        self.tree.column('#0', width=180)
+        for column, width in (('launches', 70), ('p50', 60), ('p95', 60), ('slowest', 150)):
+            self.tree.column(column, width=width, anchor='center')
+        self.tree.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+
+        button_frame = ttk.Frame(self.window)
+        button_frame.pack(fill='x', padx=10, pady=(0, 10))
+        ttk.Button(button_frame, text="Refresh", command=self.populate, style="Small.TButton").pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Export", command=self._export, style="Small.TButton").pack(side='left', padx=5)
+
+        self.populate()
+
+    def populate(self):
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        store = launch_metrics.get_store()
+        rows = store.summary() if store else []
+        if not rows:
+            self.tree.insert('', 'end', text="No launches recorded yet.")
+            return
+        for row in rows:
+            launches = f"{row['launches']}" + (f" ({row['failed']} failed)" if row['failed'] else "")
+            slowest = "-"
+            if row['slowest_phase']:
+                slowest = f"{PHASE_LABELS.get(row['slowest_phase'], row['slowest_phase'])} {_format_ms(row['slowest_phase_p50_ms'])}"
+            self.tree.insert('', 'end', text=row['name'],
+                             values=(launches, _format_ms(row['p50_ms']), _format_ms(row['p95_ms']), slowest))
+
+    def _export(self):
+        store = launch_metrics.get_store()
+        if not store:
+            return
+        file_path = filedialog.asksaveasfilename(parent=self.window, title="Export launch times",
+                                                 defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not file_path:
+            return
+        try:
+            store.export(file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export launch times: {e}", parent=self.window)
@@ -2,8 +2,10 @@
 # PURPOSE: Define a estrutura principal da interface gráfica (janela e abas).
 
 from tkinter import ttk, messagebox
+import queue
 import threading
-from utils import adb_handler
+from utils import scrcpy_handler
+from utils.device_tracker import DeviceTracker
 from .scrcpy_frame import create_scrcpy_tab
 from .winlator_frame import create_winlator_tab
 from .apps_frame import create_apps_tab
@@ -25,32 +27,61 @@ class MainWindow:
         self.session_manager_button = ttk.Button(root, text="▶", command=self.open_session_manager, style="Small.TButton")
         self.session_manager_button.place(relx=1.0, x=-5, y=5, anchor='ne', width=25, height=25)
 
+        self.launch_metrics_button = ttk.Button(root, text="⏱", command=self.open_launch_metrics, style="Small.TButton")
+        self.launch_metrics_button.place(relx=1.0, x=-33, y=5, anchor='ne', width=25, height=25)
+
+        # Lançamentos na fila / iniciando (todos os dispositivos)
+        self.launch_queue_label = ttk.Label(root, text="", font=('-size', 8))
+        self.launch_queue_label.place(relx=1.0, x=-63, y=9, anchor='ne')
+        scrcpy_handler.get_launch_scheduler().add_listener(self.on_launch_queue_changed)
+
         self.update_apps_tab = create_apps_tab(notebook, self.app_config)
         self.update_winlator_tab = create_winlator_tab(notebook, self.app_config)
         self.update_config_tab = create_scrcpy_tab(notebook, self.app_config, style, restart_app_callback)
 
-        self.poll_device_connection()
+        # O rastreador roda em segundo plano; a thread do Tk só drena a fila de eventos.
+        self.device_tracker = DeviceTracker().start()
+        self.process_device_events()
+
+    def process_device_events(self):
+        changed = False
+        while True:
+            try:
+                self.device_tracker.events.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+
+        if changed:
+            initial_id = self.app_config.get('device_id').get()
+            current_device_id = self.device_tracker.first_ready_device(preferred=initial_id)
 
-    def poll_device_connection(self):
-        current_device_id = adb_handler.get_connected_device_id()
-        initial_id = self.app_config.get('device_id').get()
+            if current_device_id != initial_id and not (current_device_id is None and initial_id == 'no_device'):
+                new_id = current_device_id if current_device_id else "no_device"
+                is_new_config = self.app_config.load_config_for_device(new_id)
 
-        if current_device_id != initial_id and not (current_device_id is None and initial_id == 'no_device'):
-            new_id = current_device_id if current_device_id else "no_device"
-            is_new_config = self.app_config.load_config_for_device(new_id)
-            
-            self.update_apps_tab(force_refresh=is_new_config)
-            self.update_winlator_tab(force_refresh=is_new_config)
-            self.update_config_tab(force_encoder_fetch=is_new_config)
-            
-        self.root.after(5000, self.poll_device_connection)
+                self.update_apps_tab(force_refresh=is_new_config)
+                self.update_winlator_tab(force_refresh=is_new_config)
+                self.update_config_tab(force_encoder_fetch=is_new_config)
+
+        self.root.after(200, self.process_device_events)
+
+    def on_launch_queue_changed(self, depth):
+        # Chamado das threads do agendador; a atualização do rótulo fica na thread do Tk.
+        queued = sum(device['queued'] for device in depth.values())
+        running = sum(device['running'] for device in depth.values())
+        text = f"⏳ {queued}" if queued else ("⏳" if running else "")
+        try:
+            self.root.after(0, lambda: self.launch_queue_label.config(text=text))
+        except RuntimeError:
+            pass
 
     def open_session_manager(self):
         from .scrcpy_session_manager_window import ScrcpySessionManagerWindow
 
         if self.session_manager_window and self.session_manager_window.window.winfo_exists():
-            # If window exists, close it
-            self.session_manager_window.window.destroy()
+            # If window exists, close it (also detaches its session listener)
+            self.session_manager_window._on_closing()
             self.session_manager_window = None
         else:
             # Garante que a janela principal tenha uma posição antes de abrir a secundária
@@ -60,6 +91,10 @@ class MainWindow:
             width = self.root.winfo_width()
             self.session_manager_window = ScrcpySessionManagerWindow(self.root, x, y, width, self.clear_session_manager_reference)
 
+    def open_launch_metrics(self):
+        from .launch_metrics_window import LaunchMetricsWindow
+        LaunchMetricsWindow(self.root)
+
     def clear_session_manager_reference(self):
         self.session_manager_window = None
 
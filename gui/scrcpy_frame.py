@@ -4,9 +4,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import time
 import ttkbootstrap as bstt
 from .widgets import create_slider, create_slider_with_buttons
-from utils import adb_handler, scrcpy_handler
+from utils import adb_handler, scrcpy_benchmark, device_capabilities
 
 def create_scrcpy_tab(notebook, app_config, style, restart_app_callback):
     """
@@ -80,7 +81,7 @@ def create_scrcpy_tab(notebook, app_config, style, restart_app_callback):
                 info_label.config(text=f"Connected to {commercial_name} (Battery: {battery_level}%)")
 
                 if force_encoder_fetch or not app_config.has_encoder_cache():
-                    fetch_and_update_encoders(force=True)
+                    fetch_and_update_encoders()
                 else:
                     load_encoders_from_cache()
 
@@ -107,7 +108,9 @@ def create_scrcpy_tab(notebook, app_config, style, restart_app_callback):
                 messagebox.showerror("Error", f"Could not fetch encoders: {e}")
                 update_device_info_display()
 
-            run_threaded(scrcpy_handler.list_encoders, on_success=on_success, on_error=on_error)
+            # Usa o retrato compartilhado do build; o scrcpy só é executado se ele não tiver encoders ou com `force`.
+            run_threaded(device_capabilities.get_encoders, app_config.get_capabilities_dir(), device_id, refresh=force,
+                         on_success=on_success, on_error=on_error)
 
         def load_encoders_from_cache():
             nonlocal video_encoders, audio_encoders
@@ -178,6 +181,91 @@ def create_scrcpy_tab(notebook, app_config, style, restart_app_callback):
         create_slider(video_settings_frame, "Video Buffer", app_config.get('video_buffer'), 0, 500, 1, "ms")
         create_slider_with_buttons(video_settings_frame, "Video Bitrate", app_config.get('video_bitrate_slider'), 10, 8000, 10, "K", [1000, 2000, 3000, 4000, 5000, 6000, 7000, 8000], button_style="Small.TButton.Font6")
 
+        benchmark_frame = ttk.Frame(video_settings_frame)
+        benchmark_frame.pack(fill='x', padx=30, pady=(6, 2))
+        ttk.Button(benchmark_frame, text="Refresh Encoders", command=lambda: fetch_and_update_encoders(force=True), style="Small.TButton").pack(side='right')
+        ttk.Button(benchmark_frame, text="Benchmark", command=lambda: start_benchmark(), style="Small.TButton").pack(side='left')
+        apply_best_button = ttk.Button(benchmark_frame, text="Apply Best", command=lambda: apply_best_result(), style="Small.TButton")
+        apply_best_button.pack(side='left', padx=5)
+        benchmark_label = ttk.Label(video_settings_frame, text="", font=('-size', 8), anchor='center')
+        benchmark_label.pack(fill='x', padx=30)
+
+        def update_benchmark_display():
+            best = scrcpy_benchmark.best_result(app_config.get_benchmark_results().get('results'))
+            apply_best_button.config(state='normal' if best else 'disabled')
+            if best:
+                size = 'native' if best['max_size'] == '0' else best['max_size']
+                benchmark_label.config(text=f"Best: {best['encoder']} {best['bitrate']}K {size} - {best['fps']} fps")
+            else:
+                benchmark_label.config(text="No benchmark results for this device.")
+
+        def apply_best_result():
+            best = scrcpy_benchmark.best_result(app_config.get_benchmark_results().get('results'))
+            if not best:
+                return
+            # Define o codec primeiro: a troca de codec repopula a lista de encoders.
+            for key, value in scrcpy_benchmark.config_values_for(best).items():
+                app_config.get(key).set(value)
+
+        def start_benchmark():
+            device_id = app_config.get('device_id').get()
+            if device_id == "no_device":
+                messagebox.showerror("Benchmark", "Please connect a device.")
+                return
+            combos = scrcpy_benchmark.build_matrix(video_encoders)
+            if not combos:
+                messagebox.showerror("Benchmark", "No video encoders found. Refresh the encoder list first.")
+                return
+            minutes = max(1, round(len(combos) * (scrcpy_benchmark.DEFAULT_DURATION + 3) / 60))
+            if not messagebox.askyesno("Benchmark", f"{len(combos)} configurations will be tested (about {minutes} min).\n\nThe phone screen will be mirrored in the background. Continue?"):
+                return
+
+            progress_window = tk.Toplevel(scrcpy_frame)
+            progress_window.title("Benchmark")
+            progress_window.geometry("320x120")
+            progress_window.resizable(False, False)
+            progress_window.transient(scrcpy_frame)
+            progress_window.grab_set()
+            progress_var = tk.DoubleVar()
+            ttk.Progressbar(progress_window, variable=progress_var, maximum=len(combos)).pack(pady=10, padx=10, fill='x')
+            status_var = tk.StringVar(value=f"Testing 1 of {len(combos)}...")
+            ttk.Label(progress_window, textvariable=status_var).pack(pady=5)
+            cancel_event = threading.Event()
+            ttk.Button(progress_window, text="Cancel", command=cancel_event.set, style="Small.TButton").pack()
+            progress_window.protocol("WM_DELETE_WINDOW", cancel_event.set)
+
+            def on_progress(done, total, result):
+                def update():
+                    if progress_window.winfo_exists():
+                        progress_var.set(done)
+                        status_var.set(f"Testing {min(done + 1, total)} of {total}... (last: {result['fps']} fps)")
+                scrcpy_frame.after(0, update)
+
+            def on_finished(results):
+                if progress_window.winfo_exists():
+                    progress_window.destroy()
+                if results:
+                    app_config.save_benchmark_results(results, time.time())
+                    update_benchmark_display()
+                if cancel_event.is_set():
+                    return
+                best = scrcpy_benchmark.best_result(results)
+                if best:
+                    messagebox.showinfo("Benchmark", f"Best configuration:\n{best['encoder']} at {best['bitrate']}K, max size {best['max_size']}\n"
+                                                     f"{best['fps']} fps, startup {best['startup_ms']} ms, CPU {best['cpu_percent']}%")
+                else:
+                    messagebox.showerror("Benchmark", "No configuration produced video. Check the console output.")
+
+            def on_failed(e):
+                if progress_window.winfo_exists():
+                    progress_window.destroy()
+                messagebox.showerror("Benchmark", f"Benchmark failed: {e}")
+
+            run_threaded(scrcpy_benchmark.run_benchmark, combos, device_id, on_progress=on_progress,
+                         cancel_event=cancel_event, on_success=on_finished, on_error=on_failed)
+
+        update_benchmark_display()
+
         audio_settings_frame = ttk.LabelFrame(scrollable_frame, text="Audio Settings")
         audio_settings_frame.pack(padx=10, pady=10, fill='x')
 
@@ -234,6 +322,8 @@ def create_scrcpy_tab(notebook, app_config, style, restart_app_callback):
             ("Disable mipmaps", app_config.get('mipmaps')),
             ("No Audio", app_config.get('no_audio')),
             ("No Video", app_config.get('no_video')),
+            ("FPS Telemetry", app_config.get('fps_telemetry')),
+            ("Adaptive Bitrate", app_config.get('adaptive_bitrate')),
         ]
         for i, (text, var) in enumerate(checkboxes):
             row = i // 2
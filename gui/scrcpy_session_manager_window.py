@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from PIL import Image, ImageTk
 import os
 import shlex
@@ -61,6 +61,11 @@ class ScrcpySessionManagerWindow:
 
         self.tree.bind('<<TreeviewSelect>>', self._on_tree_select)
 
+        # FPS telemetry of the selected session (only for sessions launched with "FPS Telemetry")
+        self.telemetry_var = tk.StringVar(value="")
+        self.telemetry_label = ttk.Label(self.window, textvariable=self.telemetry_var, font=("Helvetica", 9))
+        self.telemetry_label.pack(fill='x', padx=10)
+
         # Bottom command buttons
         self.command_frame = ttk.Frame(self.window)
         self.command_frame.pack(fill='x', padx=10, pady=5)
@@ -71,9 +76,15 @@ class ScrcpySessionManagerWindow:
         self.command_button = ttk.Button(self.command_frame, text="Command Used", command=self._show_command_for_selected_session, style="Small.TButton", state='disabled')
         self.command_button.pack(side='left', padx=5)
 
+        self.export_button = ttk.Button(self.command_frame, text="Export FPS", command=self._export_telemetry, style="Small.TButton")
+        self.export_button.pack(side='left', padx=5)
+
         self.image_refs = [] # To prevent garbage collection of PhotoImage objects
         self.session_data_map = {}
 
+        # Refresh as soon as a session exits instead of waiting for the next auto-refresh
+        scrcpy_handler.add_session_listener(self._on_session_event)
+
         # Schedule initial population after the window is fully rendered
         self.window.after(0, self.populate_sessions)
         # Schedule the first auto-refresh after 5 seconds
@@ -87,6 +98,33 @@ class ScrcpySessionManagerWindow:
         else:
             self.terminate_button.config(state='disabled')
             self.command_button.config(state='disabled')
+        self._update_telemetry_label()
+
+    def _update_telemetry_label(self):
+        selected_item_id = self.tree.focus()
+        telemetry = None
+        if selected_item_id and selected_item_id.isdigit():
+            telemetry = scrcpy_handler.get_session_telemetry(int(selected_item_id))
+        stats = telemetry.stats() if telemetry else None
+        if stats:
+            self.telemetry_var.set(f"FPS min {stats['min']} / avg {stats['avg']} / 1% low {stats['low_1']} / 5% low {stats['low_5']}  ·  dropped ~{stats['dropped']}")
+        elif telemetry:
+            self.telemetry_var.set("Waiting for FPS reports...")
+        else:
+            self.telemetry_var.set("")
+
+    def _export_telemetry(self):
+        file_path = filedialog.asksaveasfilename(parent=self.window, title="Export FPS telemetry",
+                                                 defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not file_path:
+            return
+        try:
+            count = scrcpy_handler.export_sessions_telemetry(file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export telemetry: {e}", parent=self.window)
+            return
+        if not count:
+            messagebox.showinfo("Export FPS", "No active session has FPS telemetry.\nEnable \"FPS Telemetry\" in the Options before launching.", parent=self.window)
 
     def populate_sessions(self):
         # Get currently selected item before clearing
@@ -200,11 +238,20 @@ class ScrcpySessionManagerWindow:
 
         command_window.wait_window()
 
+    def _on_session_event(self, event):
+        # Called from the session watcher thread; hand over to the Tk thread.
+        try:
+            if self.window.winfo_exists():
+                self.window.after(0, self.populate_sessions)
+        except RuntimeError:
+            pass
+
     def auto_refresh_sessions(self):
         self.populate_sessions()
         self.refresh_job = self.window.after(5000, self.auto_refresh_sessions) # Refresh every 5 seconds
 
     def _on_closing(self):
+        scrcpy_handler.remove_session_listener(self._on_session_event)
         if hasattr(self, 'refresh_job'):
             self.window.after_cancel(self.refresh_job)
         # Unbind the parent window's <Configure> event using the stored funcid
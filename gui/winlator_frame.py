@@ -1,10 +1,8 @@
 # FILE: gui/winlator_frame.py
 # PURPOSE: Cria e gerencia a aba de controle do Winlator.
 
-import os
 import re
 import json
-import time
 import shlex
 import tempfile
 import threading
@@ -13,8 +11,13 @@ from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 from tkinterdnd2 import DND_FILES
 from .widgets import create_scrolling_frame
-from utils import adb_handler, scrcpy_handler, exe_icon_extractor
-import queue
+from utils import adb_handler, scrcpy_handler, winlator_index, exe_icon_cache, launch_metrics, virtual_display_pool
+from utils.icon_extraction_pipeline import IconExtractionPipeline
+
+# Tempo máximo para o scrcpy anunciar o display virtual criado
+DISPLAY_WAIT_TIMEOUT = 30
+# Tempo máximo para o display virtual ser registrado no dispositivo após ser criado
+DISPLAY_READY_TIMEOUT = 10
 
 class WinlatorGameItem:
     """Representa um item de jogo na grade da UI para o Winlator."""
@@ -47,10 +50,9 @@ class WinlatorGameItem:
         if not filepath.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.ico')):
             messagebox.showerror("Invalid File", "Please drop a valid image file."); return
         try:
-            icon_key = os.path.basename(self.game_path)
-            dest_path = os.path.join(self.app_config.get_icon_cache_dir(), f"{icon_key}.png")
+            dest_path = exe_icon_cache.shortcut_icon_path(self.app_config, self.game_path)
             img = Image.open(filepath).resize((48, 48), Image.LANCZOS); img.save(dest_path, 'PNG')
-            self.app_config.save_app_metadata(self.game_path, {'custom_icon': True, 'exe_icon_fetch_failed': False})
+            self.app_config.save_app_metadata(self.game_path, {'custom_icon': True})
             photo = ImageTk.PhotoImage(img); self.set_icon(photo)
         except Exception as e: messagebox.showerror("Erro", f"Ocorreu um erro ao processar o ícone: {e}")
 
@@ -59,11 +61,13 @@ class WinlatorGameItem:
 
     def save_game_config(self):
         self.app_config.save_winlator_game_config(self.game_path, self.app_config.get_all_values())
-        messagebox.showinfo("Saved Configuration", f"Saved configuration for {self.game_name}.")
+        overrides = [f"{key} = {value}" for key, (value, layer) in sorted(self.app_config.explain_game_config(self.game_path).items())
+                     if layer == 'game']
+        details = "Overrides:\n" + "\n".join(overrides) if overrides else "Same as the device settings."
+        messagebox.showinfo("Saved Configuration", f"Saved configuration for {self.game_name}.\n\n{details}")
 
     def delete_game_config(self):
-        if self.app_config.get_winlator_game_config(self.game_path):
-            self.app_config.delete_winlator_game_config(self.game_path)
+        if self.app_config.delete_winlator_game_config(self.game_path):
             messagebox.showinfo("Configuration Removed", f"Configuration removed for {self.game_name}.")
         else: messagebox.showwarning("Warning", "No settings to remove.")
 
@@ -74,9 +78,44 @@ def create_winlator_tab(notebook, app_config):
     
     all_games, game_items = [], {}
     temp_dir = tempfile.gettempdir()
-    extraction_queue = queue.Queue()
+    icon_pipeline = None
+    display_pool = virtual_display_pool.get_pool()
+
+    def display_pool_enabled():
+        return virtual_display_pool.is_supported() and app_config.get('winlator_display_pool').get()
+
+    def warm_display_configs():
+        # Uma configuração por resolução de display virtual: a global e as salvas por jogo.
+        configs = {}
+        for config_values in [app_config.resolve_config()] + [app_config.resolve_game_config(path) for path in app_config.get_winlator_game_configs()]:
+            configs.setdefault(config_values.get('new_display'), dict(config_values))
+        return list(configs.values())
+
+    def refill_display_pool(*_):
+        display_pool.drain()
+        if display_pool_enabled() and app_config.get('device_id').get() != "no_device":
+            display_pool.fill(warm_display_configs())
+
+    pool_toggle_state = app_config.get('winlator_display_pool').get()
+
+    def on_display_pool_toggled(*_):
+        # Só reage a mudanças reais (a troca de dispositivo regrava a variável com o mesmo valor).
+        nonlocal pool_toggle_state
+        if app_config.get('winlator_display_pool').get() != pool_toggle_state:
+            pool_toggle_state = app_config.get('winlator_display_pool').get()
+            refill_display_pool()
+
+    app_config.get('winlator_display_pool').trace_add('write', on_display_pool_toggled)
 
     def update_winlator_display(force_refresh=False):
+        nonlocal icon_pipeline
+        # Cancela a extração da grade anterior; os itens dela serão destruídos.
+        if icon_pipeline:
+            icon_pipeline.shutdown()
+            icon_pipeline = None
+        # Os displays aquecidos pertencem ao dispositivo anterior.
+        refill_display_pool()
+
         for widget in winlator_frame.winfo_children():
             widget.destroy()
 
@@ -85,20 +124,6 @@ def create_winlator_tab(notebook, app_config):
             ttk.Label(winlator_frame, text="Please connect a device to see Winlator games.", anchor="center").pack(fill="both", expand=True)
             return
 
-        NUM_WORKERS = 5
-
-        def icon_extractor_worker():
-            while True:
-                task = extraction_queue.get()
-                try:
-                    if task is None: break
-                    path, item, save_path = task
-                    extract_and_set_icon(path, item, save_path)
-                except Exception as e:
-                    print(f"Erro no trabalhador de extração de ícones: {e}")
-                finally:
-                    extraction_queue.task_done()
-
         try:
             placeholder_img = Image.open("gui/winlator_placeholder.png").resize((48, 48), Image.LANCZOS)
             placeholder_icon = ImageTk.PhotoImage(placeholder_img)
@@ -111,6 +136,9 @@ def create_winlator_tab(notebook, app_config):
 
         use_ludashi_check = ttk.Checkbutton(top_panel, text="Use Ludashi pkg", variable=app_config.get('use_ludashi_pkg'))
         use_ludashi_check.pack(side='left', padx=5)
+        if virtual_display_pool.is_supported():
+            warm_display_check = ttk.Checkbutton(top_panel, text="Warm display", variable=app_config.get('winlator_display_pool'))
+            warm_display_check.pack(side='left', padx=5)
         refresh_button = ttk.Button(top_panel, text="Refresh Apps", style="Small.TButton")
         refresh_button.pack(side='right')
         fetch_icons_button = ttk.Button(top_panel, text="Refresh Icons", style="Small.TButton", command=lambda: prompt_for_icon_update())
@@ -137,50 +165,74 @@ def create_winlator_tab(notebook, app_config):
             threading.Thread(target=task_wrapper, daemon=True).start()
 
         def execute_winlator_flow(shortcut_path, game_name):
-            game_specific_config = app_config.get_all_values().copy()
-            game_data = app_config.get_winlator_game_config(shortcut_path)
-            if game_data:
-                game_specific_config.update(game_data)
-
-            game_specific_config['start_app'] = ''
+            scheduler = scrcpy_handler.get_launch_scheduler()
+            device_key = app_config.get('device_id').get()
+            if scheduler.is_in_flight(shortcut_path, device_key):
+                return # Clique repetido enquanto o lançamento anterior ainda está na fila ou iniciando
+            trace = launch_metrics.LaunchTrace(shortcut_path, game_name, 'winlator', required=('am_start', 'first_frame'))
+            # Visão em camadas (padrões → global → dispositivo → perfil do jogo), sem ler as variáveis Tkinter
+            game_specific_config = dict(app_config.resolve_game_config(shortcut_path), start_app='')
             use_ludashi = app_config.get('use_ludashi_pkg').get()
             package_name = "com.ludashi.benchmark" if use_ludashi else "com.winlator"
 
-            icon_key = os.path.basename(shortcut_path)
-            icon_path = os.path.join(app_config.get_icon_cache_dir(), f"{icon_key}.png")
-            if not os.path.exists(icon_path):
-                icon_path = None
+            icon_path = exe_icon_cache.resolve_game_icon(app_config, shortcut_path)
+            if game_specific_config.get('no_video'):
+                trace.skip("no video")
+            trace.mark('config_merge')
 
             def on_scrcpy_error(e):
+                trace.fail()
                 messagebox.showerror("Scrcpy Error", f"Failed to start scrcpy for game: {e}")
 
+            def start_winlator_app(display_id):
+                # Inicia assim que o display estiver registrado no dispositivo, em vez de esperar um tempo fixo.
+                adb_handler.wait_for_display(display_id, timeout=DISPLAY_READY_TIMEOUT)
+                adb_handler.start_winlator_app(shortcut_path, display_id, package_name)
+                trace.mark('am_start')
+
+            def on_display_not_ready(scrcpy_process, e):
+                trace.fail()
+                scrcpy_process.kill()
+                messagebox.showerror("Error", f"Could not start {game_name}: {e}")
+
             def on_scrcpy_success(scrcpy_process):
+                output = scrcpy_handler.get_session_output(scrcpy_process.pid)
+                trace.attach(output)
+
                 def get_display_id():
-                    for line in scrcpy_process.stdout:
-                        print(f"[scrcpy] {line.strip()}")
-                        if "New display" in line and "id=" in line:
-                            return line.strip().split("id=")[1].split(")")[0]
-                    return None
+                    if output is None:
+                        return None
+                    event = output.wait_for('display_created', timeout=DISPLAY_WAIT_TIMEOUT)
+                    return event['display_id'] if event else None
 
                 def on_display_id_found(display_id):
                     if not display_id:
+                        trace.fail()
                         messagebox.showerror("Error", "Virtual display not found.")
                         if scrcpy_process:
                             scrcpy_process.kill()
                         return
-                    time.sleep(1)
-                    run_threaded(adb_handler.start_winlator_app, shortcut_path, display_id, package_name)
+                    run_threaded(start_winlator_app, display_id, on_error=lambda e: on_display_not_ready(scrcpy_process, e))
 
                 run_threaded(get_display_id, on_success=on_display_id_found)
 
-            run_threaded(scrcpy_handler.launch_scrcpy,
-                         config_values=game_specific_config,
-                         on_success=on_scrcpy_success,
-                         on_error=on_scrcpy_error,
-                         capture_output=True,
-                         window_title=game_name,
-                         icon_path=icon_path,
-                         session_type='winlator')
+            def acquire_session():
+                # Um display aquecido compatível dispensa iniciar um novo servidor scrcpy.
+                if display_pool_enabled():
+                    claimed = display_pool.claim(game_specific_config, game_name)
+                    if claimed:
+                        trace.mark('process_spawn')
+                        return claimed[0]
+                process = scrcpy_handler.launch_scrcpy(config_values=game_specific_config,
+                                                       capture_output=True,
+                                                       window_title=game_name,
+                                                       icon_path=icon_path,
+                                                       session_type='winlator')
+                trace.mark('process_spawn')
+                return process
+
+            future = scheduler.submit(shortcut_path, acquire_session, device_key)
+            run_threaded(future.result, on_success=on_scrcpy_success, on_error=on_scrcpy_error)
 
         def populate_games_grid():
             for widget in content_frame.winfo_children():
@@ -205,9 +257,8 @@ def create_winlator_tab(notebook, app_config):
 
         def load_cached_icons():
             for path, item in list(game_items.items()):
-                icon_key = os.path.basename(path)
-                cached_icon_path = os.path.join(app_config.ICON_CACHE_DIR, f"{icon_key}.png")
-                if os.path.exists(cached_icon_path):
+                cached_icon_path = exe_icon_cache.resolve_game_icon(app_config, path)
+                if cached_icon_path:
                     if item.frame.winfo_exists():
                         try:
                             img = Image.open(cached_icon_path).resize((48, 48), Image.LANCZOS)
@@ -218,29 +269,40 @@ def create_winlator_tab(notebook, app_config):
                             winlator_frame.after(0, item.set_icon, placeholder_icon)
 
         def prompt_for_icon_update():
-            missing_icons = []
-            for path, item in game_items.items():
-                icon_key = os.path.basename(path)
-                cached_icon_path = os.path.join(app_config.ICON_CACHE_DIR, f"{icon_key}.png")
-                if not os.path.exists(cached_icon_path):
-                    metadata = app_config.get_app_metadata(path)
-                    if not metadata.get('exe_icon_fetch_failed') and not metadata.get('custom_icon'):
-                        missing_icons.append((path, item, cached_icon_path))
-
-            if not missing_icons:
-                messagebox.showinfo("Icons", "No icons to extract.")
-                return
+            fetch_icons_button.config(state='disabled')
+
+            def on_plan_error(e):
+                fetch_icons_button.config(state='normal')
+                messagebox.showerror("Error", f"Could not check game executables: {e}")
+
+            def on_plan_ready(plan):
+                fetch_icons_button.config(state='normal')
+                linked, to_extract, skipped = plan
+                for path in linked:
+                    show_extracted_icon(path)
+
+                if not to_extract:
+                    reused = f"\n\n{len(linked)} icons reused from cache." if linked else ""
+                    messagebox.showinfo("Icons", f"No icons to extract.{reused}")
+                    return
+
+                games_count = sum(len(entry['shortcuts']) for entry in to_extract.values())
+                answer = messagebox.askyesno(
+                    "Search missing icons?",
+                    f"{games_count} games without icons ({len(to_extract)} executables).\n\n"
+                    "This process will read the icon resources of each .exe from your phone and may take a while depending on the number of games\n\n"
+                    "Wish to continue?"
+                )
+                if answer:
+                    start_icon_extraction_flow(to_extract)
+
+            run_threaded(exe_icon_cache.plan_extraction, app_config, all_games, on_success=on_plan_ready, on_error=on_plan_error)
+
+        def start_icon_extraction_flow(to_extract):
+            nonlocal icon_pipeline
+            if icon_pipeline:
+                icon_pipeline.shutdown()
 
-            answer = messagebox.askyesno(
-                "Search missing icons?",
-                f"{len(missing_icons)} games without icons.\n\n"
-                "This process will download the .exe files to your phone temporarily and may take several minutes depending on the number and size of the file\n\n"
-                "Wish to continue?"
-            )
-            if answer:
-                start_icon_extraction_flow(missing_icons)
-
-        def start_icon_extraction_flow(tasks):
             progress_window = tk.Toplevel(winlator_frame)
             progress_window.title("Processing...")
             progress_window.geometry("300x100")
@@ -248,7 +310,7 @@ def create_winlator_tab(notebook, app_config):
             progress_window.transient(winlator_frame)
             progress_window.grab_set()
 
-            total_tasks = len(tasks)
+            total_tasks = len(to_extract)
             progress_var = tk.DoubleVar()
             progress_bar = ttk.Progressbar(progress_window, variable=progress_var, maximum=total_tasks)
             progress_bar.pack(pady=10, padx=10, fill='x')
@@ -257,89 +319,93 @@ def create_winlator_tab(notebook, app_config):
             status_label = ttk.Label(progress_window, textvariable=status_var)
             status_label.pack(pady=5)
 
-            for task in tasks:
-                extraction_queue.put(task)
+            def on_result(key, success):
+                # Chamado de uma thread do pipeline.
+                shortcuts = to_extract[key]['shortcuts']
+                exe_icon_cache.record_result(app_config, key, shortcuts, success)
+                if success and winlator_frame.winfo_exists():
+                    for path in shortcuts:
+                        winlator_frame.after(0, show_extracted_icon, path)
+
+            pipeline = IconExtractionPipeline(on_result, temp_dir)
+            icon_pipeline = pipeline
+            # Um único trabalho por executável, mesmo que vários atalhos apontem para ele.
+            for key, entry in to_extract.items():
+                pipeline.submit(key, entry['exe_path'], entry['save_path'])
 
-            def monitor_queue():
-                extraction_queue.join()
-                if progress_window.winfo_exists():
-                    progress_window.after(0, progress_window.destroy)
-                    winlator_frame.after(100, lambda: messagebox.showinfo("Finished", "Icons extraction finished!."))
-                    winlator_frame.after(100, populate_games_grid)
+            def on_progress_close():
+                pipeline.cancel()
+                progress_window.destroy()
+
+            progress_window.protocol("WM_DELETE_WINDOW", on_progress_close)
 
             def update_progress():
                 if not progress_window.winfo_exists(): return
 
-                processed_count = total_tasks - extraction_queue.qsize()
+                processed_count = pipeline.completed
                 progress_var.set(processed_count)
                 status_var.set(f"A processar {processed_count} de {total_tasks}...")
 
+                if pipeline.is_finished():
+                    progress_window.destroy()
+                    messagebox.showinfo("Finished", "Icons extraction finished!.")
+                    populate_games_grid()
+                    return
                 progress_window.after(200, update_progress)
 
             progress_window.after(100, update_progress)
-            threading.Thread(target=monitor_queue, daemon=True).start()
-
-        def extract_and_set_icon(path, item, save_path):
-            print(f"\n[Extractor Worker] Processando: {item.game_name}")
-            remote_exe_path = adb_handler.get_game_executable_info(path)
-            if not remote_exe_path:
-                print(f"[Extractor Worker] ERRO: Não foi possível encontrar o caminho do .exe no atalho.")
-                app_config.save_app_metadata(path, {'exe_icon_fetch_failed': True})
-                return
 
-            local_exe_path = os.path.join(temp_dir, f"{os.path.basename(remote_exe_path)}_{int(time.time()*1000)}")
-            try:
-                adb_handler.pull_file(remote_exe_path, local_exe_path)
-                if not os.path.exists(local_exe_path):
-                    raise FileNotFoundError("Falha ao baixar o .exe")
+        def show_extracted_icon(path):
+            item = game_items.get(path)
+            icon_path = exe_icon_cache.resolve_game_icon(app_config, path)
+            if item and item.frame.winfo_exists() and icon_path:
+                try:
+                    img = Image.open(icon_path).resize((48, 48), Image.LANCZOS)
+                    item.set_icon(ImageTk.PhotoImage(img))
+                except Exception as e:
+                    print(f"Erro ao carregar ícone extraído para {path}: {e}")
 
-                success = exe_icon_extractor.extract_icon_from_exe(local_exe_path, save_path)
-                if success:
-                    app_config.save_app_metadata(path, {'exe_icon_fetch_failed': False})
-                    if item.frame.winfo_exists():
-                        img = Image.open(save_path).resize((48, 48), Image.LANCZOS)
-                        photo = ImageTk.PhotoImage(img)
-                        winlator_frame.after(0, item.set_icon, photo)
-                else:
-                    app_config.save_app_metadata(path, {'exe_icon_fetch_failed': True})
-            except Exception as e:
-                print(f"[Extractor Worker] ERRO GERAL no processo de extração: {e}")
-                app_config.save_app_metadata(path, {'exe_icon_fetch_failed': True})
-            finally:
-                if os.path.exists(local_exe_path):
-                    os.remove(local_exe_path)
-
-        def refresh_games_list():
+        def refresh_games_list(force=False):
+            nonlocal all_games
             refresh_button.config(state='disabled')
-            for widget in content_frame.winfo_children():
-                widget.destroy()
-            loading_label = ttk.Label(content_frame, text="Searching for games...")
-            loading_label.grid(row=0, column=0, columnspan=4, pady=20, padx=10)
-            content_frame.update_idletasks()
+            cached_index = app_config.get_winlator_index()
+            show_loading = not cached_index.get('shortcuts') or force
+            if show_loading:
+                for widget in content_frame.winfo_children():
+                    widget.destroy()
+                loading_label = ttk.Label(content_frame, text="Searching for games...")
+                loading_label.grid(row=0, column=0, columnspan=4, pady=20, padx=10)
+                content_frame.update_idletasks()
+            else:
+                # Exibe a grade do índice salvo imediatamente; a verificação roda em segundo plano.
+                all_games = winlator_index.games_from_index(cached_index)
+                populate_games_grid()
 
-            def on_list_success(games_with_names):
-                loading_label.destroy()
+            def on_list_success(result):
                 nonlocal all_games
-                all_games = [{'name': name, 'path': path} for name, path in sorted(games_with_names)]
-                populate_games_grid()
+                index, changed = result
+                if show_loading:
+                    loading_label.destroy()
+                if changed or show_loading:
+                    app_config.save_winlator_index(index)
+                    all_games = winlator_index.games_from_index(index)
+                    populate_games_grid()
+                    # Atalhos novos/renomeados cujo .exe já tem ícone no cache não precisam de transferência.
+                    run_threaded(exe_icon_cache.link_cached_icons, app_config, all_games,
+                                 on_success=lambda linked: [show_extracted_icon(path) for path in linked])
                 refresh_button.config(state='normal')
 
             def on_list_error(e):
-                loading_label.destroy()
+                if show_loading:
+                    loading_label.destroy()
                 messagebox.showerror("Error", f"Could not list games: {e}")
                 refresh_button.config(state='normal')
 
-            run_threaded(adb_handler.list_winlator_shortcuts_with_names, on_success=on_list_success, on_error=on_list_error)
-
-        refresh_button.config(command=refresh_games_list)
+            run_threaded(winlator_index.refresh_index, cached_index, force=force, on_success=on_list_success, on_error=on_list_error)
 
-        for _ in range(NUM_WORKERS):
-            threading.Thread(target=icon_extractor_worker, daemon=True).start()
+        refresh_button.config(command=lambda: refresh_games_list(force=True))
 
-        if force_refresh:
-            refresh_games_list()
-        else:
-            refresh_games_list()
+        refresh_games_list(force=force_refresh)
 
     update_winlator_display()
     return update_winlator_display
\ No newline at end of file
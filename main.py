@@ -7,15 +7,21 @@ import ttkbootstrap as ttk
 from tkinterdnd2 import TkinterDnD
 import sys
 import os
+import atexit
 from utils.dependencies import check_dependencies
-from utils import adb_handler
+from utils import adb_handler, scrcpy_handler, launch_metrics, virtual_display_pool
 from app_config import AppConfig
 from gui.main_window import MainWindow
 
-def restart_program():
+def restart_program(app_config=None):
     """
     Restarts the current program.
     """
+    # os.execl não executa os handlers do atexit: grava as alterações pendentes antes.
+    if app_config:
+        app_config.close()
+    # Displays aquecidos não usados não devem sobreviver ao restart (seriam readotados como sessões).
+    virtual_display_pool.get_pool().drain()
     python = sys.executable
     os.execl(python, python, *sys.argv)
 
@@ -33,6 +39,10 @@ def main():
     config_device_id = device_id if device_id else "no_device"
 
     app_config = AppConfig(root, config_device_id)
+    atexit.register(app_config.close)
+    # Readota sessões scrcpy que sobreviveram a um restart ou fechamento do launcher
+    scrcpy_handler.init_session_journal(app_config.SESSIONS_JOURNAL_FILE)
+    launch_metrics.init_store(app_config.LAUNCH_METRICS_FILE)
     style = ttk.Style(theme=app_config.get('theme').get())
 
     root.withdraw()
@@ -51,10 +61,11 @@ def main():
     root.resizable(False, False)
 
     # Passa o device_id real para a MainWindow para que ela possa monitorar
-    main_window = MainWindow(root, app_config, style, restart_program)
+    main_window = MainWindow(root, app_config, style, lambda: restart_program(app_config))
 
     root.deiconify()
     root.mainloop()
+    app_config.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,186 @@
+# FILE: utils/adaptive_bitrate.py
+# PURPOSE: Controlador opcional sobre o launch_scrcpy que acompanha o FPS
+#          relatado pela sessão e a reinicia com bitrate/max_size menores
+#          quando o FPS cai de forma sustentada (e maiores quando se recupera).
+
+import time
+import threading
+from collections import deque
+from utils import scrcpy_handler
+from utils.fps_telemetry import target_fps_from_config
+
+BITRATE_STEP = 0.7
+MIN_BITRATE = 1000
+MAX_SIZE_LADDER = (1920, 1600, 1280, 1024, 800)
+
+
+class AdaptiveBitrateController:
+    """
+    Inicia uma sessão com '--print-fps' e observa os relatórios de FPS.
+
+    - Desce um degrau (bitrate * 0.7; no bitrate mínimo, o próximo max_size menor)
+      quando o FPS fica abaixo de `low_ratio` do alvo por `sustain_seconds`.
+    - Sobe um degrau, sem passar da configuração original, quando fica acima de
+      `high_ratio` por `recover_seconds` (limiares distintos = histerese).
+    - Ignora os primeiros `warmup_seconds` após cada (re)lançamento e limita os
+      relançamentos a `max_relaunches_per_minute`.
+    Mantém título da janela, ícone e tipo de sessão a cada relançamento.
+    Para sozinho quando o usuário fecha a sessão.
+    """
+
+    def __init__(self, config_values, window_title=None, icon_path=None, device_id=None, session_type='app',
+                 low_ratio=0.75, high_ratio=0.95, sustain_seconds=5, recover_seconds=60,
+                 warmup_seconds=5, max_relaunches_per_minute=2):
+        self.config_values = dict(config_values, fps_telemetry=True)
+        self.window_title = window_title
+        self.icon_path = icon_path
+        self.device_id = device_id
+        self.session_type = session_type
+        self.target_fps = target_fps_from_config(config_values) or 60
+        self.low_fps = self.target_fps * low_ratio
+        self.high_fps = self.target_fps * high_ratio
+        self.sustain_seconds = sustain_seconds
+        self.recover_seconds = recover_seconds
+        self.warmup_seconds = warmup_seconds
+        self.max_relaunches_per_minute = max_relaunches_per_minute
+
+        self.original_bitrate = int(config_values.get('video_bitrate_slider') or 8000)
+        self.original_max_size = self._parse_max_size(config_values.get('max_size'))
+        # max_size é ignorado pelo scrcpy quando há display virtual
+        self.can_resize = config_values.get('new_display') in (None, '', 'Disabled')
+
+        self.process = None
+        self.relaunches = deque()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._relaunching = False
+        self._launched_at = 0
+        self._below_since = None
+        self._above_since = None
+
+    @staticmethod
+    def _parse_max_size(value):
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    # --- API pública ---
+
+    def start(self):
+        """
+        Lança a primeira sessão e retorna o processo (mesmo contrato do launch_scrcpy).
+        Deve ser chamado de dentro do lançamento agendado; os relançamentos entram na fila sozinhos.
+        """
+        return self._launch()
+
+    def stop(self):
+        """Deixa de controlar a sessão atual, sem encerrá-la."""
+        with self._lock:
+            self._stopped = True
+
+    # --- Degraus ---
+
+    def _current(self):
+        return int(self.config_values.get('video_bitrate_slider') or self.original_bitrate), \
+            self._parse_max_size(self.config_values.get('max_size'))
+
+    def _step_down(self):
+        bitrate, max_size = self._current()
+        if bitrate > MIN_BITRATE:
+            return max(MIN_BITRATE, int(bitrate * BITRATE_STEP)), max_size
+        if self.can_resize:
+            smaller = [size for size in MAX_SIZE_LADDER if max_size == 0 or size < max_size]
+            if smaller:
+                return bitrate, smaller[0]
+        return None
+
+    def _step_up(self):
+        bitrate, max_size = self._current()
+        if max_size != self.original_max_size:
+            larger = [size for size in reversed(MAX_SIZE_LADDER) if size > max_size]
+            next_size = larger[0] if larger else 0 # 0 = resolução nativa
+            if self.original_max_size and (next_size == 0 or next_size >= self.original_max_size):
+                next_size = self.original_max_size
+            return bitrate, next_size
+        if bitrate < self.original_bitrate:
+            return min(self.original_bitrate, int(bitrate / BITRATE_STEP)), max_size
+        return None
+
+    # --- Sessão ---
+
+    def _launch(self):
+        process = scrcpy_handler.launch_scrcpy(self.config_values, window_title=self.window_title,
+                                               device_id=self.device_id, icon_path=self.icon_path,
+                                               session_type=self.session_type)
+        with self._lock:
+            self.process = process
+            self._launched_at = time.monotonic()
+            self._below_since = self._above_since = None
+        output = scrcpy_handler.get_session_output(process.pid)
+        if output:
+            output.add_listener(lambda event, pid=process.pid: self._on_event(pid, event))
+        return process
+
+    def _on_event(self, pid, event):
+        with self._lock:
+            if self._stopped or self.process is None or pid != self.process.pid:
+                return
+            if event['event'] == 'exited':
+                if not self._relaunching:
+                    self._stopped = True # Fechada pelo usuário ou por erro
+                return
+            if event['event'] != 'fps' or self._relaunching:
+                return
+            now = time.monotonic()
+            if now - self._launched_at < self.warmup_seconds:
+                return
+            step = self._evaluate(event['fps'], now)
+            if step is None or not self._can_relaunch(now):
+                return
+            self._relaunching = True
+        threading.Thread(target=self._relaunch, args=step, name="adaptive-bitrate-relaunch", daemon=True).start()
+
+    def _evaluate(self, fps, now):
+        """Aplica a histerese e retorna o próximo (bitrate, max_size), ou None (com o lock adquirido)."""
+        if fps < self.low_fps:
+            self._above_since = None
+            self._below_since = self._below_since or now
+            if now - self._below_since >= self.sustain_seconds:
+                return self._step_down()
+        elif fps >= self.high_fps:
+            self._below_since = None
+            self._above_since = self._above_since or now
+            if now - self._above_since >= self.recover_seconds:
+                return self._step_up()
+        else:
+            self._below_since = self._above_since = None
+        return None
+
+    def _can_relaunch(self, now):
+        while self.relaunches and now - self.relaunches[0] > 60:
+            self.relaunches.popleft()
+        return len(self.relaunches) < self.max_relaunches_per_minute
+
+    def _relaunch(self, bitrate, max_size):
+        old_pid = self.process.pid
+        print(f"[adaptive_bitrate] Relaunching '{self.window_title}' with {bitrate}K, max_size={max_size or 'native'}")
+        with self._lock:
+            self.relaunches.append(time.monotonic())
+            self.config_values['video_bitrate_slider'] = bitrate
+            self.config_values['max_size'] = str(max_size)
+        try:
+            scrcpy_handler.kill_scrcpy_session(old_pid)
+            # Passa pela fila de lançamentos (com prioridade baixa) para não disputar a vaga
+            # do dispositivo com um lançamento pedido pelo usuário.
+            scrcpy_handler.get_launch_scheduler().submit(
+                ('adaptive_bitrate', self.config_values.get('start_app') or self.window_title), self._launch,
+                self.device_id or self.config_values.get('device_id'),
+                priority=scrcpy_handler.PRIORITY_BACKGROUND).result()
+        except Exception as e:
+            print(f"[adaptive_bitrate] Relaunch failed: {e}")
+            with self._lock:
+                self._stopped = True
+        finally:
+            with self._lock:
+                self._relaunching = False
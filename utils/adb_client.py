@@ -0,0 +1,382 @@
+# FILE: utils/adb_client.py
+# PURPOSE: Cliente nativo do protocolo de host do adb. Fala diretamente com o
+#          servidor adb local (localhost:5037) em vez de criar um processo
+#          'adb' para cada comando.
+
+import os
+import socket
+import struct
+import threading
+
+ADB_HOST = os.environ.get('ANDROID_ADB_SERVER_ADDRESS', '127.0.0.1')
+ADB_PORT = int(os.environ.get('ANDROID_ADB_SERVER_PORT', 5037))
+
+# IDs dos pacotes do protocolo 'shell,v2'
+SHELL_STDIN = 0
+SHELL_STDOUT = 1
+SHELL_STDERR = 2
+SHELL_EXIT = 3
+SHELL_CLOSE_STDIN = 4
+
+SYNC_CHUNK = 64 * 1024
+
+
+class AdbError(Exception):
+    """Erro retornado pelo servidor adb (resposta FAIL) ou falha de protocolo."""
+
+
+class AdbShellError(AdbError):
+    """Comando shell terminou com código de saída diferente de zero."""
+    def __init__(self, command, exit_code, output, stderr=''):
+        super().__init__(f"Shell command exited with {exit_code}: {command}")
+        self.command = command
+        self.exit_code = exit_code
+        self.output = output
+        self.stderr = stderr
+
+
+class AdbConnectionLost(AdbError):
+    """
+    A conexão caiu depois de o comando ter sido enviado ao dispositivo: ele pode
+    já ter sido executado, então não deve ser repetido por outro caminho.
+    """
+
+
+def _recv_exact(sock, size):
+    """Lê exatamente `size` bytes do socket."""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise AdbError("Connection closed by adb server")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _recv_all(sock):
+    """Lê o socket até o servidor fechar a conexão."""
+    chunks = []
+    while True:
+        chunk = sock.recv(SYNC_CHUNK)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+def _read_shell_output(sock, v2):
+    """Lê a saída de um serviço shell até o fim. Retorna (stdout, stderr, exit_code)."""
+    if not v2:
+        return _recv_all(sock), b'', 0
+    stdout, stderr = bytearray(), bytearray()
+    exit_code = 0
+    while True:
+        try:
+            header = _recv_exact(sock, 5)
+        except AdbError:
+            break
+        packet_id, length = header[0], struct.unpack('<I', header[1:])[0]
+        payload = _recv_exact(sock, length)
+        if packet_id == SHELL_STDOUT:
+            stdout.extend(payload)
+        elif packet_id == SHELL_STDERR:
+            stderr.extend(payload)
+        elif packet_id == SHELL_EXIT:
+            exit_code = payload[0] if payload else 0
+            break
+    return bytes(stdout), bytes(stderr), exit_code
+
+
+class AdbConnection:
+    """Um socket para o servidor adb, opcionalmente já ligado a um dispositivo."""
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT, timeout=10):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.serial = None
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def send_request(self, payload):
+        """Envia uma requisição de host (tamanho em 4 dígitos hex + payload) e espera OKAY."""
+        data = payload.encode('utf-8')
+        self.sock.sendall(f"{len(data):04x}".encode('ascii') + data)
+        self.read_status()
+
+    def open_service(self, payload):
+        """
+        Como `send_request`, para a requisição que inicia um serviço no dispositivo.
+        Depois do envio, uma falha de socket vira AdbConnectionLost.
+        """
+        data = payload.encode('utf-8')
+        self.sock.sendall(f"{len(data):04x}".encode('ascii') + data)
+        try:
+            self.read_status()
+        except OSError as e:
+            raise AdbConnectionLost(f"Connection lost after requesting {payload!r}: {e}") from e
+
+    def read_status(self):
+        status = _recv_exact(self.sock, 4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            raise AdbError(self.read_length_prefixed().decode('utf-8', 'replace'))
+        raise AdbError(f"Unexpected adb response: {status!r}")
+
+    def read_length_prefixed(self):
+        length = int(_recv_exact(self.sock, 4), 16)
+        return _recv_exact(self.sock, length)
+
+    def switch_transport(self, serial=None):
+        """Liga esta conexão ao dispositivo indicado (ou a qualquer um, se None)."""
+        self.send_request(f"host:transport:{serial}" if serial else "host:transport-any")
+        self.serial = serial
+
+
+class SyncConnection:
+    """Conexão no modo 'sync:' do adb. Pode ser reutilizada para vários pulls."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.sock = connection.sock
+
+    def _send(self, command, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.sock.sendall(command + struct.pack('<I', len(data)) + data)
+
+    def _read_fail(self, length):
+        raise AdbError(_recv_exact(self.sock, length).decode('utf-8', 'replace'))
+
+    def stat(self, remote_path):
+        """Retorna (mode, size, mtime) do arquivo remoto."""
+        self._send(b'STAT', remote_path)
+        header = _recv_exact(self.sock, 16)
+        if header[:4] != b'STAT':
+            raise AdbError(f"Unexpected sync response: {header[:4]!r}")
+        return struct.unpack('<III', header[4:])
+
+    def iter_file(self, remote_path):
+        """Gera os blocos de dados de um arquivo remoto."""
+        self._send(b'RECV', remote_path)
+        while True:
+            header = _recv_exact(self.sock, 8)
+            tag, length = header[:4], struct.unpack('<I', header[4:])[0]
+            if tag == b'DATA':
+                yield _recv_exact(self.sock, length)
+            elif tag == b'DONE':
+                return
+            elif tag == b'FAIL':
+                self._read_fail(length)
+            else:
+                raise AdbError(f"Unexpected sync response: {tag!r}")
+
+    def pull(self, remote_path, local_path):
+        tmp_path = f"{local_path}.part"
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in self.iter_file(remote_path):
+                    f.write(chunk)
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def close(self):
+        try:
+            self._send(b'QUIT', b'')
+        except OSError:
+            pass
+        self.connection.close()
+
+
+class AdbClient:
+    """
+    Cliente em processo para o servidor adb. Mantém um pequeno pool de
+    conexões 'sync:' abertas por dispositivo, reaproveitadas entre pulls.
+    Comandos shell usam uma conexão nova (o serviço fecha o socket ao terminar),
+    mas sem o custo de criar um processo 'adb'.
+    """
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT, pool_size=2, timeout=10):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._sync_pool = {}
+        self._lock = threading.Lock()
+
+    def connect(self, timeout=None):
+        return AdbConnection(self.host, self.port, timeout or self.timeout)
+
+    def open_transport(self, serial=None, timeout=None):
+        """Abre uma conexão já ligada ao dispositivo."""
+        conn = self.connect(timeout)
+        try:
+            conn.switch_transport(serial)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    # --- Requisições de host ---
+
+    def host_request(self, payload):
+        """Executa uma requisição 'host:' que responde com um bloco de tamanho prefixado."""
+        conn = self.connect()
+        try:
+            conn.send_request(payload)
+            return conn.read_length_prefixed().decode('utf-8', 'replace')
+        finally:
+            conn.close()
+
+    def devices(self):
+        """Retorna uma lista de tuplas (serial, estado), como 'adb devices'."""
+        output = self.host_request('host:devices')
+        return parse_device_list(output)
+
+    def is_available(self):
+        """Verifica se o servidor adb está aceitando conexões."""
+        try:
+            self.host_request('host:version')
+            return True
+        except (OSError, AdbError):
+            return False
+
+    # --- Shell ---
+
+    def open_shell(self, command, serial=None, timeout=None):
+        """
+        Abre o serviço 'shell,v2,raw:' e retorna (conexão, usa_v2).
+        Dispositivos antigos sem shell v2 caem para o 'shell:' legado.
+        """
+        conn = self.open_transport(serial, timeout)
+        try:
+            conn.open_service(f"shell,v2,raw:{command}")
+            return conn, True
+        except AdbConnectionLost:
+            conn.close()
+            raise
+        except AdbError:
+            conn.close()
+        conn = self.open_transport(serial, timeout)
+        try:
+            conn.open_service(f"shell:{command}")
+        except Exception:
+            conn.close()
+            raise
+        return conn, False
+
+    def shell_bytes(self, command, serial=None, timeout=None):
+        """Executa um comando shell e retorna (stdout, stderr, exit_code) em bytes."""
+        conn, v2 = self.open_shell(command, serial, timeout)
+        try:
+            return _read_shell_output(conn.sock, v2)
+        except OSError as e:
+            # O comando já foi enviado: repetir poderia executá-lo duas vezes.
+            raise AdbConnectionLost(f"Connection lost while running {command!r}: {e}") from e
+        finally:
+            conn.close()
+
+    def shell(self, command, serial=None, timeout=None):
+        """Executa um comando shell e retorna a saída decodificada. Levanta AdbShellError em falha."""
+        stdout, stderr, exit_code = self.shell_bytes(command, serial, timeout)
+        output = stdout.decode('utf-8', 'replace')
+        if exit_code != 0:
+            raise AdbShellError(command, exit_code, output, stderr.decode('utf-8', 'replace'))
+        return output
+
+    # --- Sync (pull/stat) ---
+
+    def _acquire_sync(self, serial):
+        with self._lock:
+            pool = self._sync_pool.get(serial)
+            if pool:
+                return pool.pop()
+        conn = self.open_transport(serial)
+        try:
+            conn.send_request('sync:')
+        except Exception:
+            conn.close()
+            raise
+        return SyncConnection(conn)
+
+    def _release_sync(self, serial, sync):
+        with self._lock:
+            pool = self._sync_pool.setdefault(serial, [])
+            if len(pool) < self.pool_size:
+                pool.append(sync)
+                return
+        sync.close()
+
+    def _with_sync(self, serial, func):
+        sync = self._acquire_sync(serial)
+        try:
+            result = func(sync)
+        except AdbError:
+            # FAIL deixa a conexão sync em estado inválido; descarta.
+            sync.close()
+            raise
+        except OSError:
+            sync.close()
+            # Conexões do pool podem ter caído (ex.: dispositivo reconectado); tenta uma nova.
+            self.close_device(serial)
+            sync = self._acquire_sync(serial)
+            try:
+                result = func(sync)
+            except OSError as e:
+                sync.close()
+                raise AdbConnectionLost(f"Sync connection lost: {e}") from e
+            except Exception:
+                sync.close()
+                raise
+        self._release_sync(serial, sync)
+        return result
+
+    def pull(self, remote_path, local_path, serial=None):
+        """Baixa um arquivo do dispositivo usando uma conexão sync do pool."""
+        self._with_sync(serial, lambda sync: sync.pull(remote_path, local_path))
+
+    def stat(self, remote_path, serial=None):
+        """Retorna (mode, size, mtime) de um arquivo remoto."""
+        return self._with_sync(serial, lambda sync: sync.stat(remote_path))
+
+    def close_device(self, serial):
+        """Fecha as conexões em pool de um dispositivo."""
+        with self._lock:
+            pool = self._sync_pool.pop(serial, [])
+        for sync in pool:
+            sync.close()
+
+    def close(self):
+        with self._lock:
+            pools = list(self._sync_pool.values())
+            self._sync_pool.clear()
+        for pool in pools:
+            for sync in pool:
+                sync.close()
+
+
+def parse_device_list(output):
+    """Converte a saída de 'host:devices' em uma lista de tuplas (serial, estado)."""
+    devices = []
+    for line in output.splitlines():
+        if '\t' in line:
+            serial, state = line.split('\t', 1)
+            if serial.strip():
+                devices.append((serial.strip(), state.strip()))
+    return devices
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_client():
+    """Retorna o cliente compartilhado do processo."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = AdbClient()
+        return _default_client
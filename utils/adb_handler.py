@@ -5,18 +5,50 @@ import subprocess
 import shlex
 import re
 import os
+import time
+import concurrent.futures
+from utils import adb_client, adb_shell_session
+
+def _run_via_client(command, device_id):
+    """
+    Executa 'shell' e 'pull' pelo cliente nativo do adb (sem criar um processo).
+    Retorna None se o comando não for suportado ou se não foi possível falar com o
+    servidor adb antes de enviar o comando, para que o chamador use o binário 'adb'
+    (que também inicia o servidor). Se a conexão cair depois do envio, levanta
+    AdbConnectionLost: o comando pode já ter rodado e não é repetido.
+    """
+    if not command or command[0] not in ('shell', 'pull'):
+        return None
+    client = adb_client.get_client()
+    try:
+        if command[0] == 'shell':
+            # Mesma semântica do 'adb shell': argumentos unidos por espaço, sem aspas extras.
+            return client.shell(' '.join(command[1:]), device_id).strip()
+        client.pull(command[1], command[2], device_id)
+        return ""
+    except OSError:
+        return None
 
 def _run_adb_command(command, device_id=None, print_command=False, ignore_errors=False):
     """Helper para executar um comando adb, retornando a saída decodificada."""
+    if print_command:
+        print('Executing ADB Command:', shlex.join(['adb'] + (['-s', device_id] if device_id else []) + command))
+
+    try:
+        result = _run_via_client(command, device_id)
+        if result is not None:
+            return result
+    except adb_client.AdbError as e:
+        if not ignore_errors:
+            print(f"ADB command failed: {e}")
+        return ""
+
     base_cmd = ['adb']
     if device_id:
         base_cmd.extend(['-s', device_id])
 
     full_cmd = base_cmd + command
 
-    if print_command:
-        print('Executing ADB Command:', shlex.join(full_cmd))
-
     startupinfo = None
     if os.name == 'nt':
         startupinfo = subprocess.STARTUPINFO()
@@ -30,21 +62,97 @@ def _run_adb_command(command, device_id=None, print_command=False, ignore_errors
             print(f"ADB command failed: {e}")
         return ""
 
+def _run_shell(command_str, device_id=None, print_command=False, ignore_errors=False):
+    """
+    Executa um comando curto na sessão shell persistente do dispositivo.
+    Se a sessão não puder ser aberta, usa o caminho normal de '_run_adb_command'.
+    """
+    if print_command:
+        print('Executing ADB Shell Command:', command_str)
+    try:
+        return adb_shell_session.get_session(device_id).run(command_str).strip()
+    except concurrent.futures.TimeoutError:
+        # A sessão não respondeu nem ao timeout do socket: descarta-a para o próximo comando reabrir.
+        adb_shell_session.close_session(device_id)
+        if not ignore_errors:
+            print(f"ADB command timed out: {command_str}")
+        return ""
+    except (adb_client.AdbShellError, adb_client.AdbConnectionLost, TimeoutError) as e:
+        if not ignore_errors:
+            print(f"ADB command failed: {e}")
+        return ""
+    except (OSError, adb_client.AdbError):
+        return _run_adb_command(['shell', command_str], device_id, ignore_errors=ignore_errors)
+
 def get_device_info(device_id=None):
     """Obtém o nome do modelo e o nível da bateria do dispositivo."""
-    name = _run_adb_command(['shell', 'getprop', 'ro.product.vendor.marketname'], device_id)
+    name = _run_shell('getprop ro.product.vendor.marketname', device_id)
     if not name:
         raise ConnectionError("Device not connected or ADB error")
     
-    battery_output = _run_adb_command(['shell', 'dumpsys', 'battery'], device_id, ignore_errors=True)
+    battery_output = _run_shell('dumpsys battery', device_id, ignore_errors=True)
     level_match = re.search(r'level: (\d+)', battery_output)
     battery_level = level_match.group(1) if level_match else "?"
     
     return {"commercial_name": name, "battery": battery_level}
 
+def get_build_properties(device_id=None):
+    """Retorna fingerprint do build, versão do Android e tamanho da tela em uma única chamada."""
+    output = _run_shell(
+        "getprop ro.build.fingerprint; getprop ro.build.version.release; wm size", device_id, ignore_errors=True)
+    lines = output.splitlines()
+    if not lines or not lines[0].strip():
+        raise ConnectionError("Device not connected or ADB error")
+    size_matches = re.findall(r'size: (\d+x\d+)', output)
+    return {
+        'fingerprint': lines[0].strip(),
+        'android_version': lines[1].strip() if len(lines) > 1 else '',
+        # 'Override size' (se houver) vem depois de 'Physical size' e é o que está em uso.
+        'screen_size': size_matches[-1] if size_matches else None,
+    }
+
+APK_MTIMES_MARKER = '@@SCRCPYLAUNCHER_APK_MTIMES@@'
+
+def list_packages(device_id=None):
+    """
+    Retorna {pacote: (version_code, mtime_do_apk)} de todos os pacotes em uma única chamada de shell.
+    O mtime do APK base muda a cada instalação/atualização, fazendo as vezes do lastUpdateTime.
+    """
+    # '--show-versioncode' não existe antes do Android 9; sem ele, só o mtime identifica atualizações.
+    script = (
+        "L=$(pm list packages -f --show-versioncode 2>/dev/null | grep '^package:' || pm list packages -f); "
+        f"echo \"$L\"; echo {APK_MTIMES_MARKER}; "
+        "echo \"$L\" | sed -e 's/^package://' -e 's/=[^=]*$//' | xargs stat -c '%Y %n' 2>/dev/null; true"
+    )
+    output = _run_shell(script, device_id)
+    listing, _, stat_output = output.partition(APK_MTIMES_MARKER)
+
+    mtimes = {}
+    for line in stat_output.splitlines():
+        parts = line.strip().split(' ', 1)
+        if len(parts) == 2 and parts[0].isdigit():
+            mtimes[parts[1]] = int(parts[0])
+
+    packages = {}
+    for line in listing.splitlines():
+        line = line.strip()
+        if not line.startswith('package:'):
+            continue
+        # O caminho pode conter '=' (Android 11+), mas o nome do pacote não: separa pelo último.
+        apk_path, _, rest = line[len('package:'):].rpartition('=')
+        fields = rest.split()
+        if not fields:
+            continue
+        version_match = re.search(r'versionCode:(\d+)', rest)
+        packages[fields[0]] = (int(version_match.group(1)) if version_match else None, mtimes.get(apk_path))
+    return packages
+
+WINLATOR_FRONTEND_DIR = '/storage/emulated/0/Download/Winlator/Frontend/'
+SHORTCUT_MARKER = '@@SCRCPYLAUNCHER_SHORTCUT@@'
+
 def list_winlator_shortcuts(device_id=None):
     """Lista os caminhos dos atalhos .desktop do Winlator no dispositivo."""
-    command = ['shell', 'find', '/storage/emulated/0/Download/Winlator/Frontend/', '-type', 'f', '-name', '*.desktop']
+    command = ['shell', 'find', WINLATOR_FRONTEND_DIR, '-type', 'f', '-name', '*.desktop']
     output = _run_adb_command(command, device_id)
     return output.splitlines() if output else []
 
@@ -59,27 +167,29 @@ def list_winlator_shortcuts_with_names(device_id=None):
             games_with_names.append((name, path))
     return games_with_names
 
-def get_game_executable_info(shortcut_path, device_id=None):
-    """Lê o arquivo .desktop para encontrar o caminho do .exe no /sdcard."""
-    content = _run_adb_command(['shell', 'cat', shlex.quote(shortcut_path)], device_id)
-    if not content:
-        return None
-
-    game_dir_part = None
-    exe_name = None
+def parse_desktop_entry(content):
+    """Extrai os campos relevantes de um arquivo .desktop do Winlator."""
+    entry = {'working_path': None, 'wm_class': None, 'exec': None}
+    for line in content.splitlines():
+        lower = line.lower()
+        if lower.startswith('path='):
+            entry['working_path'] = line.split('=', 1)[1].strip()
+        elif lower.startswith('startupwmclass='):
+            entry['wm_class'] = line.split('=', 1)[1].strip()
+        elif lower.startswith('exec=') and entry['exec'] is None:
+            entry['exec'] = line.split('=', 1)[1].strip()
+    return entry
 
-    # --- LÓGICA CORRIGIDA ---
+def resolve_executable_path(entry):
+    """Calcula o caminho do .exe no /sdcard a partir dos campos de um .desktop."""
     # Tenta encontrar o caminho baseado em 'Path' e 'StartupWMClass'
-    for line in content.splitlines():
-        if line.lower().startswith('path='):
-            # Ex: Path=/.../dosdevices/d:/Games/Alan Wake
-            # Captura tudo depois de 'd:'
-            match = re.search(r'dosdevices/d:([^"]+)', line, re.IGNORECASE)
-            if match:
-                game_dir_part = match.group(1).strip()
-        elif line.lower().startswith('startupwmclass='):
-            # Ex: StartupWMClass=alanwake.exe
-            exe_name = line.split('=', 1)[1].strip()
+    # Ex: Path=/.../dosdevices/d:/Games/Alan Wake e StartupWMClass=alanwake.exe
+    game_dir_part = None
+    if entry.get('working_path'):
+        match = re.search(r'dosdevices/d:([^"]+)', entry['working_path'], re.IGNORECASE)
+        if match:
+            game_dir_part = match.group(1).strip()
+    exe_name = entry.get('wm_class')
 
     if game_dir_part and exe_name:
         # Constrói o caminho completo no Android
@@ -88,21 +198,166 @@ def get_game_executable_info(shortcut_path, device_id=None):
         return full_path_on_sdcard.replace('\\', '/')
 
     # Fallback para o formato antigo com 'Exec='
-    for line in content.splitlines():
-        if line.lower().startswith('exec='):
-            match = re.search(r'wine\s+"([^"]+)"', line, re.IGNORECASE)
-            if match:
-                exec_path = match.group(1)
-                if exec_path.lower().startswith('/home/xuser/.wine/dosdevices/d:'):
-                    full_path_on_sdcard = exec_path.replace('/home/xuser/.wine/dosdevices/d:', '/storage/emulated/0/Download')
-                    return full_path_on_sdcard.replace('\\', '/')
+    if entry.get('exec'):
+        match = re.search(r'wine\s+"([^"]+)"', entry['exec'], re.IGNORECASE)
+        if match:
+            exec_path = match.group(1)
+            if exec_path.lower().startswith('/home/xuser/.wine/dosdevices/d:'):
+                full_path_on_sdcard = exec_path.replace('/home/xuser/.wine/dosdevices/d:', '/storage/emulated/0/Download')
+                return full_path_on_sdcard.replace('\\', '/')
 
     return None # Retorna None se nenhum formato for encontrado
 
+def get_game_executable_info(shortcut_path, device_id=None):
+    """Lê o arquivo .desktop para encontrar o caminho do .exe no /sdcard."""
+    content = _run_shell(f"cat {shlex.quote(shortcut_path)}", device_id)
+    if not content:
+        return None
+    return resolve_executable_path(parse_desktop_entry(content))
+
+def _parse_shortcut_dump(output):
+    """
+    Converte a saída do script de varredura (cabeçalho marcado + conteúdo de
+    cada .desktop) em uma lista de registros.
+    """
+    records = []
+    current, lines = None, []
+
+    def finish():
+        if current is not None:
+            current.update(parse_desktop_entry('\n'.join(lines)))
+            current['exe_path'] = resolve_executable_path(current)
+            records.append(current)
+
+    for line in output.splitlines():
+        if line.startswith(SHORTCUT_MARKER):
+            finish()
+            size, mtime, path = line[len(SHORTCUT_MARKER):].strip().split(' ', 2)
+            name = os.path.basename(path).rsplit('.desktop', 1)[0]
+            current, lines = {'name': name, 'path': path, 'size': int(size), 'mtime': int(mtime)}, []
+        elif current is not None:
+            lines.append(line)
+    finish()
+    return records
+
+def _dump_shortcuts(list_command, device_id=None):
+    """Lê os atalhos listados por `list_command` (um caminho por linha) em uma única chamada de shell."""
+    script = (
+        f"{list_command} | while IFS= read -r f; do "
+        f"echo \"{SHORTCUT_MARKER} $(stat -c '%s %Y' \"$f\") $f\"; cat \"$f\"; echo; "
+        "done"
+    )
+    output = _run_shell(script, device_id)
+    return _parse_shortcut_dump(output) if output else []
+
+def scan_winlator_shortcuts(device_id=None):
+    """
+    Lê todos os atalhos .desktop do Winlator em uma única chamada de shell e
+    retorna registros com nome, caminho, tamanho, mtime, Path, StartupWMClass,
+    Exec e o caminho resolvido do .exe.
+    """
+    return _dump_shortcuts(f"find {shlex.quote(WINLATOR_FRONTEND_DIR)} -type f -name '*.desktop'", device_id)
+
+def read_winlator_shortcuts(paths, device_id=None):
+    """Como `scan_winlator_shortcuts`, mas só para os atalhos indicados."""
+    if not paths:
+        return []
+    quoted = ' '.join(shlex.quote(path) for path in paths)
+    return _dump_shortcuts(f"printf '%s\\n' {quoted}", device_id)
+
+def stat_winlator_shortcuts(device_id=None):
+    """Retorna {caminho: (tamanho, mtime)} de todos os atalhos, sem ler o conteúdo."""
+    command = f"find {shlex.quote(WINLATOR_FRONTEND_DIR)} -type f -name '*.desktop' -exec stat -c '%s %Y %n' {{}} +"
+    output = _run_shell(command, device_id)
+    stats = {}
+    for line in output.splitlines():
+        parts = line.split(' ', 2)
+        if len(parts) == 3:
+            stats[parts[2]] = (int(parts[0]), int(parts[1]))
+    return stats
+
+def get_winlator_fingerprint(device_id=None):
+    """
+    Impressão digital barata da pasta de atalhos: [nº de entradas, mtime mais recente].
+    Inclui os diretórios, cujo mtime muda quando um atalho é criado, removido ou renomeado.
+    """
+    command = (
+        f"L=$(find {shlex.quote(WINLATOR_FRONTEND_DIR)} \\( -type d -o -type f -name '*.desktop' \\) "
+        "-exec stat -c %Y {} + 2>/dev/null); "
+        "echo \"$L\" | grep -c .; echo \"$L\" | sort -n | tail -n 1"
+    )
+    lines = _run_shell(command, device_id, ignore_errors=True).splitlines()
+    try:
+        return [int(lines[0]), int(lines[1]) if len(lines) > 1 and lines[1] else 0]
+    except (IndexError, ValueError):
+        return None
+
 def pull_file(remote_path, local_path, device_id=None):
     """Puxa (baixa) um arquivo do dispositivo para o computador local."""
     _run_adb_command(['pull', remote_path, local_path], device_id, print_command=True)
 
+def stat_remote_files(paths, device_id=None):
+    """Retorna {caminho: (tamanho, mtime)} para vários arquivos remotos em uma única chamada."""
+    if not paths:
+        return {}
+    quoted = ' '.join(shlex.quote(path) for path in paths)
+    # Arquivos inexistentes são omitidos; 'true' evita que um deles descarte a saída inteira.
+    output = _run_shell(f"stat -c '%s %Y %n' {quoted} 2>/dev/null; true", device_id)
+    stats = {}
+    for line in output.splitlines():
+        parts = line.split(' ', 2)
+        if len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit():
+            stats[parts[2]] = (int(parts[0]), int(parts[1]))
+    return stats
+
+def get_remote_file_size(remote_path, device_id=None):
+    """Retorna o tamanho em bytes de um arquivo remoto, ou None se não existir."""
+    output = _run_shell(f"stat -c %s {shlex.quote(remote_path)}", device_id, ignore_errors=True)
+    return int(output) if output.isdigit() else None
+
+def read_file_range(remote_path, offset, length, device_id=None):
+    """Lê `length` bytes de um arquivo remoto a partir de `offset`, sem baixar o arquivo inteiro."""
+    command = (
+        f"dd if={shlex.quote(remote_path)} bs=65536 iflag=skip_bytes,count_bytes "
+        f"skip={int(offset)} count={int(length)} 2>/dev/null"
+    )
+    try:
+        stdout, stderr, exit_code = adb_client.get_client().shell_bytes(command, device_id)
+    except OSError:
+        base_cmd = ['adb'] + (['-s', device_id] if device_id else [])
+        try:
+            return subprocess.check_output(base_cmd + ['exec-out', command], stderr=subprocess.DEVNULL)
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            raise IOError(f"Could not read {remote_path}: {e}")
+    except adb_client.AdbError as e:
+        # Inclui AdbConnectionLost: a leitura é idempotente, mas quem chama espera IOError para usar outro caminho.
+        raise IOError(f"Could not read {remote_path}: {e}") from e
+    if exit_code != 0:
+        raise IOError(f"Could not read {remote_path} (exit code {exit_code})")
+    return stdout
+
+def is_display_ready(display_id, device_id=None):
+    """Verifica se o display já está registrado no gerenciador de janelas (alvo válido para 'am start --display')."""
+    pattern = shlex.quote(f"mDisplayId={int(display_id)}([^0-9]|$)")
+    return bool(_run_shell(f"dumpsys window displays | grep -E {pattern}; true", device_id, ignore_errors=True))
+
+def wait_for_display(display_id, device_id=None, timeout=10.0, initial_delay=0.05, max_delay=0.5):
+    """
+    Espera o display virtual ficar pronto, consultando o dispositivo pela sessão
+    shell persistente com backoff curto. Retorna o tempo de espera em segundos
+    ou levanta TimeoutError se o display não aparecer dentro de `timeout`.
+    """
+    started = time.monotonic()
+    delay = initial_delay
+    while True:
+        if is_display_ready(display_id, device_id):
+            return time.monotonic() - started
+        remaining = started + timeout - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Virtual display {display_id} was not ready on the device after {timeout:.0f}s")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
 def start_winlator_app(shortcut_path, display_id, package_name, device_id=None):
     """Inicia um aplicativo Winlator em um display virtual específico."""
     file_name = os.path.basename(shortcut_path)
@@ -116,16 +371,15 @@ def start_winlator_app(shortcut_path, display_id, package_name, device_id=None):
         f"--es shortcut_path {quoted_path} "
         f"--activity-clear-task --activity-clear-top --activity-no-history"
     )
-    command = ['shell', remote_command_str]
-    _run_adb_command(command, device_id, print_command=True)
+    _run_shell(remote_command_str, device_id, print_command=True)
 
 def turn_screen_on(device_id=None):
-    _run_adb_command(['shell', 'input', 'keyevent', 'KEYCODE_WAKEUP'], device_id)
+    _run_shell('input keyevent KEYCODE_WAKEUP', device_id)
 
 def turn_screen_off(device_id=None):
-    output = _run_adb_command(['shell', 'dumpsys', 'input_method'], device_id)
+    output = _run_shell('dumpsys input_method', device_id)
     if 'mInteractive=true' in output:
-        _run_adb_command(['shell', 'input', 'keyevent', 'KEYCODE_POWER'], device_id)
+        _run_shell('input keyevent KEYCODE_POWER', device_id)
 
 def get_connected_device_id():
     """
@@ -133,14 +387,18 @@ def get_connected_device_id():
     Se nenhum dispositivo estiver conectado, retorna None.
     """
     try:
-        output = subprocess.check_output(['adb', 'devices'], text=True, stderr=subprocess.PIPE)
-        lines = output.strip().split('\n')
-        if len(lines) > 1:
-            for line in lines[1:]:
-                if '\t' in line:
-                    device_id, state = line.split('\t')
-                    if device_id.strip() and 'device' in state:
-                        return device_id.strip()
-        return None
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return None
+        devices = adb_client.get_client().devices()
+    except (OSError, adb_client.AdbError):
+        devices = None
+
+    if devices is None:
+        try:
+            output = subprocess.check_output(['adb', 'devices'], text=True, stderr=subprocess.PIPE)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return None
+        devices = adb_client.parse_device_list(output)
+
+    for device_id, state in devices:
+        if 'device' in state:
+            return device_id
+    return None
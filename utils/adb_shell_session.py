@@ -0,0 +1,168 @@
+# FILE: utils/adb_shell_session.py
+# PURPOSE: Sessão 'adb shell' persistente por dispositivo para comandos curtos.
+#          Os comandos entram numa fila e cada resposta é delimitada por um
+#          marcador único seguido do código de saída.
+
+import struct
+import threading
+import queue
+import uuid
+from concurrent.futures import Future
+from utils import adb_client
+
+
+class ShellSession:
+    """
+    Mantém um único 'sh' aberto no dispositivo (serviço 'shell,v2,raw:') e
+    executa os comandos da fila em sequência. Se o dispositivo cair, a sessão
+    é reaberta automaticamente no próximo comando.
+    """
+
+    def __init__(self, serial=None, client=None, timeout=30):
+        self.serial = serial
+        self.client = client or adb_client.get_client()
+        self.timeout = timeout
+        self._conn = None
+        self._stdout = bytearray()
+        self._stderr = bytearray()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=f"adb-shell-{serial or 'any'}", daemon=True)
+        self._worker.start()
+
+    # --- API pública ---
+
+    def submit(self, command, timeout=None):
+        """Enfileira um comando e retorna um Future com a saída (stdout) decodificada."""
+        future = Future()
+        if self._closed:
+            future.set_exception(adb_client.AdbError("Shell session closed"))
+            return future
+        self._queue.put((command, timeout or self.timeout, future))
+        return future
+
+    def run(self, command, timeout=None):
+        """Executa um comando e espera a saída. Levanta AdbShellError se o código de saída não for zero."""
+        timeout = timeout or self.timeout
+        return self.submit(command, timeout).result(timeout + 5)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._disconnect()
+
+    # --- Conexão ---
+
+    def _connect(self):
+        conn, v2 = self.client.open_shell('', self.serial)
+        if not v2:
+            conn.close()
+            raise adb_client.AdbError("Device does not support shell v2; persistent session unavailable")
+        self._conn = conn
+        self._stdout.clear()
+        self._stderr.clear()
+
+    def _disconnect(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def _send_stdin(self, data):
+        self._conn.sock.sendall(struct.pack('<BI', adb_client.SHELL_STDIN, len(data)) + data)
+
+    def _read_packet(self):
+        header = adb_client._recv_exact(self._conn.sock, 5)
+        packet_id, length = header[0], struct.unpack('<I', header[1:])[0]
+        payload = adb_client._recv_exact(self._conn.sock, length)
+        if packet_id == adb_client.SHELL_STDOUT:
+            self._stdout.extend(payload)
+        elif packet_id == adb_client.SHELL_STDERR:
+            self._stderr.extend(payload)
+        elif packet_id == adb_client.SHELL_EXIT:
+            raise adb_client.AdbError("Remote shell exited")
+
+    # --- Execução ---
+
+    def _execute(self, command, timeout):
+        if self._conn is None:
+            self._connect()
+        self._conn.sock.settimeout(timeout)
+
+        marker = f"__SCRCPYLAUNCHER_{uuid.uuid4().hex}__".encode('ascii')
+        # Subshell: um 'exit' ou 'cd' do comando não afeta a sessão. Lê de /dev/null
+        # para não consumir os próximos comandos da fila.
+        script = (
+            f"( {command}\n) </dev/null; printf '\\n%s %d\\n' {marker.decode()} \"$?\"\n"
+        ).encode('utf-8')
+        self._stderr.clear()
+        self._send_stdin(script)
+
+        needle = b'\n' + marker + b' '
+        while True:
+            idx = self._stdout.find(needle)
+            if idx != -1:
+                end = self._stdout.find(b'\n', idx + len(needle))
+                if end != -1:
+                    break
+            try:
+                self._read_packet()
+            except (OSError, adb_client.AdbError) as e:
+                # O comando já foi enviado ao shell: reabrir a sessão e repeti-lo poderia executá-lo duas vezes.
+                raise adb_client.AdbConnectionLost(f"Shell session lost while running {command!r}: {e}") from e
+
+        output = bytes(self._stdout[:idx]).decode('utf-8', 'replace')
+        exit_code = int(self._stdout[idx + len(needle):end])
+        del self._stdout[:end + 1]
+        if exit_code != 0:
+            raise adb_client.AdbShellError(command, exit_code, output, self._stderr.decode('utf-8', 'replace'))
+        return output
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            command, timeout, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                try:
+                    result = self._execute(command, timeout)
+                except (adb_client.AdbShellError, adb_client.AdbConnectionLost):
+                    raise
+                except (OSError, adb_client.AdbError):
+                    # Sessão caiu antes do envio (dispositivo reconectado ou shell encerrado): reabre e tenta de novo.
+                    self._disconnect()
+                    result = self._execute(command, timeout)
+                future.set_result(result)
+            except adb_client.AdbShellError as e:
+                future.set_exception(e)
+            except Exception as e:
+                self._disconnect()
+                future.set_exception(e)
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(serial=None):
+    """Retorna (criando se necessário) a sessão persistente do dispositivo."""
+    with _sessions_lock:
+        session = _sessions.get(serial)
+        if session is None:
+            session = ShellSession(serial)
+            _sessions[serial] = session
+        return session
+
+def close_session(serial=None):
+    with _sessions_lock:
+        session = _sessions.pop(serial, None)
+    if session:
+        session.close()
+
+def close_all_sessions():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
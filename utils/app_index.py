@@ -0,0 +1,72 @@
+# FILE: utils/app_index.py
+# PURPOSE: Sincronização incremental dos apps instalados, persistida por dispositivo.
+#          A lista do gerenciador de pacotes (versionCode + mtime do APK) é
+#          comparada com o índice salvo; o scrcpy só é chamado quando há pacotes
+#          novos ou atualizados, e os nomes vêm do retrato de capacidades do
+#          dispositivo (device_capabilities).
+
+from utils import adb_handler, device_capabilities
+
+
+def empty_index():
+    return {'packages': {}}
+
+
+def seed_index(apps):
+    """
+    Índice inicial a partir do cache {nome: pacote} de versões anteriores do launcher.
+    Sem versão conhecida, o próximo diff só adota a versão atual: os pacotes não contam
+    como novos (não baixam ícones) nem como atualizados.
+    """
+    return {'packages': {pkg: {'name': name, 'version_code': None, 'updated_at': None, 'seeded': True}
+                         for name, pkg in (apps or {}).items()}}
+
+
+def apps_from_index(index):
+    """Retorna {nome: pacote} (formato de `list_installed_apps()`) dos pacotes com nome."""
+    apps = {record['name']: pkg for pkg, record in index.get('packages', {}).items() if record.get('name')}
+    return dict(sorted(apps.items()))
+
+
+def sync_index(index, device_id, capabilities_dir, full=False):
+    """
+    Atualiza o índice e retorna (novo_índice, diferenças), com as listas de
+    pacotes 'added', 'updated' e 'removed'.
+
+    Nomes de pacotes inalterados são mantidos. O '--list-apps' do scrcpy (a
+    única fonte dos nomes) só roda quando há pacotes novos ou atualizados, e só
+    os nomes desses pacotes são aproveitados. Com `full`, todos os nomes são
+    relidos (o botão "Refresh Apps").
+    """
+    index = index or empty_index()
+    packages = adb_handler.list_packages(device_id)
+    if not packages:
+        # Sem resposta do dispositivo: não descarta o índice salvo.
+        raise ConnectionError("Could not read the package list")
+
+    old_packages = index.get('packages', {})
+    added = [pkg for pkg in packages if pkg not in old_packages]
+    updated = [pkg for pkg, (version_code, updated_at) in packages.items()
+               if pkg in old_packages and not old_packages[pkg].get('seeded')
+               and (old_packages[pkg].get('version_code'), old_packages[pkg].get('updated_at')) != (version_code, updated_at)]
+    removed = [pkg for pkg in old_packages if pkg not in packages]
+
+    refetch = set(packages) if full else set(added) | set(updated)
+    names = {}
+    if refetch:
+        # Relê a lista de apps do retrato do dispositivo, que assim acompanha o índice.
+        apps = device_capabilities.get_apps(capabilities_dir, device_id, refresh=True)
+        names = {pkg: name for name, pkg in apps.items()}
+
+    new_packages = {}
+    for pkg, (version_code, updated_at) in packages.items():
+        if pkg in refetch:
+            # Pacotes sem atividade/nome no '--list-apps' ficam no índice com nome vazio,
+            # para não provocarem uma nova listagem a cada sincronização.
+            name = names.get(pkg)
+        else:
+            name = old_packages[pkg].get('name')
+        new_packages[pkg] = {'name': name, 'version_code': version_code, 'updated_at': updated_at}
+
+    print(f"[app_index] {len(new_packages)} packages: {len(added)} added, {len(updated)} updated, {len(removed)} removed")
+    return {'packages': new_packages}, {'added': added, 'updated': updated, 'removed': removed}
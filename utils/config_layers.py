@@ -0,0 +1,74 @@
+# FILE: utils/config_layers.py
+# PURPOSE: Resolução em camadas da configuração do scrcpy:
+#          padrões → global → dispositivo → perfil (app ou jogo).
+#          Perfis guardam só as chaves que sobrescrevem as camadas de baixo;
+#          o resultado é uma visão imutável, memorizada até alguma camada mudar.
+
+import threading
+from types import MappingProxyType
+
+BASE_LAYERS = ('default', 'global', 'device')
+
+
+class ConfigResolver:
+    """
+    Camadas base ('default', 'global', 'device') substituídas por cópia a cada
+    alteração (copy-on-write) e um perfil opcional por resolução.
+
+    `resolve(profile_key, profile)` reaproveita a visão anterior enquanto as
+    camadas base não mudarem e o perfil for o mesmo objeto (os perfis vindos
+    do ConfigService são substituídos, nunca alterados no lugar).
+    """
+
+    def __init__(self, defaults):
+        self._layers = {name: MappingProxyType({}) for name in BASE_LAYERS}
+        self._layers['default'] = MappingProxyType(dict(defaults))
+        self._lock = threading.Lock()
+        self._memo = {}
+
+    def layer(self, name):
+        return self._layers[name]
+
+    def set_layer(self, name, values):
+        with self._lock:
+            self._layers[name] = MappingProxyType(dict(values))
+            self._memo.clear()
+
+    def set_value(self, name, key, value):
+        with self._lock:
+            layer = self._layers[name]
+            if key in layer and layer[key] == value:
+                return
+            self._layers[name] = MappingProxyType({**layer, key: value})
+            self._memo.clear()
+
+    def resolve(self, profile_key=None, profile=None):
+        """Retorna a visão (MappingProxyType) das camadas base com o perfil por cima."""
+        with self._lock:
+            memo = self._memo.get(profile_key)
+            if memo and memo[0] is profile:
+                return memo[1]
+            merged = {}
+            for name in BASE_LAYERS:
+                merged.update(self._layers[name])
+            if profile:
+                merged.update(profile)
+            view = MappingProxyType(merged)
+            self._memo[profile_key] = (profile, view)
+            return view
+
+    def explain(self, profile=None, profile_name='profile'):
+        """
+        Retorna {chave: (valor_efetivo, camada)}. A camada de origem é a mais
+        alta que mudou o valor; uma camada que só repete o valor de baixo não conta.
+        """
+        with self._lock:
+            layers = [(name, self._layers[name]) for name in BASE_LAYERS]
+        if profile:
+            layers.append((profile_name, profile))
+        origins = {}
+        for name, values in layers:
+            for key, value in values.items():
+                if key not in origins or origins[key][0] != value:
+                    origins[key] = (value, name)
+        return origins
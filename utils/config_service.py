@@ -0,0 +1,138 @@
+# FILE: utils/config_service.py
+# PURPOSE: Serviço de configuração com um único escritor. As threads do
+#          launcher (Tk, download de ícones, extratores do Winlator) enviam
+#          comandos de mutação por uma fila; só a thread escritora altera o
+#          modelo em memória e grava no ConfigStore.
+
+import queue
+import threading
+
+BATCH_SIZE = 200
+
+
+class ConfigService:
+    """
+    Modelo em memória ({(tabela, device_id): {chave: valor}}) sobre um ConfigStore.
+
+    - `update(tabela, device_id, chave, fn)` enfileira o comando e retorna na hora;
+      a thread escritora aplica `fn(valor_atual)` (None remove a chave) e grava
+      os comandos acumulados numa única transação.
+    - Valores do modelo nunca são alterados no lugar, só substituídos: o que um
+      leitor recebe é um retrato consistente.
+    - Cada thread lê as próprias escritas: a leitura espera a thread escritora
+      aplicar o último comando enviado pela thread (número de sequência).
+    - A leitura de uma chave também espera os comandos pendentes dessa chave
+      enviados por outras threads (ex.: o resultado de um extrator de ícones).
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._model = {}
+        self._queue = queue.Queue()
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._submitted = 0 # Sequência do último comando enviado
+        self._applied = 0   # ... do último aplicado ao modelo
+        self._persisted = 0 # ... do último gravado no disco
+        self._pending = {}  # (tabela, device_id, chave) -> sequência do último comando enviado
+        threading.Thread(target=self._writer_loop, name="config-writer", daemon=True).start()
+
+    # --- Escrita ---
+
+    def update(self, table, device_id, key, fn):
+        """Enfileira `fn(valor_atual) -> novo_valor`. `fn` não deve alterar o valor recebido."""
+        with self._cond:
+            self._submitted += 1
+            seq = self._submitted
+            self._pending[(table, device_id, key)] = seq
+            self._queue.put((seq, table, device_id, key, fn))
+        self._local.last_seq = seq
+        return seq
+
+    def put(self, table, device_id, key, value):
+        return self.update(table, device_id, key, lambda _current: value)
+
+    def delete(self, table, device_id, key):
+        return self.update(table, device_id, key, lambda _current: None)
+
+    def flush(self, timeout=None):
+        """Espera a gravação de todos os comandos enviados até agora. Retorna False se o tempo acabar."""
+        with self._cond:
+            target = self._submitted
+            return self._cond.wait_for(lambda: self._persisted >= target, timeout)
+
+    # --- Leitura ---
+
+    def get(self, table, device_id, key, default=None):
+        with self._cond:
+            self._wait_own_writes(self._pending.get((table, device_id, key), 0))
+            value = self._rows(table, device_id).get(key)
+        return default if value is None else value
+
+    def snapshot(self, table, device_id):
+        """Cópia de todas as chaves do dispositivo na tabela."""
+        with self._cond:
+            self._wait_own_writes()
+            return dict(self._rows(table, device_id))
+
+    def values_by_device(self, table, key):
+        """Retorna {device_id: valor} de uma chave em todos os dispositivos (incluindo o que ainda não foi gravado)."""
+        with self._cond:
+            self._wait_own_writes()
+            values = self.store.values_by_device(table, key)
+            for (row_table, device_id), rows in self._model.items():
+                if row_table != table:
+                    continue
+                if key in rows:
+                    values[device_id] = rows[key]
+                else:
+                    values.pop(device_id, None)
+        return values
+
+    # --- Internos (chamados com self._cond adquirido) ---
+
+    def _wait_own_writes(self, pending_seq=0):
+        last_seq = max(getattr(self._local, 'last_seq', 0), pending_seq)
+        self._cond.wait_for(lambda: self._applied >= last_seq)
+
+    def _rows(self, table, device_id):
+        rows = self._model.get((table, device_id))
+        if rows is None:
+            rows = self._model[(table, device_id)] = self.store.load(table, device_id)
+        return rows
+
+    def _writer_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            changes = {}
+            with self._cond:
+                for seq, table, device_id, key, fn in batch:
+                    if self._pending.get((table, device_id, key)) == seq:
+                        del self._pending[(table, device_id, key)]
+                    rows = self._rows(table, device_id)
+                    try:
+                        value = fn(rows.get(key))
+                    except Exception as e:
+                        print(f"[config_service] Update of {table}/{key} failed: {e}")
+                        continue
+                    if value is None:
+                        rows.pop(key, None)
+                    else:
+                        rows[key] = value
+                    changes[(table, device_id, key)] = value
+                self._applied = batch[-1][0]
+                self._cond.notify_all()
+
+            try:
+                self.store.write(changes)
+            except Exception as e:
+                print(f"[config_service] Could not save {len(changes)} changes: {e}")
+            with self._cond:
+                self._persisted = batch[-1][0]
+                self._cond.notify_all()
@@ -0,0 +1,80 @@
+# FILE: utils/config_store.py
+# PURPOSE: Armazenamento em SQLite (modo WAL) dos metadados de apps, caches e
+#          configurações por jogo. Cada gravação é o upsert de uma única chave,
+#          com custo independente do tamanho da biblioteca.
+
+import json
+import sqlite3
+import threading
+
+# Todas as tabelas têm o mesmo formato: (device_id, key) -> valor em JSON.
+TABLES = ('app_metadata', 'game_configs', 'exe_icon_failures', 'caches')
+
+
+class ConfigStore:
+    """Tabelas chave/valor por dispositivo, compartilhadas entre as threads do launcher."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # isolation_level=None: cada instrução é confirmada sozinha, exceto dentro de BEGIN/COMMIT explícitos.
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for table in TABLES:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "device_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (device_id, key))")
+
+    def load(self, table, device_id):
+        """Retorna {chave: valor} de todas as linhas do dispositivo na tabela."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT key, value FROM {table} WHERE device_id = ?", (device_id,)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def get(self, table, device_id, key):
+        """Retorna o valor de uma chave, ou None."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT value FROM {table} WHERE device_id = ? AND key = ?",
+                                     (device_id, key)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def values_by_device(self, table, key):
+        """Retorna {device_id: valor} de uma chave em todos os dispositivos."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT device_id, value FROM {table} WHERE key = ?", (key,)).fetchall()
+        return {device_id: json.loads(value) for device_id, value in rows}
+
+    def write(self, changes):
+        """Grava {(tabela, device_id, chave): valor} numa única transação; valor None remove a chave."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for (table, device_id, key), value in changes.items():
+                    if value is None:
+                        self._conn.execute(f"DELETE FROM {table} WHERE device_id = ? AND key = ?", (device_id, key))
+                    else:
+                        self._conn.execute(f"INSERT OR REPLACE INTO {table} (device_id, key, value) VALUES (?, ?, ?)",
+                                           (device_id, key, json.dumps(value)))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def import_rows(self, device_id, tables):
+        """
+        Importa {tabela: {chave: valor}} numa única transação, sem sobrescrever
+        chaves já existentes (uma migração interrompida pode ser repetida).
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for table, rows in tables.items():
+                    self._conn.executemany(
+                        f"INSERT OR IGNORE INTO {table} (device_id, key, value) VALUES (?, ?, ?)",
+                        [(device_id, key, json.dumps(value)) for key, value in rows.items()])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
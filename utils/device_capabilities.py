@@ -0,0 +1,150 @@
+# FILE: utils/device_capabilities.py
+# PURPOSE: Retrato das capacidades de um dispositivo (encoders, apps, tela e
+#          versão do Android) indexado pelo fingerprint do build e pela
+#          versão local do scrcpy. Dispositivos idênticos compartilham o mesmo
+#          retrato; ele só é refeito quando um dos dois muda ou a pedido.
+#          Os apps instalados variam entre aparelhos do mesmo build e ficam num
+#          retrato próprio de cada serial.
+
+import os
+import json
+import time
+import hashlib
+import threading
+from utils import adb_handler, scrcpy_handler
+
+# Campos obtidos via scrcpy (cada um envia e inicia o servidor no dispositivo)
+_SCRCPY_FIELDS = {
+    'encoders': lambda device_id: dict(zip(('video', 'audio'), scrcpy_handler.list_encoders(device_id))),
+    'apps': scrcpy_handler.list_installed_apps,
+}
+
+# Campos guardados por serial, e não por build
+_DEVICE_FIELDS = ('apps',)
+
+# `_lock` protege só a leitura/gravação dos arquivos (rápida); cada serial tem sua trava
+# para as chamadas ao scrcpy, que levam segundos e não devem bloquear outros dispositivos.
+_lock = threading.Lock()
+_device_locks = {}
+_scrcpy_version = None
+
+
+def _get_scrcpy_version():
+    global _scrcpy_version
+    if _scrcpy_version is None:
+        _scrcpy_version = scrcpy_handler.get_scrcpy_version() or 'unknown'
+    return _scrcpy_version
+
+
+def snapshot_key(fingerprint, scrcpy_version):
+    return hashlib.sha1(f"{fingerprint}\0{scrcpy_version}".encode('utf-8')).hexdigest()[:16]
+
+
+def device_snapshot_key(device_id):
+    return 'device-' + hashlib.sha1(device_id.encode('utf-8')).hexdigest()[:16]
+
+
+def _device_lock(device_id):
+    with _lock:
+        return _device_locks.setdefault(device_id, threading.Lock())
+
+
+def _snapshot_path(cache_dir, key):
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def _load(cache_dir, key):
+    try:
+        with open(_snapshot_path(cache_dir, key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(cache_dir, snapshot):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _snapshot_path(cache_dir, snapshot['key'])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def _is_empty(field, value):
+    if field == 'encoders':
+        return not (value.get('video') or value.get('audio'))
+    return not value
+
+
+def get_snapshot(cache_dir, device_id, fields=(), refresh=False):
+    """
+    Retorna o retrato do dispositivo, buscando apenas os `fields` que ainda não
+    existem nele (ou todos eles, com `refresh`). Uma única chamada adb identifica
+    o build; o scrcpy só é executado para campos que faltam. Os campos por serial
+    (`_DEVICE_FIELDS`) vêm do retrato do próprio dispositivo.
+    """
+    properties = adb_handler.get_build_properties(device_id)
+    version = _get_scrcpy_version()
+    key = snapshot_key(properties['fingerprint'], version)
+    device_key = device_snapshot_key(device_id)
+
+    def load():
+        snapshot = _load(cache_dir, key) or {
+            'key': key, 'fingerprint': properties['fingerprint'], 'scrcpy_version': version,
+            'created_at': time.time(), 'fields_updated_at': {},
+        }
+        device_snapshot = _load(cache_dir, device_key) or {
+            'key': device_key, 'serial': device_id, 'created_at': time.time(), 'fields_updated_at': {},
+        }
+        return snapshot, device_snapshot
+
+    with _device_lock(device_id):
+        with _lock:
+            snapshot, device_snapshot = load()
+        missing = [field for field in fields if refresh or
+                   field not in (device_snapshot if field in _DEVICE_FIELDS else snapshot)]
+
+        # O scrcpy roda sem a trava global: outros dispositivos continuam sendo consultados.
+        fetched = {}
+        for field in missing:
+            value = _SCRCPY_FIELDS[field](device_id)
+            if _is_empty(field, value):
+                # Falha de comunicação não deve ser gravada como "o dispositivo não tem nada".
+                raise RuntimeError(f"Could not read {field} from the device")
+            fetched[field] = value
+            if field in _DEVICE_FIELDS:
+                print(f"[device_capabilities] Fetched {field} for device {device_id}")
+            else:
+                print(f"[device_capabilities] Fetched {field} for {properties['fingerprint']} ({version})")
+
+        with _lock:
+            # Relê: outro dispositivo do mesmo build pode ter gravado o retrato enquanto isso.
+            snapshot, device_snapshot = load()
+            changed = snapshot.get('android_version') != properties['android_version'] or \
+                snapshot.get('screen_size') != properties['screen_size']
+            snapshot.update(android_version=properties['android_version'], screen_size=properties['screen_size'])
+            device_changed = False
+            for field, value in fetched.items():
+                target = device_snapshot if field in _DEVICE_FIELDS else snapshot
+                target[field] = value
+                target['fields_updated_at'][field] = time.time()
+                if target is snapshot:
+                    changed = True
+                else:
+                    device_changed = True
+            if changed:
+                _save(cache_dir, snapshot)
+            if device_changed:
+                _save(cache_dir, device_snapshot)
+    return dict(snapshot, **{field: device_snapshot[field] for field in _DEVICE_FIELDS if field in device_snapshot})
+
+
+def get_encoders(cache_dir, device_id, refresh=False):
+    """Retorna (encoders_de_vídeo, encoders_de_áudio) no formato de `list_encoders()`."""
+    encoders = get_snapshot(cache_dir, device_id, ('encoders',), refresh)['encoders']
+    return encoders.get('video', {}), encoders.get('audio', {})
+
+
+def get_apps(cache_dir, device_id, refresh=False):
+    """Retorna {nome: pacote} no formato de `list_installed_apps()`."""
+    return get_snapshot(cache_dir, device_id, ('apps',), refresh)['apps']
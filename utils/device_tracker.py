@@ -0,0 +1,117 @@
+# FILE: utils/device_tracker.py
+# PURPOSE: Acompanha conexões de dispositivos pelo stream 'host:track-devices'
+#          do servidor adb e publica os eventos numa fila thread-safe.
+
+import queue
+import socket
+import subprocess
+import threading
+import time
+from utils import adb_client, adb_shell_session
+
+
+class DeviceTracker:
+    """
+    Thread em segundo plano que mantém o estado dos dispositivos e coloca em
+    `events` dicionários {'event': 'connected'|'disconnected'|'state_changed',
+    'serial': ..., 'state': ...}. A GUI consome a fila sem bloquear.
+    """
+
+    def __init__(self, client=None, reconnect_delay=1.0, max_reconnect_delay=10.0):
+        self.client = client or adb_client.get_client()
+        self.events = queue.Queue()
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._devices = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._conn = None
+        self._thread = threading.Thread(target=self._run, name="adb-track-devices", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        conn = self._conn
+        if conn:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+
+    def devices(self):
+        """Retorna uma cópia do estado atual {serial: estado}."""
+        with self._lock:
+            return dict(self._devices)
+
+    def first_ready_device(self, preferred=None):
+        """Retorna `preferred` se estiver pronto, senão o primeiro dispositivo no estado 'device'."""
+        devices = self.devices()
+        if preferred and devices.get(preferred) == 'device':
+            return preferred
+        for serial, state in devices.items():
+            if state == 'device':
+                return serial
+        return None
+
+    def _publish(self, event, serial, state):
+        self.events.put({'event': event, 'serial': serial, 'state': state})
+
+    def _apply_snapshot(self, new_devices):
+        with self._lock:
+            old_devices = self._devices
+            self._devices = new_devices
+        for serial, state in new_devices.items():
+            if serial not in old_devices:
+                self._publish('connected', serial, state)
+            elif old_devices[serial] != state:
+                self._publish('state_changed', serial, state)
+        for serial, state in old_devices.items():
+            if serial not in new_devices:
+                # Conexões abertas para um dispositivo removido não servem mais.
+                self.client.close_device(serial)
+                adb_shell_session.close_session(serial)
+                self._publish('disconnected', serial, state)
+
+    def _track(self):
+        conn = self.client.connect()
+        self._conn = conn
+        try:
+            conn.send_request('host:track-devices')
+            # O stream fica em silêncio enquanto nada muda: a leitura não pode ter timeout
+            # (seria confundida com a queda do servidor). `stop()` desbloqueia com shutdown.
+            conn.sock.settimeout(None)
+            while not self._stop.is_set():
+                payload = conn.read_length_prefixed().decode('utf-8', 'replace')
+                self._apply_snapshot(dict(adb_client.parse_device_list(payload)))
+        finally:
+            self._conn = None
+            conn.close()
+
+    def _run(self):
+        delay = self.reconnect_delay
+        started_server = False
+        while not self._stop.is_set():
+            connected_at = time.monotonic()
+            try:
+                self._track()
+            except (OSError, adb_client.AdbError) as e:
+                if self._stop.is_set():
+                    return
+                if not started_server and isinstance(e, ConnectionRefusedError):
+                    # O binário 'adb' inicia o servidor; só é necessário uma vez.
+                    started_server = True
+                    try:
+                        subprocess.run(['adb', 'start-server'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+                        continue
+                    except (OSError, subprocess.SubprocessError):
+                        pass
+            # Servidor caiu ou reiniciou: nenhum dispositivo é conhecido até reconectar.
+            self._apply_snapshot({})
+            if time.monotonic() - connected_at > self.max_reconnect_delay:
+                delay = self.reconnect_delay
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
@@ -0,0 +1,106 @@
+# FILE: utils/exe_icon_cache.py
+# PURPOSE: Cache de ícones extraídos de .exe, indexado pelo próprio executável
+#          (caminho remoto, tamanho e mtime) em vez do nome do atalho.
+#          Atalhos renomeados ou duplicados apontam para a mesma entrada.
+
+import os
+import time
+import hashlib
+from utils import adb_handler
+
+RETRY_BASE_SECONDS = 60 * 60
+RETRY_MAX_SECONDS = 7 * 24 * 60 * 60
+
+
+def cache_key(remote_exe_path, size, mtime):
+    """Chave estável de um executável remoto."""
+    raw = f"{remote_exe_path}\0{size}\0{mtime}".encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+
+def icon_path_for_key(app_config, key):
+    return os.path.join(app_config.get_icon_cache_dir(), f"exe_{key}.png")
+
+
+def shortcut_icon_path(app_config, game_path):
+    """Ícone por atalho: customizado (arrastado), SteamGridDB ou extraído por versões antigas."""
+    return os.path.join(app_config.get_icon_cache_dir(), f"{os.path.basename(game_path)}.png")
+
+
+def resolve_game_icon(app_config, game_path):
+    """Retorna o ícone a exibir para um atalho, ou None se ainda não houver um."""
+    own_icon = shortcut_icon_path(app_config, game_path)
+    if os.path.exists(own_icon):
+        return own_icon
+    key = app_config.get_app_metadata(game_path).get('exe_icon_key')
+    if key:
+        path = icon_path_for_key(app_config, key)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def should_retry(app_config, key, now=None):
+    """Aplica backoff exponencial às chaves que já falharam."""
+    failure = app_config.get_exe_icon_failure(key)
+    if not failure:
+        return True
+    delay = min(RETRY_BASE_SECONDS * 2 ** (failure.get('count', 1) - 1), RETRY_MAX_SECONDS)
+    return (now or time.time()) - failure.get('last_attempt', 0) >= delay
+
+
+def plan_extraction(app_config, games, device_id=None):
+    """
+    Classifica os jogos sem ícone, com um único 'stat' dos executáveis no dispositivo.
+
+    Retorna (linked, to_extract, skipped):
+      linked     -- caminhos de atalhos cujo .exe já tem ícone no cache (associados agora, sem transferência)
+      to_extract -- {chave: {'exe_path', 'save_path', 'shortcuts': [...]}}, uma entrada por executável
+      skipped    -- caminhos sem .exe resolvível, inexistente ou ainda em backoff
+    """
+    pending = [
+        game for game in games
+        if not resolve_game_icon(app_config, game['path'])
+        and not app_config.get_app_metadata(game['path']).get('custom_icon')
+    ]
+    exe_paths = sorted({game['exe_path'] for game in pending if game.get('exe_path')})
+    stats = adb_handler.stat_remote_files(exe_paths, device_id)
+
+    linked, to_extract, skipped = [], {}, []
+    now = time.time()
+    for game in pending:
+        exe_path = game.get('exe_path')
+        if not exe_path or exe_path not in stats:
+            skipped.append(game['path'])
+            continue
+        key = cache_key(exe_path, *stats[exe_path])
+        if os.path.exists(icon_path_for_key(app_config, key)):
+            app_config.save_app_metadata(game['path'], {'exe_icon_key': key})
+            linked.append(game['path'])
+        elif key in to_extract:
+            to_extract[key]['shortcuts'].append(game['path'])
+        elif should_retry(app_config, key, now):
+            to_extract[key] = {
+                'exe_path': exe_path,
+                'save_path': icon_path_for_key(app_config, key),
+                'shortcuts': [game['path']],
+            }
+        else:
+            skipped.append(game['path'])
+    return linked, to_extract, skipped
+
+
+def link_cached_icons(app_config, games, device_id=None):
+    """Associa atalhos novos ou renomeados a ícones já extraídos. Retorna os caminhos associados."""
+    linked, _, _ = plan_extraction(app_config, games, device_id)
+    return linked
+
+
+def record_result(app_config, key, shortcuts, success):
+    """Atualiza a tabela de apelidos e o registro de falhas após uma extração."""
+    if success:
+        app_config.clear_exe_icon_failure(key)
+        for path in shortcuts:
+            app_config.save_app_metadata(path, {'exe_icon_key': key})
+    else:
+        app_config.record_exe_icon_failure(key, time.time())
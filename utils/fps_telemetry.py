@@ -0,0 +1,96 @@
+# FILE: utils/fps_telemetry.py
+# PURPOSE: Telemetria de FPS por sessão: guarda os relatórios periódicos do
+#          '--print-fps' do scrcpy num buffer circular de arrays e calcula
+#          min/média, os piores 1%/5% ("1% low"/"5% low") e uma estimativa
+#          de quadros perdidos.
+
+import time
+from array import array
+
+
+class FpsTelemetry:
+    """
+    Buffer circular de tamanho fixo com uma amostra por relatório de FPS
+    (o scrcpy imprime um por segundo). `on_event` é o listener a registrar
+    no ScrcpyOutputReader da sessão.
+    """
+
+    def __init__(self, target_fps=None, capacity=3600):
+        self.target_fps = target_fps
+        self.capacity = capacity
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._fps = array('H', bytes(2 * capacity))
+        self._skipped = array('I', bytes(4 * capacity))
+        self._next = 0
+        self.count = 0 # Amostras no buffer (no máximo `capacity`)
+        self.total_samples = 0
+        self.total_skipped = 0
+        self.total_deficit = 0
+        self.started_at = time.time()
+
+    def on_event(self, event):
+        if event.get('event') == 'fps':
+            self.add_sample(event['fps'], event.get('skipped', 0), event.get('time'))
+
+    def add_sample(self, fps, skipped=0, timestamp=None):
+        i = self._next
+        self._timestamps[i] = timestamp or time.time()
+        self._fps[i] = max(0, min(fps, 0xFFFF))
+        self._skipped[i] = max(0, skipped)
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.total_samples += 1
+        self.total_skipped += skipped
+        if self.target_fps:
+            self.total_deficit += max(0, self.target_fps - fps)
+
+    def samples(self):
+        """Retorna [(timestamp, fps, skipped), ...] em ordem cronológica."""
+        start = (self._next - self.count) % self.capacity
+        indexes = [(start + i) % self.capacity for i in range(self.count)]
+        return [(self._timestamps[i], self._fps[i], self._skipped[i]) for i in indexes]
+
+    def stats(self):
+        """
+        Estatísticas das amostras no buffer. 'dropped' estima os quadros perdidos
+        desde o início: quadros descartados pelo cliente mais o déficit em relação
+        ao FPS alvo (quando conhecido).
+        """
+        if not self.count:
+            return None
+        # Até dar a volta o buffer é preenchido a partir do índice 0.
+        values = sorted(self._fps[:self.count])
+        return {
+            'samples': self.count,
+            'min': values[0],
+            'avg': round(sum(values) / len(values), 1),
+            # Cauda baixa (percentis 1 e 5 em ordem crescente): é onde aparecem os engasgos.
+            'low_1': _percentile(values, 1),
+            'low_5': _percentile(values, 5),
+            'last': self._fps[(self._next - 1) % self.capacity],
+            'target': self.target_fps,
+            'skipped': self.total_skipped,
+            'dropped': self.total_skipped + self.total_deficit,
+        }
+
+    def to_dict(self):
+        """Representação serializável em JSON (estatísticas + série temporal)."""
+        return {
+            'started_at': self.started_at,
+            'stats': self.stats(),
+            'samples': [{'time': t, 'fps': fps, 'skipped': skipped} for t, fps, skipped in self.samples()],
+        }
+
+
+def _percentile(sorted_values, percent):
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def target_fps_from_config(config_values):
+    """FPS alvo configurado (max_fps), ou None se não houver limite."""
+    try:
+        value = int(config_values.get('max_fps') or 0)
+    except (TypeError, ValueError):
+        return None
+    return value or None
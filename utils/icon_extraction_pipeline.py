@@ -0,0 +1,216 @@
+# FILE: utils/icon_extraction_pipeline.py
+# PURPOSE: Pipeline de extração de ícones de .exe do Winlator em dois estágios:
+#          transferência via adb (threads de I/O) e análise do PE, decodificação
+#          e redimensionamento em um pool de processos (fora do GIL).
+
+import os
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from utils import adb_handler, pe_range_reader
+
+
+def _extract_icon_job(local_exe_path, save_path):
+    """Executado no pool de processos: importa o extrator só no processo filho."""
+    from utils import exe_icon_extractor
+    return exe_icon_extractor.extract_icon_from_exe(local_exe_path, save_path)
+
+
+class _DiskBudget:
+    """Limita quantos bytes de arquivos temporários podem existir ao mesmo tempo."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size, cancelled):
+        # Um arquivo maior que o limite inteiro ocupa o orçamento todo, em vez de travar para sempre.
+        size = min(size, self.limit)
+        with self._cond:
+            while self.used + size > self.limit:
+                if cancelled.is_set():
+                    raise _Cancelled()
+                self._cond.wait(0.5)
+            self.used += size
+        return size
+
+    def release(self, size):
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class IconExtractionPipeline:
+    """
+    Recebe tarefas (chave, caminho remoto do .exe, caminho do .png de destino) e
+    chama `on_result(chave, sucesso)` de uma thread do pipeline ao fim de cada uma.
+    `cancel()` descarta o trabalho pendente; `shutdown()` também encerra as threads
+    e o pool de processos.
+    """
+
+    def __init__(self, on_result, temp_dir, device_id=None, io_workers=3, cpu_workers=None,
+                 temp_budget_bytes=512 * 1024 * 1024):
+        self.on_result = on_result
+        self.temp_dir = temp_dir
+        self.device_id = device_id
+        self.cpu_workers = cpu_workers or max(1, min(4, os.cpu_count() or 1))
+        self.budget = _DiskBudget(temp_budget_bytes)
+        self.total = 0
+        self.completed = 0
+        self._io_queue = queue.Queue()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._executor = None
+        self._closed = False
+        self._pending = set()
+        self._io_threads = [
+            threading.Thread(target=self._io_worker, name=f"icon-io-{i}", daemon=True)
+            for i in range(io_workers)
+        ]
+        for thread in self._io_threads:
+            thread.start()
+
+    # --- API pública ---
+
+    def submit(self, key, remote_exe_path, save_path):
+        with self._lock:
+            self.total += 1
+        self._io_queue.put((key, remote_exe_path, save_path))
+
+    def is_finished(self):
+        with self._lock:
+            return self.completed >= self.total
+
+    def wait(self, timeout=None):
+        with self._done:
+            return self._done.wait_for(lambda: self.completed >= self.total, timeout)
+
+    def cancel(self):
+        """Descarta tarefas ainda não iniciadas; as que já estão no pool terminam sozinhas."""
+        self._cancelled.set()
+        sentinels = 0
+        while True:
+            try:
+                item = self._io_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                sentinels += 1
+            else:
+                self._finish(item[0], False, notify=False)
+        for _ in range(sentinels):
+            self._io_queue.put(None)
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+
+    def shutdown(self, wait=False):
+        self.cancel()
+        for _ in self._io_threads:
+            self._io_queue.put(None)
+        if wait:
+            for thread in self._io_threads:
+                thread.join()
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    # --- Estágios ---
+
+    def _get_executor(self):
+        with self._lock:
+            if self._closed:
+                raise _Cancelled()
+            if self._executor is None:
+                # 'spawn' evita herdar o estado do Tk e das threads do processo da GUI.
+                self._executor = ProcessPoolExecutor(self.cpu_workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _finish(self, key, success, notify=True):
+        with self._done:
+            self.completed += 1
+            self._done.notify_all()
+        if notify and not self._cancelled.is_set():
+            try:
+                self.on_result(key, success)
+            except Exception as e:
+                print(f"[icon_pipeline] Erro no callback de {key}: {e}")
+
+    def _fetch(self, remote_exe_path, local_path, reservation):
+        """Transfere os bytes necessários, registrando em `reservation` o que foi reservado no orçamento."""
+        def reserve(size):
+            reservation['bytes'] = self.budget.acquire(size, self._cancelled)
+
+        try:
+            pe_range_reader.fetch_icon_resources(remote_exe_path, local_path, self.device_id, reserve=reserve)
+        except (IOError, pe_range_reader.PEFormatError) as e:
+            self.budget.release(reservation.pop('bytes', 0))
+            print(f"[icon_pipeline] Leitura parcial falhou ({e}), baixando o .exe inteiro.")
+            size = adb_handler.get_remote_file_size(remote_exe_path, self.device_id)
+            if size is None:
+                raise FileNotFoundError(remote_exe_path)
+            reserve(size)
+            adb_handler.pull_file(remote_exe_path, local_path, self.device_id)
+
+    def _io_worker(self):
+        while True:
+            item = self._io_queue.get()
+            if item is None:
+                return
+            key, remote_exe_path, save_path = item
+            if self._cancelled.is_set():
+                self._finish(key, False, notify=False)
+                continue
+
+            local_path = os.path.join(self.temp_dir, f"scrcpylauncher_{os.getpid()}_{threading.get_ident()}_{os.path.basename(remote_exe_path)}")
+            reservation = {}
+            try:
+                self._fetch(remote_exe_path, local_path, reservation)
+                if not os.path.exists(local_path):
+                    raise FileNotFoundError("Falha ao baixar o .exe")
+                if self._cancelled.is_set():
+                    raise _Cancelled()
+                future = self._get_executor().submit(_extract_icon_job, local_path, save_path)
+            except Exception as e:
+                if not isinstance(e, _Cancelled):
+                    print(f"[icon_pipeline] ERRO ao transferir {remote_exe_path}: {e}")
+                self._cleanup(local_path, reservation.get('bytes', 0))
+                self._finish(key, False, notify=not isinstance(e, _Cancelled))
+                continue
+
+            with self._lock:
+                self._pending.add(future)
+            reserved = reservation.get('bytes', 0)
+            future.add_done_callback(lambda f, k=key, p=local_path, r=reserved: self._on_cpu_done(f, k, p, r))
+
+    def _on_cpu_done(self, future, key, local_path, reserved):
+        with self._lock:
+            self._pending.discard(future)
+        self._cleanup(local_path, reserved)
+        if future.cancelled():
+            self._finish(key, False, notify=False)
+            return
+        try:
+            success = bool(future.result())
+        except Exception as e:
+            print(f"[icon_pipeline] ERRO ao extrair ícone: {e}")
+            success = False
+        self._finish(key, success)
+
+    def _cleanup(self, local_path, reserved):
+        try:
+            if os.path.exists(local_path):
+                os.remove(local_path)
+        except OSError:
+            pass
+        self.budget.release(reserved)
@@ -0,0 +1,206 @@
+# FILE: utils/launch_metrics.py
+# PURPOSE: Mede a latência de cada lançamento (do clique ao primeiro quadro),
+#          fase por fase, e acumula histogramas por app num arquivo JSON.
+
+import os
+import json
+import time
+import threading
+
+# Fases conhecidas. A duração de cada uma vai do marco anterior (em ordem cronológica) até ela;
+# empates seguem esta ordem.
+PHASES = ('config_merge', 'process_spawn', 'server_start', 'display_created', 'am_start', 'first_frame')
+TOTAL = 'total'
+
+# Limites superiores (ms) dos baldes do histograma; o último balde é aberto.
+BUCKET_BOUNDS_MS = (50, 100, 200, 350, 500, 750, 1000, 1500, 2000, 3000, 5000, 8000, 13000)
+
+# Eventos do ScrcpyOutputReader que marcam fases
+_OUTPUT_PHASES = {'server_started': 'server_start', 'display_created': 'display_created', 'video_started': 'first_frame'}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _new_histogram():
+    return {'count': 0, 'sum_ms': 0, 'min_ms': None, 'max_ms': None, 'buckets': [0] * (len(BUCKET_BOUNDS_MS) + 1)}
+
+
+def _add_to_histogram(histogram, value_ms):
+    value_ms = int(round(value_ms))
+    bucket = next((i for i, bound in enumerate(BUCKET_BOUNDS_MS) if value_ms <= bound), len(BUCKET_BOUNDS_MS))
+    histogram['buckets'][bucket] += 1
+    histogram['count'] += 1
+    histogram['sum_ms'] += value_ms
+    histogram['min_ms'] = value_ms if histogram['min_ms'] is None else min(histogram['min_ms'], value_ms)
+    histogram['max_ms'] = value_ms if histogram['max_ms'] is None else max(histogram['max_ms'], value_ms)
+
+
+def histogram_percentile(histogram, percentile):
+    """Estimativa do percentil (limite superior do balde, limitado ao máximo observado)."""
+    if not histogram or not histogram['count']:
+        return None
+    rank = percentile / 100 * histogram['count']
+    seen = 0
+    for i, count in enumerate(histogram['buckets']):
+        seen += count
+        if count and seen >= rank:
+            bound = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else histogram['max_ms']
+            return min(bound, histogram['max_ms'])
+    return histogram['max_ms']
+
+
+class LaunchMetricsStore:
+    """Histogramas por app ({chave: {'name', 'kind', 'failed', 'phases': {fase: histograma}}})."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def _entry(self, key, name, kind):
+        entry = self.data.setdefault(key, {'name': name, 'kind': kind, 'failed': 0, 'phases': {}})
+        entry['name'] = name or entry.get('name')
+        return entry
+
+    def record(self, key, name, kind, spans_ms):
+        with self._lock:
+            entry = self._entry(key, name, kind)
+            for phase, value_ms in spans_ms.items():
+                _add_to_histogram(entry['phases'].setdefault(phase, _new_histogram()), value_ms)
+            entry['last_launch'] = dict(spans_ms, time=time.time())
+            self._save()
+
+    def record_failure(self, key, name, kind):
+        with self._lock:
+            self._entry(key, name, kind)['failed'] += 1
+            self._save()
+
+    def summary(self):
+        """Linhas para exibição: nome, lançamentos, p50/p95 do total e a fase mais lenta (por p50)."""
+        rows = []
+        with self._lock:
+            for key, entry in self.data.items():
+                total = entry['phases'].get(TOTAL)
+                phase_p50 = {phase: histogram_percentile(hist, 50) for phase, hist in entry['phases'].items() if phase != TOTAL}
+                slowest = max(phase_p50, key=lambda phase: phase_p50[phase] or 0) if phase_p50 else None
+                rows.append({
+                    'key': key, 'name': entry.get('name') or key, 'kind': entry.get('kind'),
+                    'launches': total['count'] if total else 0, 'failed': entry.get('failed', 0),
+                    'p50_ms': histogram_percentile(total, 50), 'p95_ms': histogram_percentile(total, 95),
+                    'slowest_phase': slowest, 'slowest_phase_p50_ms': phase_p50.get(slowest),
+                })
+        return sorted(rows, key=lambda row: -(row['p50_ms'] or 0))
+
+    def export(self, file_path):
+        with self._lock:
+            data = {'bucket_bounds_ms': list(BUCKET_BOUNDS_MS), 'apps': self.data}
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4)
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=4)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[launch_metrics] Could not save metrics: {e}")
+
+
+def init_store(path):
+    global _store
+    with _store_lock:
+        _store = LaunchMetricsStore(path)
+    return _store
+
+
+def get_store():
+    return _store
+
+
+class LaunchTrace:
+    """
+    Marcos de um lançamento, medidos a partir do clique. As fases que vêm da
+    saída do scrcpy são marcadas por `attach(output)`. Ao atingir todas as fases
+    de `required`, as durações são gravadas no histograma do app.
+    """
+
+    def __init__(self, key, name, kind='app', required=('first_frame',)):
+        self.key = key
+        self.name = name
+        self.kind = kind
+        self.required = set(required)
+        self.started_at = time.time()
+        self.marks = {}
+        self._done = False
+        self._lock = threading.Lock()
+
+    def mark(self, phase, timestamp=None):
+        with self._lock:
+            if self._done or phase in self.marks:
+                return
+            self.marks[phase] = timestamp or time.time()
+            finished = self.required.issubset(self.marks)
+            if finished:
+                self._done = True
+        if finished:
+            self._record()
+
+    def skip(self, reason):
+        """Deixa o lançamento fora dos histogramas e das falhas (ex.: '--no-video' nunca mostra o primeiro quadro)."""
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        print(f"[launch_metrics] Not measuring launch of {self.name}: {reason}")
+
+    def fail(self):
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        print(f"[launch_metrics] Launch of {self.name} did not complete (phases: {', '.join(self.marks) or 'none'})")
+        if _store:
+            _store.record_failure(self.key, self.name, self.kind)
+
+    def attach(self, output):
+        """Acompanha os eventos do ScrcpyOutputReader da sessão (inclui os já ocorridos)."""
+        if output is None:
+            self.fail()
+            return
+        output.add_listener(self._on_output_event)
+        for event_type in _OUTPUT_PHASES:
+            event = output.latest(event_type)
+            if event:
+                self._on_output_event(event)
+        if output.latest('exited'):
+            self.fail()
+
+    def _on_output_event(self, event):
+        phase = _OUTPUT_PHASES.get(event['event'])
+        if phase:
+            self.mark(phase, event.get('time'))
+        elif event['event'] == 'exited':
+            self.fail()
+
+    def spans_ms(self):
+        spans = {}
+        previous = self.started_at
+        ordered = sorted(self.marks, key=lambda phase: (self.marks[phase], PHASES.index(phase)))
+        for phase in ordered:
+            timestamp = max(self.marks[phase], previous)
+            spans[phase] = (timestamp - previous) * 1000
+            previous = timestamp
+        spans[TOTAL] = (previous - self.started_at) * 1000
+        return spans
+
+    def _record(self):
+        spans = self.spans_ms()
+        print(f"[launch_metrics] {self.name}: " + ", ".join(f"{phase}={int(value)}ms" for phase, value in spans.items()))
+        if _store:
+            _store.record(self.key, self.name, self.kind, spans)
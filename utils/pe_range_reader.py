@@ -0,0 +1,123 @@
+# FILE: utils/pe_range_reader.py
+# PURPOSE: Lê apenas os cabeçalhos e a seção de recursos (.rsrc) de um .exe no
+#          dispositivo, por leituras de offset/tamanho, e monta uma cópia local
+#          esparsa suficiente para extrair o ícone.
+
+import struct
+from utils import adb_handler
+
+HEADER_PROBE_SIZE = 4096
+MAX_RESOURCE_SIZE = 64 * 1024 * 1024
+IMAGE_DIRECTORY_ENTRY_RESOURCE = 2
+
+
+class PEFormatError(ValueError):
+    """O arquivo remoto não é um PE válido ou não tem recursos."""
+
+
+def parse_pe_layout(header):
+    """
+    Interpreta os cabeçalhos DOS/PE e a tabela de seções.
+    Retorna um dicionário com 'headers_size', 'sections' e 'resource_rva',
+    ou levanta PEFormatError. Levanta IndexError se `header` for curto demais.
+    """
+    if header[:2] != b'MZ':
+        raise PEFormatError("Missing MZ signature")
+    e_lfanew = struct.unpack_from('<I', header, 0x3C)[0]
+    if header[e_lfanew:e_lfanew + 4] != b'PE\0\0':
+        if len(header) < e_lfanew + 4:
+            raise IndexError(e_lfanew + 4)
+        raise PEFormatError("Missing PE signature")
+
+    coff = e_lfanew + 4
+    number_of_sections = struct.unpack_from('<H', header, coff + 2)[0]
+    size_of_optional_header = struct.unpack_from('<H', header, coff + 16)[0]
+    optional = coff + 20
+    magic = struct.unpack_from('<H', header, optional)[0]
+    if magic == 0x10b:
+        directories_offset = optional + 96
+    elif magic == 0x20b:
+        directories_offset = optional + 112
+    else:
+        raise PEFormatError(f"Unknown optional header magic 0x{magic:x}")
+
+    headers_size = struct.unpack_from('<I', header, optional + 60)[0]
+    number_of_directories = struct.unpack_from('<I', header, directories_offset - 4)[0]
+    if number_of_directories <= IMAGE_DIRECTORY_ENTRY_RESOURCE:
+        raise PEFormatError("No resource directory")
+    resource_rva, resource_size = struct.unpack_from('<II', header, directories_offset + 8 * IMAGE_DIRECTORY_ENTRY_RESOURCE)
+    if not resource_rva or not resource_size:
+        raise PEFormatError("No resource directory")
+
+    section_table = optional + size_of_optional_header
+    sections = []
+    for i in range(number_of_sections):
+        entry = section_table + 40 * i
+        if len(header) < entry + 40:
+            raise IndexError(entry + 40)
+        name = header[entry:entry + 8].rstrip(b'\0').decode('ascii', 'replace')
+        virtual_size, virtual_address, raw_size, raw_pointer = struct.unpack_from('<IIII', header, entry + 8)
+        sections.append({
+            'name': name, 'virtual_size': virtual_size, 'virtual_address': virtual_address,
+            'raw_size': raw_size, 'raw_pointer': raw_pointer,
+        })
+
+    return {
+        'headers_size': max(headers_size, section_table + 40 * number_of_sections),
+        'sections': sections,
+        'resource_rva': resource_rva,
+    }
+
+
+def find_resource_section(layout):
+    """Retorna a seção que contém o diretório de recursos."""
+    rva = layout['resource_rva']
+    for section in layout['sections']:
+        start = section['virtual_address']
+        if start <= rva < start + max(section['virtual_size'], section['raw_size']):
+            return section
+    raise PEFormatError("Resource directory is outside every section")
+
+
+def read_layout(remote_path, device_id=None):
+    """Lê os cabeçalhos do .exe remoto, ampliando a leitura se a tabela de seções não couber."""
+    probe = HEADER_PROBE_SIZE
+    while True:
+        header = adb_handler.read_file_range(remote_path, 0, probe, device_id)
+        try:
+            return header, parse_pe_layout(header)
+        except (IndexError, struct.error):
+            if len(header) < probe or probe >= 1024 * 1024:
+                raise PEFormatError("Truncated PE headers")
+            probe *= 4
+
+
+def fetch_icon_resources(remote_path, local_path, device_id=None, reserve=None):
+    """
+    Cria em `local_path` um arquivo esparso com os cabeçalhos e a seção de
+    recursos do .exe remoto nos mesmos offsets do original. O resto do arquivo
+    fica vazio, o que basta para as bibliotecas de extração de ícones.
+    `reserve(n)` é chamado antes da transferência com o total de bytes a gravar.
+    Retorna o número de bytes transferidos.
+    """
+    header, layout = read_layout(remote_path, device_id)
+    section = find_resource_section(layout)
+    if section['raw_size'] > MAX_RESOURCE_SIZE:
+        raise PEFormatError(f"Resource section too large ({section['raw_size']} bytes)")
+    if reserve:
+        reserve(layout['headers_size'] + section['raw_size'])
+
+    headers = header[:layout['headers_size']]
+    if len(headers) < layout['headers_size']:
+        headers = adb_handler.read_file_range(remote_path, 0, layout['headers_size'], device_id)
+    resources = adb_handler.read_file_range(remote_path, section['raw_pointer'], section['raw_size'], device_id)
+    if len(resources) < section['raw_size']:
+        raise PEFormatError("Truncated resource section")
+
+    with open(local_path, 'wb') as f:
+        f.write(headers)
+        f.seek(section['raw_pointer'])
+        f.write(resources)
+
+    print(f"[pe_range_reader] {remote_path}: fetched {len(headers) + len(resources)} bytes (.rsrc at {section['raw_pointer']})")
+    return len(headers) + len(resources)
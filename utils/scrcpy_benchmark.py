@@ -0,0 +1,219 @@
+# FILE: utils/scrcpy_benchmark.py
+# PURPOSE: Benchmark de encoders de vídeo: executa sessões curtas do scrcpy sem
+#          janela, gravando num arquivo temporário, para cada combinação de
+#          encoder × bitrate × max_size, e classifica os resultados.
+
+import os
+import time
+import tempfile
+import subprocess
+import psutil
+from utils.scrcpy_handler import ScrcpyOutputReader
+
+DEFAULT_BITRATES = (4000, 8000)
+DEFAULT_MAX_SIZES = ('0', '1280')
+DEFAULT_DURATION = 5
+
+# IDs de elementos Matroska/EBML usados na contagem de quadros
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_CLUSTER = 0x1F43B675
+_EBML_CLUSTER_TIMECODE = 0xE7
+_EBML_BLOCK_GROUP = 0xA0
+_EBML_BLOCK = 0xA1
+_EBML_SIMPLE_BLOCK = 0xA3
+_EBML_CONTAINERS = {_EBML_SEGMENT, _EBML_INFO, _EBML_CLUSTER, _EBML_BLOCK_GROUP}
+
+
+def build_matrix(video_encoders, bitrates=DEFAULT_BITRATES, max_sizes=DEFAULT_MAX_SIZES, include_software=False):
+    """
+    Monta as combinações a testar a partir do retorno de `list_encoders()`
+    ({codec: [(encoder, 'hw'|'sw'), ...]}). Encoders de software só entram se
+    pedidos ou se o dispositivo não tiver nenhum de hardware.
+    """
+    encoders = [(codec, encoder, mode) for codec, entries in sorted(video_encoders.items())
+                for encoder, mode in entries]
+    if not include_software and any(mode == 'hw' for _, _, mode in encoders):
+        encoders = [entry for entry in encoders if entry[2] == 'hw']
+    return [
+        {'codec': codec, 'encoder': encoder, 'mode': mode, 'bitrate': bitrate, 'max_size': str(max_size)}
+        for codec, encoder, mode in encoders
+        for bitrate in bitrates
+        for max_size in max_sizes
+    ]
+
+
+def _read_vint(buf, pos, keep_marker=False):
+    """Lê um inteiro de tamanho variável EBML. Retorna (valor, tamanho, desconhecido)."""
+    first = buf[pos]
+    if not first:
+        raise ValueError("Invalid EBML variable-length integer")
+    length = 9 - first.bit_length()
+    value = first if keep_marker else first & ((1 << (8 - length)) - 1)
+    for byte in buf[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def count_mkv_frames(path):
+    """
+    Conta os quadros de vídeo de um .mkv gravado pelo scrcpy e retorna
+    (quadros, duração_em_segundos) entre o primeiro e o último quadro.
+    """
+    with open(path, 'rb') as f:
+        buf = f.read()
+
+    timecode_scale = 1000000 # ns por unidade (padrão do Matroska)
+    frames, first_ts, last_ts = 0, None, None
+    cluster_ts = 0
+    stack = [len(buf)]
+    pos = 0
+    while pos < len(buf):
+        while pos >= stack[-1] and len(stack) > 1:
+            stack.pop()
+        try:
+            element_id, id_len, _ = _read_vint(buf, pos, keep_marker=True)
+            size, size_len, unknown = _read_vint(buf, pos + id_len)
+        except (ValueError, IndexError):
+            break
+        data = pos + id_len + size_len
+        end = stack[-1] if unknown else min(data + size, stack[-1])
+
+        if element_id in _EBML_CONTAINERS:
+            stack.append(end)
+            pos = data
+            continue
+        if element_id == _EBML_TIMECODE_SCALE:
+            timecode_scale = int.from_bytes(buf[data:end], 'big') or timecode_scale
+        elif element_id == _EBML_CLUSTER_TIMECODE:
+            cluster_ts = int.from_bytes(buf[data:end], 'big')
+        elif element_id in (_EBML_SIMPLE_BLOCK, _EBML_BLOCK) and end - data >= 4:
+            _, track_len, _ = _read_vint(buf, data)
+            relative = int.from_bytes(buf[data + track_len:data + track_len + 2], 'big', signed=True)
+            timestamp = cluster_ts + relative
+            frames += 1
+            first_ts = timestamp if first_ts is None else min(first_ts, timestamp)
+            last_ts = timestamp if last_ts is None else max(last_ts, timestamp)
+        pos = end
+
+    if not frames:
+        return 0, 0.0
+    return frames, (last_ts - first_ts) * timecode_scale / 1e9
+
+
+def run_trial(combo, device_id=None, duration=DEFAULT_DURATION, cancel_event=None):
+    """
+    Executa uma sessão sem janela com a combinação dada e mede o FPS obtido,
+    o tempo até o início da gravação e o uso de CPU do scrcpy no host.
+    """
+    result = dict(combo, fps=0.0, startup_ms=None, cpu_percent=None, frames=0, error=None)
+    fd, record_path = tempfile.mkstemp(prefix='scrcpylauncher_bench_', suffix='.mkv')
+    os.close(fd)
+
+    cmd = ['scrcpy']
+    if device_id:
+        cmd.append(f"-s={device_id}")
+    cmd += ['--no-window', '--no-audio', '--no-control',
+            f"--video-codec={combo['codec']}", f"--video-encoder={combo['encoder']}",
+            f"--video-bit-rate={combo['bitrate']}K", f"--record={record_path}", f"--time-limit={duration}"]
+    if combo['max_size'] not in ('0', ''):
+        cmd.append(f"--max-size={combo['max_size']}")
+
+    started = time.time()
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace', bufsize=1)
+        output = ScrcpyOutputReader(process, name='benchmark')
+        cpu_seconds = 0.0
+        try:
+            proc = psutil.Process(process.pid)
+        except psutil.Error:
+            proc = None
+        deadline = started + duration + 20
+        while process.poll() is None:
+            if (cancel_event and cancel_event.is_set()) or time.time() > deadline:
+                process.kill()
+                process.wait()
+                result['error'] = 'cancelled' if cancel_event and cancel_event.is_set() else 'timeout'
+                return result
+            if proc:
+                try:
+                    times = proc.cpu_times()
+                    cpu_seconds = times.user + times.system
+                except psutil.Error:
+                    pass
+            time.sleep(0.25)
+        wall = time.time() - started
+        output.wait_for('exited', timeout=5)
+
+        recording = output.latest('recording_started')
+        if recording:
+            result['startup_ms'] = int((recording['time'] - started) * 1000)
+        result['cpu_percent'] = round(100 * cpu_seconds / wall, 1) if wall else None
+
+        error = output.latest('error')
+        frames, seconds = count_mkv_frames(record_path) if os.path.getsize(record_path) else (0, 0.0)
+        result['frames'] = frames
+        if frames > 1 and seconds > 0:
+            result['fps'] = round((frames - 1) / seconds, 1)
+        elif error:
+            result['error'] = error.get('message') or 'scrcpy error'
+        else:
+            result['error'] = f"no frames recorded (exit code {process.returncode})"
+    except (OSError, ValueError) as e:
+        result['error'] = str(e)
+    finally:
+        try:
+            os.remove(record_path)
+        except OSError:
+            pass
+    return result
+
+
+def rank_results(results):
+    """Ordena do melhor para o pior: maior FPS, depois menor tempo de início e menor CPU."""
+    def key(result):
+        failed = bool(result.get('error')) or not result.get('fps')
+        startup = result['startup_ms'] if result.get('startup_ms') is not None else float('inf')
+        cpu = result['cpu_percent'] if result.get('cpu_percent') is not None else float('inf')
+        return (failed, -round(result.get('fps') or 0), startup, cpu)
+    return sorted(results, key=key)
+
+
+def run_benchmark(combos, device_id=None, duration=DEFAULT_DURATION, on_progress=None, cancel_event=None):
+    """
+    Executa todas as combinações em sequência (o encoder do dispositivo é um
+    recurso único) e retorna os resultados classificados.
+    `on_progress(concluídos, total, resultado)` é chamado após cada sessão.
+    """
+    results = []
+    for i, combo in enumerate(combos):
+        if cancel_event and cancel_event.is_set():
+            break
+        result = run_trial(combo, device_id, duration, cancel_event)
+        if result.get('error') != 'cancelled':
+            results.append(result)
+        print(f"[scrcpy_benchmark] {combo['encoder']} {combo['bitrate']}K max_size={combo['max_size']}: "
+              f"{result['fps']} fps, startup={result['startup_ms']}ms, cpu={result['cpu_percent']}% {result['error'] or ''}")
+        if on_progress:
+            on_progress(i + 1, len(combos), result)
+    return rank_results(results)
+
+
+def best_result(results):
+    """Retorna o primeiro resultado bem-sucedido da tabela classificada, ou None."""
+    for result in results or []:
+        if not result.get('error') and result.get('fps'):
+            return result
+    return None
+
+
+def config_values_for(result):
+    """Converte um resultado nos valores das variáveis da aba Config."""
+    return {
+        'video_codec': f"{result['mode'].upper()} - {result['codec']}",
+        'video_encoder': f"{result['encoder']} ({result['mode']})",
+        'video_bitrate_slider': int(result['bitrate']),
+        'max_size': str(result['max_size']),
+    }
@@ -7,54 +7,345 @@ import psutil
 import os
 import json
 import re
+import time
+import select
 import threading
+import heapq
+import itertools
+import contextlib
+from collections import deque
+from concurrent.futures import Future
+from utils.fps_telemetry import FpsTelemetry, target_fps_from_config
+from utils.scrcpy_settings import ScrcpySettings
 
-# Lista global para armazenar as sessões Scrcpy ativas
-active_scrcpy_sessions = []
+try:
+    import fcntl
+except ImportError: # Windows: o diário é gravado sem trava entre processos
+    fcntl = None
 
-def add_scrcpy_session(pid, app_name, icon_path, command_args, session_type='app'):
-    active_scrcpy_sessions.append({'pid': pid, 'app_name': app_name, 'icon_path': icon_path, 'command_args': command_args, 'session_type': session_type})
+# Registro das sessões Scrcpy ativas, indexado por PID. Sessões iniciadas por este
+# processo guardam o Popen ('process'); as demais ("adotadas") são verificadas via psutil.
+_sessions = {}
+_sessions_lock = threading.RLock()
+_session_listeners = []
+_watcher = None
+_journal_path = None
+
+# Campos de uma sessão gravados no diário em disco (o resto só existe em memória).
+_JOURNAL_FIELDS = ('pid', 'create_time', 'app_name', 'icon_path', 'command_args', 'session_type', 'device_id')
+
+# Sessões internas (displays pré-aquecidos ainda não usados): ficam fora do diário e das
+# listagens até serem entregues a um jogo (quando o tipo muda para 'winlator').
+_BACKGROUND_SESSION_TYPES = ('warm_display',)
+
+def add_scrcpy_session(pid, app_name, icon_path, command_args, session_type='app', process=None, device_id=None, create_time=None):
+    session = {'pid': pid, 'app_name': app_name, 'icon_path': icon_path, 'command_args': command_args,
+               'session_type': session_type, 'device_id': device_id}
+    if create_time is None:
+        try:
+            create_time = psutil.Process(pid).create_time()
+        except psutil.Error:
+            pass
+    if create_time is not None:
+        session['create_time'] = create_time
+    if process is not None:
+        session['process'] = process
+    with _sessions_lock:
+        _sessions[pid] = session
+        _write_journal()
     print(f"[scrcpy_handler] Added session: PID={pid}, AppName={app_name}, Type={session_type}")
+    _get_watcher().wake()
+    return session
 
 def remove_scrcpy_session(pid):
-    global active_scrcpy_sessions
-    initial_len = len(active_scrcpy_sessions)
-    active_scrcpy_sessions = [s for s in active_scrcpy_sessions if s['pid'] != pid]
-    if len(active_scrcpy_sessions) < initial_len:
+    with _sessions_lock:
+        session = _sessions.pop(pid, None)
+        if session:
+            _write_journal(removed=(pid,))
+    if session:
+        _close_pidfd(session)
         print(f"[scrcpy_handler] Removed session: PID={pid}")
+    return session
+
+@contextlib.contextmanager
+def _journal_lock():
+    """Trava o diário entre processos (launcher e cli.py) durante a leitura e a regravação."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{_journal_path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield # Fechar o arquivo libera a trava
+
+def _read_journal():
+    try:
+        with open(_journal_path, 'r') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [entry for entry in entries if isinstance(entry, dict)] if isinstance(entries, list) else []
+
+def _merge_journal(removed=()):
+    """
+    Adota as sessões vivas gravadas no diário por outro processo (ou por uma
+    execução anterior) que ainda não estão no registro. Chamado com _sessions_lock.
+    """
+    adopted = 0
+    for entry in _read_journal():
+        pid = entry.get('pid')
+        if entry.get('session_type') in _BACKGROUND_SESSION_TYPES:
+            continue # Gravadas por versões antigas; um display aquecido só serve ao processo que o criou
+        if pid in _sessions or pid in removed or not _is_journal_entry_alive(entry):
+            continue
+        _sessions[pid] = {field: entry.get(field) for field in _JOURNAL_FIELDS}
+        adopted += 1
+    return adopted
+
+def _write_journal(removed=()):
+    """
+    Grava as sessões ativas no diário (chamado com _sessions_lock adquirido). O
+    diário em disco é lido e mesclado antes, sob a trava, para não apagar sessões
+    gravadas por outro processo; `removed` são os PIDs que este processo acabou de remover.
+    """
+    if not _journal_path:
+        return 0
+    with _journal_lock():
+        adopted = _merge_journal(removed)
+        entries = [{field: session.get(field) for field in _JOURNAL_FIELDS} for session in _sessions.values()
+                   if session.get('session_type') not in _BACKGROUND_SESSION_TYPES]
+        tmp_path = f"{_journal_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, _journal_path)
+        except OSError as e:
+            print(f"[scrcpy_handler] Could not write session journal: {e}")
+    return adopted
+
+def _is_journal_entry_alive(entry):
+    """Confere se o PID ainda é o mesmo scrcpy gravado (mesmo horário de início)."""
+    try:
+        proc = psutil.Process(entry['pid'])
+        if entry.get('create_time') is None or abs(proc.create_time() - entry['create_time']) > 1:
+            return False
+        if proc.status() == psutil.STATUS_ZOMBIE:
+            return False
+        name = proc.name().lower()
+        cmdline = proc.cmdline()
+        return 'scrcpy' in name or bool(cmdline and 'scrcpy' in os.path.basename(cmdline[0]).lower())
+    except (psutil.Error, KeyError, TypeError):
+        return False
+
+def init_session_journal(path):
+    """
+    Define o arquivo do diário de sessões e adota as sessões gravadas nele (por
+    uma execução anterior do launcher ou pelo cli.py) que ainda estão rodando.
+    Entradas de processos que já terminaram são descartadas.
+    """
+    global _journal_path
+    with _sessions_lock:
+        _journal_path = path
+        adopted = _write_journal()
+    if adopted:
+        print(f"[scrcpy_handler] Re-adopted {adopted} running session(s) from the journal")
+        _get_watcher().wake()
+    return adopted
+
+def refresh_session_journal():
+    """Adota as sessões que outro processo (ex.: cli.py) gravou no diário desde a última leitura."""
+    if not _journal_path:
+        return 0
+    with _sessions_lock:
+        adopted = _merge_journal()
+    if adopted:
+        print(f"[scrcpy_handler] Adopted {adopted} session(s) started by another process")
+        _get_watcher().wake()
+    return adopted
+
+def update_scrcpy_session(pid, **fields):
+    """Atualiza campos de uma sessão registrada (ex.: nome e tipo de um display pré-aquecido ao ser usado)."""
+    with _sessions_lock:
+        session = _sessions.get(pid)
+        if session:
+            session.update(fields)
+            _write_journal()
+    return session
+
+def add_session_listener(callback):
+    """Registra `callback(event)` para eventos {'event': 'exited', 'pid', 'returncode', 'session'}.
+    O callback é chamado na thread do observador."""
+    with _sessions_lock:
+        _session_listeners.append(callback)
+
+def remove_session_listener(callback):
+    with _sessions_lock:
+        if callback in _session_listeners:
+            _session_listeners.remove(callback)
+
+def _is_adopted_session_alive(session):
+    try:
+        proc = psutil.Process(session['pid'])
+        if session.get('create_time') is not None and abs(proc.create_time() - session['create_time']) > 1:
+            return False # PID reutilizado por outro processo
+        if proc.status() == psutil.STATUS_ZOMBIE:
+            # Após um restart (os.execl) o scrcpy continua filho deste processo, mas sem Popen: colhe o zumbi.
+            if proc.ppid() == os.getpid() and hasattr(os, 'waitpid'):
+                try:
+                    os.waitpid(session['pid'], os.WNOHANG)
+                except (ChildProcessError, OSError):
+                    pass
+            return False
+        return proc.is_running()
+    except psutil.Error:
+        return False
+
+def _session_returncode(session):
+    """Retorna None se a sessão ainda estiver viva, senão o código de saída (ou -1 se desconhecido)."""
+    process = session.get('process')
+    if process is not None:
+        return process.poll()
+    return None if _is_adopted_session_alive(session) else -1
+
+def _close_pidfd(session):
+    fd = session.pop('pidfd', None)
+    if fd is not None:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+def _reap_exited_sessions(check_adopted=True):
+    exited = []
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    for session in sessions:
+        if 'process' not in session and not check_adopted:
+            continue
+        returncode = _session_returncode(session)
+        if returncode is not None and remove_scrcpy_session(session['pid']):
+            exited.append((session, returncode))
+    if exited:
+        with _sessions_lock:
+            listeners = list(_session_listeners)
+        for session, returncode in exited:
+            event = {'event': 'exited', 'pid': session['pid'], 'returncode': returncode, 'session': session}
+            for listener in listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"[scrcpy_handler] Session listener error: {e}")
+    return exited
+
+
+class _SessionWatcher:
+    """
+    Uma única thread que detecta a saída das sessões. No Linux espera em pidfds
+    (acorda assim que um scrcpy termina); nos demais sistemas faz poll() a cada segundo.
+    Sessões adotadas são verificadas via psutil com menos frequência.
+    """
+    POLL_INTERVAL = 1.0
+    ADOPTED_INTERVAL = 5.0
+
+    def __init__(self):
+        # No Windows o select() não aceita pipes; lá a espera é feita com um Event.
+        self._use_select = os.name != 'nt'
+        self._wake_event = threading.Event()
+        if self._use_select:
+            self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="scrcpy-session-watcher", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        if not self._use_select:
+            self._wake_event.set()
+            return
+        try:
+            os.write(self._wake_w, b'x')
+        except OSError:
+            pass
+
+    def _wait(self):
+        if not self._use_select:
+            self._wake_event.wait(self.POLL_INTERVAL)
+            self._wake_event.clear()
+            return
+        fds = self._pidfds()
+        try:
+            ready, _, _ = select.select([self._wake_r] + fds, [], [], self.POLL_INTERVAL)
+        except (OSError, ValueError):
+            # Um pidfd foi fechado durante a espera; recomeça com a lista atual.
+            time.sleep(0.05)
+            return
+        if self._wake_r in ready:
+            os.read(self._wake_r, 1024)
+
+    def _pidfds(self):
+        fds = []
+        if not hasattr(os, 'pidfd_open'):
+            return fds
+        with _sessions_lock:
+            for session in _sessions.values():
+                if 'process' not in session:
+                    continue
+                if 'pidfd' not in session:
+                    try:
+                        session['pidfd'] = os.pidfd_open(session['pid'])
+                    except OSError:
+                        session['pidfd'] = None
+                if session['pidfd'] is not None:
+                    fds.append(session['pidfd'])
+        return fds
+
+    def _run(self):
+        last_adopted_check = 0
+        while True:
+            self._wait()
+            now = time.monotonic()
+            check_adopted = now - last_adopted_check >= self.ADOPTED_INTERVAL
+            if check_adopted:
+                last_adopted_check = now
+            _reap_exited_sessions(check_adopted)
+
+
+def _get_watcher():
+    global _watcher
+    with _sessions_lock:
+        if _watcher is None:
+            _watcher = _SessionWatcher()
+        return _watcher
 
 def get_active_scrcpy_sessions():
-    print(f"[scrcpy_handler] Checking active sessions. Current count: {len(active_scrcpy_sessions)}")
-    current_pids = {p.pid for p in psutil.process_iter(['pid', 'name', 'cmdline'])} # Otimização: obter PIDs uma vez
-    print(f"[scrcpy_handler] Current PIDs found: {len(current_pids)}")
-    valid_sessions = []
-    for session in active_scrcpy_sessions:
-        print(f"[scrcpy_handler] Processing session PID: {session['pid']}")
-        if session['pid'] in current_pids:
-            try:
-                proc = psutil.Process(session['pid'])
-                proc_name = proc.name().lower()
-                proc_cmdline = " ".join(proc.cmdline())
-                print(f"[scrcpy_handler] PID {session['pid']} - Name: {proc_name}, Cmdline: {proc_cmdline}")
-                if proc.is_running() and ('scrcpy' in proc_name or 'scrcpy' in proc_cmdline):
-                    valid_sessions.append(session)
-                else:
-                    print(f"[scrcpy_handler] Invalid session (not scrcpy or not running): PID={session['pid']}, Name={proc_name}, Cmdline={proc_cmdline}")
-            except psutil.NoSuchProcess:
-                print(f"[scrcpy_handler] Invalid session (no such process): PID={session['pid']}")
-        else:
-            print(f"[scrcpy_handler] Invalid session (PID not in current processes): PID={session['pid']}")
-    active_scrcpy_sessions[:] = valid_sessions # Atualiza a lista global
-    print(f"[scrcpy_handler] Valid sessions after check: {len(active_scrcpy_sessions)}")
-    return active_scrcpy_sessions
+    """
+    Retorna as sessões ativas (sem as internas do pool de displays), incluindo as
+    iniciadas por outro processo desde a última chamada. Não varre a tabela de processos: relê só o diário e usa poll()
+    nas sessões próprias.
+    """
+    refresh_session_journal()
+    _reap_exited_sessions()
+    with _sessions_lock:
+        return [session for session in _sessions.values() if session.get('session_type') not in _BACKGROUND_SESSION_TYPES]
 
 def kill_scrcpy_session(pid):
+    with _sessions_lock:
+        session = _sessions.get(pid)
+    process = session.get('process') if session else None
     try:
-        process = psutil.Process(pid)
-        process.terminate()
-        process.wait(timeout=5) # Espera o processo terminar
-        if process.is_running():
-            process.kill() # Força o encerramento se não terminar
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=5) # Espera o processo terminar
+            except subprocess.TimeoutExpired:
+                process.kill() # Força o encerramento se não terminar
+                process.wait()
+        else:
+            proc = psutil.Process(pid)
+            if session and not _is_adopted_session_alive(session):
+                raise psutil.NoSuchProcess(pid) # PID já pertence a outro processo
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except psutil.TimeoutExpired:
+                proc.kill()
         remove_scrcpy_session(pid)
         return True
     except psutil.NoSuchProcess:
@@ -63,25 +354,288 @@ def kill_scrcpy_session(pid):
     except Exception as e:
         return False
 
+class ScrcpyOutputReader:
+    """
+    Drena continuamente a saída de um processo scrcpy (stdout + stderr) numa thread,
+    para que o pipe nunca encha, e converte as linhas em eventos tipados:
+      'server_started', 'display_created' (display_id, size), 'encoder' (name), 'fps' (fps, skipped),
+      'video_started' (size), 'recording_started', 'disconnected', 'error' (message) e, no fim, 'exited' (returncode).
+    Mantém as últimas linhas num buffer circular e permite esperar por um evento.
+    """
+    RING_SIZE = 200
+
+    _PATTERNS = (
+        ('server_started', re.compile(r"\[server\] INFO: Device:")),
+        ('display_created', re.compile(r"New display:?\s*(?P<size>[\w/]+)?.*?\bid=(?P<display_id>\d+)")),
+        ('fps', re.compile(r"\b(?P<fps>\d+) fps(?: \(\+(?P<skipped>\d+) frames? skipped\))?")),
+        ('encoder', re.compile(r"[Ee]ncoder:?\s+'?(?P<name>[\w.\-]+)'?\s*$")),
+        ('video_started', re.compile(r"Texture:\s*(?P<size>\d+x\d+)")),
+        ('recording_started', re.compile(r"Recording started")),
+        ('disconnected', re.compile(r"Device disconnected")),
+        ('error', re.compile(r"\bERROR:\s*(?P<message>.*)")),
+    )
+
+    def __init__(self, process, name='scrcpy'):
+        self.process = process
+        self.name = name
+        self.lines = deque(maxlen=self.RING_SIZE)
+        self._latest = {}
+        self._listeners = []
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"scrcpy-output-{process.pid}", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def parse_line(cls, line):
+        """Retorna o evento correspondente a uma linha de log, ou None."""
+        for event_type, pattern in cls._PATTERNS:
+            match = pattern.search(line)
+            if not match:
+                continue
+            event = {'event': event_type}
+            for field, value in match.groupdict().items():
+                if value is not None:
+                    event[field] = int(value) if field in ('fps', 'skipped') else value.strip()
+            if event_type == 'fps':
+                event.setdefault('skipped', 0)
+            return event
+        return None
+
+    def add_listener(self, callback):
+        """Registra `callback(event)`, chamado na thread de leitura."""
+        with self._cond:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._cond:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def recent_lines(self):
+        with self._cond:
+            return list(self.lines)
+
+    def latest(self, event_type):
+        with self._cond:
+            return self._latest.get(event_type)
+
+    def wait_for(self, event_type, timeout=None):
+        """
+        Espera por um evento do tipo `event_type` (retorna na hora se ele já ocorreu).
+        Retorna o evento, ou None se o tempo acabar ou o scrcpy terminar antes.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: event_type in self._latest or 'exited' in self._latest, timeout)
+            return self._latest.get(event_type)
+
+    def _emit(self, event):
+        event['time'] = time.time()
+        with self._cond:
+            self._latest[event['event']] = event
+            listeners = list(self._listeners)
+            self._cond.notify_all()
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"[scrcpy_handler] Output listener error: {e}")
+
+    def _run(self):
+        try:
+            for line in self.process.stdout:
+                line = line.rstrip()
+                if not line:
+                    continue
+                print(f"[{self.name}] {line}")
+                with self._cond:
+                    self.lines.append(line)
+                event = self.parse_line(line)
+                if event:
+                    event['line'] = line
+                    self._emit(event)
+        except (OSError, ValueError):
+            pass
+        self._emit({'event': 'exited', 'returncode': self.process.wait()})
+
+
+def get_session_telemetry(pid):
+    """Retorna o FpsTelemetry de uma sessão iniciada com 'fps_telemetry', ou None."""
+    with _sessions_lock:
+        session = _sessions.get(pid)
+    return session.get('telemetry') if session else None
+
+def export_sessions_telemetry(file_path, pids=None):
+    """Grava em JSON a telemetria de FPS das sessões ativas (ou só das `pids`). Retorna quantas foram exportadas."""
+    with _sessions_lock:
+        sessions = [s for s in _sessions.values() if s.get('telemetry') and (pids is None or s['pid'] in pids)]
+    data = [{
+        'pid': session['pid'],
+        'app_name': session['app_name'],
+        'device_id': session.get('device_id'),
+        'command_args': session['command_args'],
+        **session['telemetry'].to_dict(),
+    } for session in sessions]
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    return len(data)
+
+def get_session_output(pid):
+    """Retorna o ScrcpyOutputReader de uma sessão iniciada com capture_output, ou None."""
+    with _sessions_lock:
+        session = _sessions.get(pid)
+    return session.get('output') if session else None
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class LaunchScheduler:
+    """
+    Fila de lançamentos com prioridade e limite de lançamentos simultâneos por
+    dispositivo: um lançamento ocupa a vaga do dispositivo do spawn até o scrcpy
+    mostrar o primeiro quadro (ou terminar, ou SLOT_TIMEOUT), evitando que vários
+    servidores sejam enviados e disputem o encoder ao mesmo tempo.
+    Pedidos repetidos para o mesmo (dispositivo, app) enquanto o primeiro ainda
+    está na fila ou iniciando recebem o mesmo Future (single-flight).
+    """
+    SLOT_TIMEOUT = 10
+
+    def __init__(self, max_per_device=1):
+        self.max_per_device = max_per_device
+        self._cond = threading.Condition()
+        self._queue = [] # heap de (prioridade, seq, voo, launch, future)
+        self._seq = itertools.count()
+        self._inflight = {} # (dispositivo, app) -> Future
+        self._running = {} # dispositivo -> lançamentos iniciando
+        self._listeners = []
+        self._thread = threading.Thread(target=self._dispatch, name="scrcpy-launch-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, app_key, launch, device_id=None, priority=PRIORITY_INTERACTIVE):
+        """
+        Enfileira `launch()` (que deve retornar o Popen do scrcpy) e retorna um
+        Future com o processo. Prioridades menores saem primeiro.
+        """
+        flight = (device_id or 'default', app_key)
+        with self._cond:
+            future = self._inflight.get(flight)
+            if future is not None:
+                print(f"[scrcpy_handler] Launch of {app_key} already in progress, ignoring duplicate")
+                return future
+            future = Future()
+            self._inflight[flight] = future
+            heapq.heappush(self._queue, (priority, next(self._seq), flight, launch, future))
+            self._cond.notify_all()
+        self._notify()
+        return future
+
+    def is_in_flight(self, app_key, device_id=None):
+        with self._cond:
+            return (device_id or 'default', app_key) in self._inflight
+
+    def queue_depth(self):
+        """Retorna {dispositivo: {'queued': n, 'running': n}}."""
+        with self._cond:
+            depth = {}
+            for _, _, (device, _), _, _ in self._queue:
+                depth.setdefault(device, {'queued': 0, 'running': 0})['queued'] += 1
+            for device, running in self._running.items():
+                if running:
+                    depth.setdefault(device, {'queued': 0, 'running': 0})['running'] = running
+            return depth
+
+    def add_listener(self, callback):
+        """Registra `callback(queue_depth)`, chamado de threads do agendador a cada mudança."""
+        with self._cond:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._cond:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self):
+        depth = self.queue_depth()
+        with self._cond:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(depth)
+            except Exception as e:
+                print(f"[scrcpy_handler] Queue listener error: {e}")
+
+    def _next_job(self):
+        """Remove e retorna o lançamento de maior prioridade cujo dispositivo tem vaga (com o lock adquirido)."""
+        for job in sorted(self._queue):
+            device = job[2][0]
+            if self._running.get(device, 0) < self.max_per_device:
+                self._queue.remove(job)
+                heapq.heapify(self._queue)
+                self._running[device] = self._running.get(device, 0) + 1
+                return job
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+            self._notify()
+            _, _, flight, launch, future = job
+            threading.Thread(target=self._run, args=(flight, launch, future), name="scrcpy-launch", daemon=True).start()
+
+    def _run(self, flight, launch, future):
+        process = None
+        try:
+            try:
+                process = launch()
+            except Exception as e:
+                future.set_exception(e)
+                return
+            future.set_result(process)
+            output = get_session_output(process.pid) if process is not None else None
+            if output:
+                output.wait_for('video_started', timeout=self.SLOT_TIMEOUT)
+        finally:
+            with self._cond:
+                self._running[flight[0]] -= 1
+                self._inflight.pop(flight, None)
+                self._cond.notify_all()
+            self._notify()
+
+
+_launch_scheduler = None
+
+def get_launch_scheduler():
+    global _launch_scheduler
+    with _sessions_lock:
+        if _launch_scheduler is None:
+            _launch_scheduler = LaunchScheduler()
+        return _launch_scheduler
+
 def _build_command(config_values, window_title=None, device_id=None):
-    """Constrói a lista de argumentos para o comando scrcpy."""
+    """Constrói a lista de argumentos para o comando scrcpy (aceita ScrcpySettings ou um dicionário)."""
+    settings = ScrcpySettings.from_mapping(config_values)
     cmd = ['scrcpy']
     if device_id:
         cmd.append(f"-s={device_id}")
 
-    title = window_title or config_values.get('start_app_name') or 'Android Device'
+    title = window_title or settings.start_app_name or 'Android Device'
     if title and title != 'None':
         cmd.append(f"--window-title={title}")
 
     # --- LÓGICA DO ÍCONE REMOVIDA DAQUI ---
     # O ícone agora é tratado por uma variável de ambiente
 
-    if config_values.get('turn_screen_off'): cmd.append('--turn-screen-off')
-    if config_values.get('fullscreen'): cmd.append('--fullscreen')
-    if config_values.get('mipmaps'): cmd.append('--no-mipmaps')
-    if config_values.get('stay_awake'): cmd.append('--stay-awake')
-    if config_values.get('no_audio'): cmd.append('--no-audio')
-    if config_values.get('no_video'): cmd.append('--no-video')
+    if settings.turn_screen_off: cmd.append('--turn-screen-off')
+    if settings.fullscreen: cmd.append('--fullscreen')
+    if settings.mipmaps: cmd.append('--no-mipmaps')
+    if settings.stay_awake: cmd.append('--stay-awake')
+    if settings.no_audio: cmd.append('--no-audio')
+    if settings.no_video: cmd.append('--no-video')
+    if settings.fps_telemetry: cmd.append('--print-fps')
 
     map_args = {
         'start_app': '--start-app',
@@ -96,49 +650,55 @@ def _build_command(config_values, window_title=None, device_id=None):
         'video_buffer': '--video-buffer',
     }
     for key, arg_name in map_args.items():
-        val = config_values.get(key)
+        val = getattr(settings, key)
         if val and str(val) not in ('Auto', 'None', '0', 'disabled', ''):
             suffix = 'K' if key == 'video_bitrate_slider' else ''
             cmd.append(f"{arg_name}={val}{suffix}")
 
-    if config_values.get('video_codec') != 'Auto':
-        codec_val = config_values.get('video_codec')
-        encoder_val = config_values.get('video_encoder')
+    if settings.video_codec != 'Auto':
+        codec_val = settings.video_codec
+        encoder_val = settings.video_encoder
         if codec_val and encoder_val and encoder_val != 'Auto':
             codec = codec_val.split(' - ')[-1]
             encoder = encoder_val.split()[0]
             cmd.append(f"--video-codec={codec}")
             cmd.append(f"--video-encoder={encoder}")
 
-    if config_values.get('audio_codec') != 'Auto':
-        codec_val = config_values.get('audio_codec')
-        encoder_val = config_values.get('audio_encoder')
+    if settings.audio_codec != 'Auto':
+        codec_val = settings.audio_codec
+        encoder_val = settings.audio_encoder
         if codec_val and encoder_val and encoder_val != 'Auto':
             codec = codec_val.split(' - ')[-1]
             encoder = encoder_val.split()[0]
             cmd.append(f"--audio-codec={codec}")
             cmd.append(f"--audio-encoder={encoder}")
 
-    new_display_val = config_values.get('new_display')
+    new_display_val = settings.new_display
     if new_display_val and new_display_val != 'Disabled':
         cmd.append(f"--new-display={new_display_val}")
     else:
-        max_size_val = config_values.get('max_size')
+        max_size_val = settings.max_size
         if max_size_val and max_size_val != '0':
             cmd.append(f"--max-size={max_size_val}")
 
-    extra = config_values.get('extraargs', '').strip()
+    extra = (settings.extraargs or '').strip()
     if extra:
         cmd.extend(shlex.split(extra))
 
     return cmd
 
+def command_signature(config_values, device_id=None):
+    """Argumentos do scrcpy que uma configuração produz, sem o título da janela.
+    Duas configurações com a mesma assinatura podem compartilhar uma sessão."""
+    return tuple(arg for arg in _build_command(config_values, device_id=device_id) if not arg.startswith('--window-title='))
+
 def launch_scrcpy(config_values, capture_output=False, window_title=None, device_id=None, icon_path=None, session_type='app'):
     """
     Inicia o scrcpy com base na configuração fornecida, definindo o ícone
     através de uma variável de ambiente.
     """
-    cmd = _build_command(config_values, window_title, device_id)
+    settings = ScrcpySettings.from_mapping(config_values)
+    cmd = _build_command(settings, window_title, device_id)
     print('Executing Scrcpy Command:', ' '.join(cmd))
 
     # --- LÓGICA CORRIGIDA PARA O ÍCONE ---
@@ -158,20 +718,46 @@ def launch_scrcpy(config_values, capture_output=False, window_title=None, device
         startupinfo = subprocess.STARTUPINFO()
         startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
 
+    fps_telemetry = bool(settings.fps_telemetry)
+    # A telemetria precisa ler os relatórios de FPS do stdout.
+    capture_output = capture_output or fps_telemetry
     if capture_output:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, startupinfo=startupinfo, env=env)
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace',
+                                   bufsize=1, startupinfo=startupinfo, env=env)
     else:
         process = subprocess.Popen(cmd, startupinfo=startupinfo, env=env)
 
     # Adiciona a sessão à lista de sessões ativas
-    app_name = window_title or config_values.get('start_app_name') or 'Unknown App'
-    add_scrcpy_session(process.pid, app_name, icon_path, cmd, session_type)
+    app_name = window_title or settings.start_app_name or 'Unknown App'
+    session = add_scrcpy_session(process.pid, app_name, icon_path, cmd, session_type, process=process, device_id=device_id)
+    if capture_output:
+        # O leitor drena o pipe durante toda a sessão; use get_session_output(pid) para esperar eventos.
+        output = ScrcpyOutputReader(process)
+        if fps_telemetry:
+            session['telemetry'] = FpsTelemetry(target_fps_from_config(settings))
+            output.add_listener(session['telemetry'].on_event)
+        session['output'] = output
 
     return process
 
-def list_installed_apps():
+def _list_command(flag, device_id=None):
+    cmd = ["scrcpy", flag]
+    if device_id and device_id != 'no_device':
+        cmd.insert(1, f"-s={device_id}")
+    return cmd
+
+def get_scrcpy_version():
+    """Retorna a primeira linha de 'scrcpy --version' (ex.: 'scrcpy 3.1 <...>'), ou None."""
+    try:
+        output = subprocess.check_output(["scrcpy", "--version"], text=True, stderr=subprocess.DEVNULL, timeout=10)
+    except (subprocess.SubprocessError, OSError):
+        return None
+    lines = output.strip().splitlines()
+    return lines[0].strip() if lines else None
+
+def list_installed_apps(device_id=None):
     try:
-        output = subprocess.check_output(["scrcpy", "--list-apps"], text=True, stderr=subprocess.DEVNULL)
+        output = subprocess.check_output(_list_command("--list-apps", device_id), text=True, stderr=subprocess.DEVNULL)
         apps = {}
         for line in output.splitlines():
             line = line.strip()
@@ -185,11 +771,11 @@ def list_installed_apps():
     except (subprocess.CalledProcessError, FileNotFoundError) as e:
         raise RuntimeError(f"Could not list apps via scrcpy: {e}")
 
-def list_encoders():
+def list_encoders(device_id=None):
     video_encoders = {}
     audio_encoders = {}
     try:
-        output = subprocess.check_output(["scrcpy", "--list-encoders"], text=True, stderr=subprocess.DEVNULL)
+        output = subprocess.check_output(_list_command("--list-encoders", device_id), text=True, stderr=subprocess.DEVNULL)
     except (subprocess.CalledProcessError, FileNotFoundError):
         return {}, {}
     for line in output.splitlines():
@@ -0,0 +1,108 @@
+# FILE: utils/scrcpy_settings.py
+# PURPOSE: Modelo simples (sem Tkinter) das opções do scrcpy consumidas por
+#          `_build_command`/`launch_scrcpy`, e leitura da configuração salva
+#          direto dos arquivos, para automação sem a interface gráfica.
+
+import os
+import json
+import platform
+from dataclasses import dataclass, fields, asdict, replace
+from utils.config_store import ConfigStore
+from utils.config_layers import ConfigResolver
+
+
+@dataclass(slots=True)
+class ScrcpySettings:
+    """Opções do scrcpy com os mesmos nomes (e padrões) das variáveis do AppConfig."""
+    start_app: str = ''
+    start_app_name: str = 'None'
+    mouse_mode: str = 'sdk'
+    gamepad_mode: str = 'disabled'
+    keyboard_mode: str = 'sdk'
+    mouse_bind: str = '++++:bhsn'
+    render_driver: str = 'opengl'
+    max_fps: str = '60'
+    max_size: str = '0'
+    display: str = 'Auto'
+    new_display: str = 'Disabled'
+    video_codec: str = 'Auto'
+    video_encoder: str = 'Auto'
+    audio_codec: str = 'Auto'
+    audio_encoder: str = 'Auto'
+    extraargs: str = ''
+    stay_awake: bool = False
+    mipmaps: bool = False
+    turn_screen_off: bool = False
+    fullscreen: bool = False
+    no_audio: bool = False
+    no_video: bool = False
+    fps_telemetry: bool = False
+    adaptive_bitrate: bool = False
+    video_bitrate_slider: int = 3000
+    audio_buffer: int = 5
+    video_buffer: int = 0
+
+    @classmethod
+    def from_mapping(cls, values):
+        """Cria a partir de um dicionário de configuração (chaves desconhecidas são ignoradas)."""
+        if isinstance(values, cls):
+            return values
+        return cls(**{name: values[name] for name in FIELD_NAMES if name in values})
+
+    def to_dict(self):
+        return asdict(self)
+
+    def replace(self, **changes):
+        return replace(self, **changes)
+
+    # Mesma interface de leitura de um dicionário, para código que ainda recebe mapeamentos.
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
+FIELD_NAMES = tuple(field.name for field in fields(ScrcpySettings))
+DEFAULTS = {field.name: field.default for field in fields(ScrcpySettings)}
+
+
+def config_dir():
+    """Diretório de configuração do launcher (o mesmo usado pelo AppConfig)."""
+    if platform.system() == "Windows":
+        return os.path.join(os.getenv('APPDATA'), 'ScrcpyLauncher')
+    return os.path.expanduser("~/.config/scrcpy_launcher")
+
+
+def _load_json(file_path):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_config(device_id, app=None, game=None, directory=None, defaults=None):
+    """
+    Resolve a configuração salva de um dispositivo (padrões → global → dispositivo
+    → perfil do app `app` ou do jogo `game`) lendo só os arquivos, sem Tkinter.
+    Retorna a visão imutável do ConfigResolver.
+    """
+    directory = directory or config_dir()
+    device_config = _load_json(os.path.join(directory, f'config_{device_id}.json'))
+    global_config = _load_json(os.path.join(directory, 'global_config.json'))
+
+    profile = None
+    store_path = os.path.join(directory, 'config.db')
+    if app or game:
+        store = ConfigStore(store_path) if os.path.exists(store_path) else None
+        if app:
+            metadata = store.get('app_metadata', device_id, app) if store else None
+            # Config ainda não migrado para o SQLite pelo launcher
+            metadata = metadata or device_config.get('app_metadata', {}).get(app, {})
+            profile = metadata.get('config')
+        else:
+            profile = store.get('game_configs', device_id, game) if store else None
+            profile = profile or device_config.get('winlator_game_configs', {}).get(game)
+
+    resolver = ConfigResolver(defaults or DEFAULTS)
+    resolver.set_layer('global', global_config)
+    resolver.set_layer('device', device_config.get('general_config', {}))
+    return resolver.resolve(None, profile)
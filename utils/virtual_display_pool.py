@@ -0,0 +1,136 @@
+# FILE: utils/virtual_display_pool.py
+# PURPOSE: Mantém sessões scrcpy com display virtual já criado ("aquecidas"),
+#          minimizadas, para que um jogo do Winlator possa ser iniciado nelas
+#          imediatamente. Cada display usado é reposto em segundo plano.
+
+import os
+import shutil
+import atexit
+import threading
+import subprocess
+from utils import adb_handler, scrcpy_handler
+
+WARM_WINDOW_TITLE = "yaScrcpy warm display"
+DISPLAY_TIMEOUT = 30
+XDOTOOL_TIMEOUT = 10
+
+
+def is_supported():
+    """O pool depende do xdotool para minimizar e renomear a janela do scrcpy (X11)."""
+    return os.name != 'nt' and bool(os.environ.get('DISPLAY')) and shutil.which('xdotool') is not None
+
+
+def _xdotool(*args):
+    try:
+        result = subprocess.run(['xdotool', *args], capture_output=True, text=True, timeout=XDOTOOL_TIMEOUT)
+        return result.stdout.strip() if result.returncode == 0 else None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class VirtualDisplayPool:
+    """
+    No máximo uma sessão aquecida por assinatura de comando (que inclui a
+    resolução de '--new-display'). `claim` só entrega um display criado com
+    exatamente os mesmos argumentos que o jogo usaria.
+    """
+
+    def __init__(self):
+        self._warm = {}     # assinatura -> {'process', 'display_id', 'window_id'}
+        self._spawning = {} # assinatura -> processo ainda sendo preparado
+        self._configs = {}  # assinatura -> configuração usada para repor
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def fill(self, configs):
+        """Garante uma sessão aquecida para cada configuração (com display virtual) da lista."""
+        for config_values in configs:
+            if config_values.get('new_display') in (None, '', 'Disabled'):
+                continue
+            config_values = dict(config_values, start_app='', fps_telemetry=False, adaptive_bitrate=False)
+            key = scrcpy_handler.command_signature(config_values)
+            with self._lock:
+                self._configs[key] = config_values
+                if key in self._warm or key in self._spawning:
+                    continue
+                self._spawning[key] = None
+                generation = self._generation
+            threading.Thread(target=self._spawn, args=(key, config_values, generation),
+                             name="warm-display", daemon=True).start()
+
+    def claim(self, config_values, window_title):
+        """
+        Entrega uma sessão aquecida compatível, renomeada e restaurada, e começa
+        a repor o pool. Retorna (processo, display_id) ou None.
+        """
+        config_values = dict(config_values, start_app='', fps_telemetry=False, adaptive_bitrate=False)
+        key = scrcpy_handler.command_signature(config_values)
+        with self._lock:
+            warm = self._warm.pop(key, None)
+        if not warm or warm['process'].poll() is not None:
+            return None
+
+        pid = warm['process'].pid
+        if warm['window_id']:
+            _xdotool('set_window', '--name', window_title, warm['window_id'])
+            _xdotool('windowactivate', warm['window_id'])
+        scrcpy_handler.update_scrcpy_session(pid, app_name=window_title, session_type='winlator')
+        print(f"[display_pool] Claimed warm display {warm['display_id']} (PID={pid}) for {window_title}")
+        self.fill([self._configs.get(key, config_values)])
+        return warm['process'], warm['display_id']
+
+    def drain(self):
+        """Encerra as sessões aquecidas ainda não usadas (ex.: troca de dispositivo ou pool desligado)."""
+        with self._lock:
+            self._generation += 1
+            processes = [warm['process'] for warm in self._warm.values()]
+            processes += [process for process in self._spawning.values() if process]
+            self._warm.clear()
+            self._spawning.clear()
+            self._configs.clear()
+        for process in processes:
+            scrcpy_handler.kill_scrcpy_session(process.pid)
+
+    def _spawn(self, key, config_values, generation):
+        process = None
+        try:
+            # Passa pela fila de lançamentos com prioridade baixa: lançamentos pedidos pelo usuário vêm antes.
+            process = scrcpy_handler.get_launch_scheduler().submit(
+                ('warm_display', key),
+                lambda: scrcpy_handler.launch_scrcpy(config_values, capture_output=True,
+                                                     window_title=WARM_WINDOW_TITLE, session_type='warm_display'),
+                config_values.get('device_id'), priority=scrcpy_handler.PRIORITY_BACKGROUND).result()
+            with self._lock:
+                if generation != self._generation:
+                    raise RuntimeError("pool drained")
+                self._spawning[key] = process
+            output = scrcpy_handler.get_session_output(process.pid)
+            event = output.wait_for('display_created', timeout=DISPLAY_TIMEOUT) if output else None
+            if not event:
+                raise RuntimeError("scrcpy did not create a virtual display")
+            adb_handler.wait_for_display(event['display_id'])
+            window_ids = _xdotool('search', '--sync', '--pid', str(process.pid), '--name', WARM_WINDOW_TITLE)
+            window_id = window_ids.split()[0] if window_ids else None
+            if window_id:
+                _xdotool('windowminimize', window_id)
+            with self._lock:
+                if generation != self._generation or self._spawning.get(key) is not process:
+                    raise RuntimeError("pool drained")
+                del self._spawning[key]
+                self._warm[key] = {'process': process, 'display_id': event['display_id'], 'window_id': window_id}
+            print(f"[display_pool] Warm display {event['display_id']} ready (PID={process.pid})")
+        except Exception as e:
+            print(f"[display_pool] Could not prepare a warm display: {e}")
+            with self._lock:
+                if generation == self._generation:
+                    self._spawning.pop(key, None)
+            if process:
+                scrcpy_handler.kill_scrcpy_session(process.pid)
+
+
+_pool = VirtualDisplayPool()
+atexit.register(_pool.drain)
+
+
+def get_pool():
+    return _pool
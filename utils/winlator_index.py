@@ -0,0 +1,50 @@
+# FILE: utils/winlator_index.py
+# PURPOSE: Índice incremental dos atalhos do Winlator, persistido por dispositivo.
+#          Uma impressão digital da pasta evita reler atalhos que não mudaram.
+
+from utils import adb_handler
+
+
+def empty_index():
+    return {'fingerprint': None, 'shortcuts': {}}
+
+
+def games_from_index(index):
+    """Retorna os registros do índice ordenados como a grade os exibe."""
+    return sorted(index.get('shortcuts', {}).values(), key=lambda game: (game['name'], game['path']))
+
+
+def refresh_index(index, device_id=None, force=False):
+    """
+    Atualiza o índice e retorna (novo_índice, mudou).
+
+    Se a impressão digital da pasta for a mesma do índice salvo, nada é lido.
+    Caso contrário (ou com `force`), lista tamanho/mtime de todos os atalhos e
+    só relê o conteúdo dos que são novos ou mudaram.
+    """
+    index = index or empty_index()
+    fingerprint = adb_handler.get_winlator_fingerprint(device_id)
+    if fingerprint is None:
+        # Sem resposta do dispositivo: não descarta o índice salvo.
+        raise ConnectionError("Could not read the Winlator shortcuts folder")
+    if not force and index.get('shortcuts') and fingerprint == index.get('fingerprint'):
+        return index, False
+
+    old_shortcuts = index.get('shortcuts', {})
+    stats = adb_handler.stat_winlator_shortcuts(device_id)
+
+    shortcuts = {}
+    changed_paths = []
+    for path, (size, mtime) in stats.items():
+        record = old_shortcuts.get(path)
+        if record and record.get('size') == size and record.get('mtime') == mtime:
+            shortcuts[path] = record
+        else:
+            changed_paths.append(path)
+
+    for record in adb_handler.read_winlator_shortcuts(changed_paths, device_id):
+        shortcuts[record['path']] = record
+
+    changed = bool(changed_paths) or set(shortcuts) != set(old_shortcuts)
+    print(f"[winlator_index] {len(shortcuts)} shortcuts, {len(changed_paths)} re-read")
+    return {'fingerprint': fingerprint, 'shortcuts': shortcuts}, changed